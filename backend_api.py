@@ -2,33 +2,241 @@
 
 import os
 import sys
+import socket
 import asyncio
 import subprocess
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Form, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Form, File, UploadFile, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse, ORJSONResponse, Response
-from typing import Optional
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 import uuid
 import base64
+import hashlib
+import hmac
+import shutil
 from pydantic import BaseModel
 import time
 import json
+import codecs
+import orjson
+from worker_pool import WorkerPool, terminate_process_group
+from job_log import log
+from metrics import MetricsRegistry, BytesServedMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from job_scheduler import JobScheduler, QueueFullError
+from result_cache import ResultCache
+from target_analysis import TargetAnalysisCache
+from facefusion_progress import ProgressParser, PROGRESS_FIELDS
+from job_events import JobEventHub, TERMINAL_STATES
+from job_index import JobIndex
+from job_store import JobStore
+from state_backend import create_state_backend
+from temp_reaper import TempReaper, job_files
+from video_catalog import VideoCatalog, probe_video
+from job_workspace import JobWorkspace, JobWorkspaceManager, estimate_bytes
+from output_finalize import faststart, is_fragmented, encode_renditions, rendition_name, rendition_path, choose_rendition
+from source_face import SourceFaceError, prepare_source_face, source_face_size
+from gpu_devices import DevicePool, discover_devices, query_nvidia_smi
+from processing_profiles import ProfileRegistry, ProfileError, ProcessingProfile, DEFAULT_PROFILES_PATH
+from file_serving import (
+    file_etag, last_modified, etag_matches, base64_length, base64_json_envelope, iter_base64_json,
+    stat_or_none, serve_file, GrowingFileResponse,
+)
 
-# RunPod 환경 설정 - 워크스페이스가 /workspace에 있음
-WORKSPACE_DIR = Path("/workspace")
+# RunPod 환경 설정 - 워크스페이스가 /workspace에 있음 (벤치마크/로컬 테스트는 FACEFUSION_WORKSPACE 로 변경)
+WORKSPACE_DIR = Path(os.environ.get('FACEFUSION_WORKSPACE', '/workspace'))
 FACEFUSION_DIR = WORKSPACE_DIR / "facefusion"
+FACEFUSION_PYTHON = os.environ.get('FACEFUSION_PYTHON', sys.executable)  # 콜드 실행용 facefusion 환경 인터프리터
 TEMP_DIR = WORKSPACE_DIR / "temp_api"
 VIDEOS_DIR = WORKSPACE_DIR / "videos"
+TARGET_ANALYSIS_DIR = WORKSPACE_DIR / "target_analysis"  # 타겟 영상 사전 분석 캐시
 
 # 디렉토리 생성
-TEMP_DIR.mkdir(exist_ok=True)
-VIDEOS_DIR.mkdir(exist_ok=True)
+TEMP_DIR.mkdir(parents=True, exist_ok=True)
+VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
+
+# 🎬 영상 카탈로그 - 시작 시 한 번 만들고 VIDEOS_DIR 가 바뀔 때만 갱신 (요청마다 glob/stat 하지 않음)
+VIDEO_CATALOG_INTERVAL = float(os.environ.get('FACEFUSION_VIDEO_CATALOG_INTERVAL', '10'))  # 디렉토리 확인 주기 (초)
+video_catalog = VideoCatalog(VIDEOS_DIR, WORKSPACE_DIR / "video_catalog.json", WORKSPACE_DIR / "video_posters")
+
+# 결과 캐시 - 같은 사진 + 같은 영상 + 같은 설정이면 재처리 없이 바로 반환 (0이면 비활성화)
+# TEMP_DIR 은 /files 로 공개되므로 그 밖에 둠 - 적중하면 작업 자신의 출력 경로로 링크/복사해서만 서빙
+RESULT_CACHE_MB = int(os.environ.get('FACEFUSION_RESULT_CACHE_MB', '5120'))
+RESULT_CACHE_DIR = WORKSPACE_DIR / "result_cache"
+LEGACY_RESULT_CACHE_DIR = TEMP_DIR / "result_cache"  # 예전 위치 (누구나 /files/result_cache/ 로 받을 수 있었음)
+if LEGACY_RESULT_CACHE_DIR.is_dir():
+    if RESULT_CACHE_DIR.exists():
+        shutil.rmtree(LEGACY_RESULT_CACHE_DIR, ignore_errors=True)
+    else:
+        os.replace(LEGACY_RESULT_CACHE_DIR, RESULT_CACHE_DIR)
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MB * 1024 * 1024)
+
+# 업로드 제한 - 카메라 캡처 JPEG 기준으로 충분한 크기
+MAX_UPLOAD_BYTES = int(os.environ.get('FACEFUSION_MAX_UPLOAD_MB', '10')) * 1024 * 1024
+SOURCE_FACE_CHECK = os.environ.get('FACEFUSION_SOURCE_FACE_CHECK', '0') == '1'  # 업로드 시 얼굴 수 확인 + 크롭 (Haar 라 오탐이 있어 선택)
+UPLOAD_CHUNK_SIZE = 256 * 1024
+JPEG_EOI_SEARCH_BYTES = 64  # 끝 마커 뒤에 패딩이 붙는 카메라가 있어 마지막 몇 바이트 안에서 찾음
 
-# 작업 상태 추적 - 메모리 기반으로 더 빠르게
+# 작업 상태 추적 - 메모리 기반으로 더 빠르게 (상태 전환은 SQLite 에도 기록해 재시작 후 복구)
 job_status = {}
 job_file_paths = {}  # job_id -> actual file path 매핑
+job_events = JobEventHub()  # 상태 변경 푸시 채널
+job_index = JobIndex()  # 상태별/생성 시각 순 보조 인덱스 (POST /status/batch, GET /jobs)
+JOB_STATES = {"queued", "processing", *TERMINAL_STATES}
+ADMIN_TOKEN = os.environ.get('FACEFUSION_ADMIN_TOKEN')  # GET /jobs 의 Authorization: Bearer 토큰 (없으면 GET /jobs 비활성화)
+STATUS_BATCH_MAX = 200  # POST /status/batch 한 번에 조회할 최대 작업 수
+JOBS_PAGE_MAX = 500  # GET /jobs 한 페이지 최대 크기
+
+# 여러 프로세스/노드 배포 - 작업 상태를 공유하고, 결과 요청은 작업을 처리한 노드로 넘김
+NODE_ID = os.environ.get('FACEFUSION_NODE_ID', socket.gethostname())
+NODE_URL = os.environ.get('FACEFUSION_NODE_URL') or (
+    f"https://{os.environ['RUNPOD_POD_ID']}-8001.proxy.runpod.net" if os.environ.get('RUNPOD_POD_ID') else None
+)
+STATE_BACKEND = os.environ.get('FACEFUSION_STATE_BACKEND', 'memory')  # memory | sqlite | redis
+REDIS_URL = os.environ.get('FACEFUSION_REDIS_URL', 'redis://localhost:6379/0')
+REMOTE_STATUS_POLL_INTERVAL = 1.0  # 다른 프로세스의 작업은 푸시 대신 공유 상태를 주기적으로 확인 (초)
+job_store = JobStore(WORKSPACE_DIR / "jobs.sqlite3", NODE_ID, NODE_URL)  # TEMP_DIR 은 /files 로 공개되므로 그 밖에 둠
+
+# 오래된 작업/파일 정리 - 종료 후 TTL 이 지났거나 TEMP_DIR 이 한도를 넘으면 삭제
+JOB_TTL_HOURS = float(os.environ.get('FACEFUSION_JOB_TTL_HOURS', '24'))
+TEMP_QUOTA_MB = int(os.environ.get('FACEFUSION_TEMP_QUOTA_MB', '20480'))
+REAPER_INTERVAL = 300  # 정리 주기 (초)
+temp_reaper = TempReaper(TEMP_DIR, job_store, JOB_TTL_HOURS * 3600, TEMP_QUOTA_MB * 1024 * 1024)
+state_backend = create_state_backend(STATE_BACKEND, job_store, REDIS_URL, JOB_TTL_HOURS * 3600)
+
+PROGRESS_PUBLISH_INTERVAL = 0.5  # 진행률 푸시 최소 간격 (초)
+STATUS_KEEPALIVE_INTERVAL = 15  # 푸시 연결 유지 신호 간격 (초)
+STATUS_QUEUED_REFRESH = 5  # 대기 중인 작업의 순번/대기 시간 갱신 간격 (초)
+STATUS_SSE_RETRY_MS = 2000  # EventSource 재연결 대기 시간
+
+# 📈 Prometheus 메트릭 (/metrics) - 큐 길이/실행 수/캐시 적중은 수집 시점에 읽음
+metrics = MetricsRegistry()
+job_phase_seconds = metrics.histogram(
+    "facefusion_job_phase_seconds", "Job latency by phase (queue_wait, model_load, processing, finalize)", ["phase", "tier"])
+jobs_finished_total = metrics.counter("facefusion_jobs_finished_total", "Jobs that reached a terminal state", ["status", "tier"])
+jobs_failed_total = metrics.counter("facefusion_jobs_failed_total", "Failed jobs by error class", ["error_class"])
+status_requests_total = metrics.counter(
+    "facefusion_status_requests_total", "Status checks (poll requests, SSE/WebSocket subscriptions)", ["transport"])
+bytes_served_total = metrics.counter("facefusion_bytes_served_total", "Response body bytes by endpoint", ["endpoint"])
+source_face_rejections_total = metrics.counter(
+    "facefusion_source_face_rejections_total", "Uploads rejected before queueing (no_face, multiple_faces, undecodable)", ["reason"])
+source_face_seconds = metrics.histogram(
+    "facefusion_source_face_seconds", "Upload-time face check + crop duration", buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+metrics.gauge("facefusion_queue_depth", "Jobs waiting in the scheduler queue", callback=lambda: scheduler.queue_depth)
+metrics.gauge("facefusion_active_jobs", "Jobs running on a GPU slot", callback=lambda: len(scheduler.running))
+metrics.counter("facefusion_result_cache_lookups_total", "Result cache lookups", ["result"],
+                callback=lambda: {("hit",): result_cache.hits, ("miss",): result_cache.misses})
+metrics.gauge("facefusion_result_cache_hit_ratio", "Result cache hits / lookups", callback=lambda: result_cache.stats()["hit_ratio"])
+metrics.gauge("facefusion_status_subscribers", "Open SSE/WebSocket status subscriptions", callback=lambda: job_events.subscriber_count())
+job_temp_bytes = metrics.histogram(
+    "facefusion_job_temp_bytes", "Peak FaceFusion temp frame bytes per job (or batch)", ["storage"],
+    buckets=tuple(mb * 1024 * 1024 for mb in (64, 256, 512, 1024, 2048, 4096, 8192, 16384)))
+metrics.gauge("facefusion_job_temp_ram_bytes", "RAM temp workspace bytes reserved or in use", callback=lambda: job_workspaces.ram_used)
+
+def classify_error(error: Optional[str]) -> str:
+    """실패 메시지 -> 메트릭 라벨용 에러 종류"""
+    error = (error or "").lower()
+    for marker, error_class in (
+        ("timed out", "timeout"),
+        ("worker crashed", "worker_crash"),
+        ("interrupted by server restart", "interrupted"),
+        ("no face", "no_face"),
+        ("out of memory", "out_of_memory"),
+        ("no such file", "missing_file"),
+    ):
+        if marker in error:
+            return error_class
+    return "facefusion_error"
+
+def record_job_metrics(job_id: str, previous: dict, status: dict):
+    """종료 상태로 바뀔 때 상태/에러 종류별 카운터"""
+    state = status.get("status")
+    if state not in TERMINAL_STATES or previous.get("status") == state:
+        return
+    jobs_finished_total.inc(status=state, tier=status.get("tier", "full"))
+    if state == "failed":
+        jobs_failed_total.inc(error_class=status.get("error_class") or classify_error(status.get("error")))
+
+def observe_queue_wait(job_id: str):
+    """대기열에서 나와 실행을 시작할 때 (상태가 processing 으로 바뀌기 전에 호출)"""
+    status = job_status.get(job_id, {})
+    if status.get("queued_at"):
+        job_phase_seconds.observe(time.time() - status["queued_at"], phase="queue_wait", tier=status.get("tier", "full"))
+
+# 상태가 바뀌어도 유지되는 작업 정보 (묶음 처리, 미리보기 관계, 임시 프레임 사용량)
+STICKY_STATUS_FIELDS = ("batch_id", "batch_size", "tier", "parent_job_id", "preview_job_id", "profile", "profile_params", "device",
+                        "temp_bytes", "temp_storage")
+
+def set_job_status(job_id: str, status: dict):
+    """작업 상태 교체 - 모든 상태 전환은 여기를 거쳐 구독자에게 전달됨"""
+    previous = job_status.get(job_id, {})
+    status = {**{key: previous[key] for key in STICKY_STATUS_FIELDS if key in previous}, **status}
+    job_status[job_id] = status
+    job_index.update(job_id, status["status"])
+    record_job_metrics(job_id, previous, status)
+    state_backend.save(job_id, status, status.get("output_path") or job_file_paths.get(job_id), True)
+    publish_job_status(job_id, status)
+
+def update_job_status(job_id: str, **fields):
+    """작업 상태 일부 갱신 (진행률 등) - 진행률만 바뀌면 공유 백엔드에만 기록"""
+    if job_id not in job_status:
+        return
+    previous = job_status[job_id]
+    status = {**previous, **fields}
+    job_status[job_id] = status
+    transition = status.get("status") != previous.get("status")
+    if transition:
+        job_index.update(job_id, status["status"])
+    state_backend.save(job_id, status, status.get("output_path") or job_file_paths.get(job_id), transition)
+    publish_job_status(job_id, status)
+
+def publish_job_status(job_id: str, status: dict):
+    job_events.publish(job_id, status)
+    # 미리보기 진행은 본 작업 상태에도 포함되므로 본 작업 구독자에게도 알림
+    parent_id = status.get("parent_job_id")
+    if parent_id in job_status:
+        job_events.publish(parent_id, job_status[parent_id])
+
+def forget_job(job_id: str):
+    job_status.pop(job_id, None)
+    job_index.remove(job_id)
+    job_file_paths.pop(job_id, None)
+    job_last_seen.pop(job_id, None)
+
+async def lookup_job(job_id: str) -> tuple:
+    """(상태, 소유 노드 URL) - 로컬에 없으면 공유 백엔드에서 찾음 (다른 워커/노드가 받은 작업)
+    
+    같은 노드(같은 TEMP_DIR)의 다른 워커 작업이면 URL 은 None - 파일을 직접 서빙할 수 있음
+    """
+    if job_id in job_status:
+        return job_status[job_id], None
+    if not state_backend.shared:
+        return None, None
+    record = await run_in_threadpool(state_backend.get, job_id)
+    if not record:
+        return None, None
+    owner_url = record.get("owner_url") if record.get("owner") != NODE_ID else None
+    return record["status"], owner_url
+
+def redirect_to_owner(owner_url: str, request: Request) -> RedirectResponse:
+    """결과 파일이 다른 노드에 있으면 그 노드로 같은 요청을 넘김 (307 - 메서드/헤더 유지)"""
+    url = owner_url.rstrip("/") + request.url.path
+    if request.url.query:
+        url += f"?{request.url.query}"
+    return RedirectResponse(url, status_code=307)
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
 
 app = FastAPI(
     title="FaceFusion Backend API",
@@ -47,14 +255,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"],
     allow_headers=["*", "Range", "Content-Range", "Accept-Ranges"],
-    expose_headers=["*", "Content-Range", "Accept-Ranges", "Content-Length"],
+    expose_headers=["*", "Content-Range", "Accept-Ranges", "Content-Length", "ETag", "Last-Modified"],
 )
+app.add_middleware(BytesServedMiddleware, counter=bytes_served_total)
 
 class ProcessResponse(BaseModel):
     success: bool
     output_path: Optional[str] = None
     error: Optional[str] = None
     job_id: str
+    preview_job_id: Optional[str] = None
 
 # 파일 경로 미리 캐싱 - 매번 찾지 않도록 최적화
 def get_cached_output_path(job_id: str) -> Optional[Path]:
@@ -77,106 +287,650 @@ def get_cached_output_path(job_id: str) -> Optional[Path]:
     
     return None
 
-async def process_facefusion(job_id: str, source_path: Path, target_path: Path, output_path: Path):
-    """백그라운드에서 FaceFusion 처리 - 최적화됨"""
+def stream_output_path(job_id: str) -> Path:
+    """처리 중 결과가 쌓이는 파일 - 완료되면 워커가 output_{job_id}.mp4 로 이름을 바꿈"""
+    return TEMP_DIR / f"output_{job_id}.partial.mp4"
+
+def get_thread_count() -> str:
+    """H200에 최적화된 스레드 수"""
+    thread_count = os.environ.get('RUNPOD_CPU_COUNT', '16')  # H200에 맞게 더 많은 스레드
+    if int(thread_count) > 64:
+        thread_count = '64'  # H200은 더 많은 스레드 처리 가능
+    return thread_count
+
+# 미리보기 - 전체 렌더 전에 앞부분만 낮은 해상도, 인핸서 없이 먼저 처리 (요청에서 preview=true)
+PREVIEW_DEFAULT = os.environ.get('FACEFUSION_PREVIEW', '0') == '1'
+PREVIEW_FRAMES = int(os.environ.get('FACEFUSION_PREVIEW_FRAMES', '90'))  # 30fps 영상 기준 3초
+PREVIEW_RESOLUTION = os.environ.get('FACEFUSION_PREVIEW_RESOLUTION', '640x360')
+PREVIEW_PRIORITY = -1  # 스케줄러 우선순위 (작을수록 먼저) - 전체 렌더(0)보다 앞에
+
+def preview_job_id(job_id: str) -> str:
+    # 파일 이름이 output_{job_id}.preview.mp4 가 되어 본 작업의 정리(cleanup, 리퍼)에 함께 포함됨
+    return f"{job_id}.preview"
+
+# 처리 프로필 - 모델/pixel boost/해상도/스레드 수 등은 설정 파일에서 (요청마다 profile 로 선택)
+PROFILES_PATH = Path(os.environ.get('FACEFUSION_PROFILES', str(DEFAULT_PROFILES_PATH)))
+processing_profiles = ProfileRegistry.load(PROFILES_PATH, os.environ.get('FACEFUSION_PROFILE') or None)
+
+def resolve_profile(profile: ProcessingProfile, tier: str = "full") -> ProcessingProfile:
+    """미리보기면 프로필 위에 빠른 설정을 덮어씀 (인핸서 없이, 낮은 해상도)"""
+    if tier != "preview":
+        return profile
+    return profile.with_overrides(
+        processors=["face_swapper"],
+        face_swapper_pixel_boost="128x128",
+        output_video_resolution=PREVIEW_RESOLUTION,
+    )
+
+def build_facefusion_args(source_path: Path, target_path: Path, output_path: Path, profile: ProcessingProfile, tier: str = "full") -> list:
+    """FaceFusion headless-run 인자 리스트 - 콜드 실행과 워커 풀이 공유 (셸을 거치지 않는 argv)"""
+    args = [
+        "headless-run",
+        "--source-paths", str(source_path),
+        "--target-path", str(target_path),
+        "--output-path", str(output_path),
+        *resolve_profile(profile, tier).cli_args(get_thread_count()),
+        "--execution-providers", "cuda",
+        "--output-audio-encoder", "aac",
+        "--face-selector-mode", "one",
+        "--face-selector-order", "right-left",
+        "--log-level", "info",  # 진행바/단계 로그가 있어야 진행률을 파싱할 수 있음
+    ]
+    if tier == "preview":
+        args += ["--trim-frame-end", str(PREVIEW_FRAMES)]
+    return args
+
+def build_facefusion_env(thread_count: str, device: Optional[str] = None) -> dict:
+    """FaceFusion 실행 환경 변수 최적화 - 작업마다 배정된 GPU 하나만 보이게"""
+    env = os.environ.copy()
+    env['HF_HOME'] = '/workspace'
+    env['PYTHONIOENCODING'] = 'utf-8'
+    env['CUDA_VISIBLE_DEVICES'] = device or GPU_DEVICES[0]
+    env['OMP_NUM_THREADS'] = thread_count
+    return env
+
+# ⚡ 상주형 워커 풀 - 모델을 한 번만 로드 (0이면 매 작업마다 콜드 실행)
+WORKER_POOL_SIZE = int(os.environ.get('FACEFUSION_WORKERS', '1'))
+WORKER_ENGINE = os.environ.get('FACEFUSION_WORKER_ENGINE', 'facefusion')  # 테스트용: stub
+PREPARE_TARGETS = os.environ.get('FACEFUSION_PREPARE_TARGETS', '1') == '1'
+# 처리 중에도 재생 - 워커가 결과를 fragmented MP4 로 이어 쓰고 /video 가 자라는 파일을 서빙 (워커 풀 필요)
+# 프레임 단위 파이프라인(process_headless 대신)을 쓰므로 명시적으로 켤 때만
+PROGRESSIVE_OUTPUT = os.environ.get('FACEFUSION_PROGRESSIVE_OUTPUT', '0') == '1'
+# 🏁 결과 마무리 - faststart 리먹스(재인코딩 없음) + 모바일용 저해상도 렌디션 (예: "480,360")
+FASTSTART_OUTPUT = os.environ.get('FACEFUSION_FASTSTART', '1') == '1'
+RENDITION_HEIGHTS = [int(h) for h in os.environ.get('FACEFUSION_RENDITIONS', '').split(',') if h.strip()]
+rendition_slots = asyncio.Semaphore(int(os.environ.get('FACEFUSION_RENDITION_JOBS', '2')))  # 동시에 인코딩할 작업 수 (CPU)
+# 💾 작업별 임시 프레임 디렉토리 (FaceFusion --temp-path) - RAM(/dev/shm) 우선, 한도를 넘으면 디스크
+JOB_TEMP_RAM_DIR = os.environ.get('FACEFUSION_JOB_TEMP_RAM', '/dev/shm/facefusion-jobs')  # 빈 값이면 디스크만
+JOB_TEMP_RAM_MB = os.environ.get('FACEFUSION_JOB_TEMP_RAM_MB')  # API 프로세스별 RAM 한도 (없으면 tmpfs 크기의 절반)
+JOB_TEMP_SAMPLE_INTERVAL = 2  # 사용량 측정 간격 (초)
+job_workspaces = JobWorkspaceManager(
+    Path(JOB_TEMP_RAM_DIR) if JOB_TEMP_RAM_DIR else None, WORKSPACE_DIR / "job_temp",
+    int(JOB_TEMP_RAM_MB) * 1024 * 1024 if JOB_TEMP_RAM_MB else None
+)
+worker_pool: Optional[WorkerPool] = None
+target_analysis = TargetAnalysisCache(TARGET_ANALYSIS_DIR)
+
+# 🎛️ GPU 여러 장 - 장치마다 워커를 FACEFUSION_WORKERS 개씩 띄우고 작업을 가장 한가한 장치에 배정
+# (FACEFUSION_GPUS=0,1 로 지정 가능, 못 찾으면 기존처럼 0번 하나)
+GPU_DEVICES = discover_devices() or ["0"]
+JOBS_PER_GPU = int(os.environ.get('FACEFUSION_JOBS_PER_GPU', str(max(WORKER_POOL_SIZE, 1))))
+device_pool = DevicePool(GPU_DEVICES, JOBS_PER_GPU)
+
+# ⏱️ 시간 제한/취소 - 멈춘 작업이나 기다리는 사람이 없는 작업이 GPU 를 계속 잡고 있지 않도록
+JOB_TIMEOUT_SECONDS = float(os.environ.get('FACEFUSION_JOB_TIMEOUT', '900'))  # 프로필에 timeout_seconds 가 없을 때
+ABANDON_SECONDS = float(os.environ.get('FACEFUSION_ABANDON_SECONDS', '120'))  # 상태 확인이 이만큼 없으면 취소 (0이면 비활성화)
+ABANDON_CHECK_INTERVAL = 10  # 버려진 작업 확인 주기 (초)
+job_last_seen = {}  # job_id -> 마지막 상태 확인 시각
+job_cancellations = {}  # job_id -> (최종 상태, 에러 메시지) - 실행 중에 취소된 작업
+cold_processes = {}  # job_id -> 워커 풀 없이 실행 중인 FaceFusion 프로세스
+
+def touch_job(job_id: str):
+    """클라이언트가 아직 결과를 기다리고 있음 (폴링/푸시 연결)"""
+    if job_id in job_status:
+        job_last_seen[job_id] = time.time()
+
+def cancel_running_job(job_id: str, state: str = "cancelled", error: str = "Cancelled by client") -> bool:
+    """대기 중이면 대기열에서 빼고 바로 종료 상태로, 실행 중이면 프로세스 그룹을 종료
+    
+    실행 중인 작업의 최종 상태는 finish_job 이 job_cancellations 를 보고 정함.
+    묶음 작업은 묶음의 모든 작업이 취소됐을 때만 워커를 종료 (나머지는 결과만 버림).
+    """
+    status = job_status.get(job_id)
+    if not status or status["status"] in TERMINAL_STATES:
+        return False
+    if scheduler.cancel(job_id):
+        log(f"🛑 Removed from queue: {error}", job_id=job_id, level="warning", reason=state)
+        set_job_status(job_id, {"status": state, "progress": 0, "stage": status.get("stage"), "error": error})
+        return True
+    if job_id in job_cancellations:
+        return True
+    job_cancellations[job_id] = (state, error)
+    update_job_status(job_id, cancel_requested=True)
+    log(f"🛑 Cancelling: {error}", job_id=job_id, level="warning", reason=state)
+    batch_id = status.get("batch_id")
+    if job_id in cold_processes:
+        asyncio.create_task(terminate_process_group(cold_processes[job_id]))
+    elif worker_pool and batch_id:
+        members = [jid for jid, st in job_status.items() if st.get("batch_id") == batch_id and st["status"] == "processing"]
+        if all(jid in job_cancellations for jid in members):
+            worker_pool.cancel(batch_id)
+    elif worker_pool and worker_pool.available:
+        worker_pool.cancel(job_id)
+    return True
+
+def cancel_with_preview(job_id: str, state: str = "cancelled", error: str = "Cancelled by client") -> bool:
+    preview_id = job_status.get(job_id, {}).get("preview_job_id")
+    if preview_id:
+        cancel_running_job(preview_id, state, error)
+    return cancel_running_job(job_id, state, error)
+
+def start_job_timeout(job_ids: list, timeout: float) -> asyncio.TimerHandle:
+    """timeout 초 뒤에도 안 끝났으면 실패 처리하며 중단 - 끝나면 반환된 핸들을 cancel()"""
+    def expire():
+        for job_id in job_ids:
+            cancel_running_job(job_id, "failed", f"Timed out after {timeout:.0f}s")
+    return asyncio.get_running_loop().call_later(timeout, expire)
+
+def target_analysis_args(target_path: Path) -> list:
+    """사전 분석에 쓰는 인자 - 실제 작업과 같은 설정이어야 캐시가 맞음"""
+    return build_facefusion_args(TEMP_DIR / "prepare.jpg", target_path, TEMP_DIR / "prepare.mp4", processing_profiles.get())
+
+async def prepare_target_videos():
+    """워커 예열 후 시나리오 영상별 프레임/얼굴 분석 캐시 준비 (바뀐 영상만 다시 분석)"""
+    await worker_pool.start()
+    if not PREPARE_TARGETS or not worker_pool.available:
+        return
+    for target_path in video_catalog.paths():
+        started = time.time()
+        result = await worker_pool.prepare(target_path, target_analysis_args(target_path))
+        if result.get("error"):
+            log(f"⚠️ Prepare {target_path.name}: {result['error']}", level="warning", target=target_path.name)
+        elif result.get("prepared"):
+            state = "cached" if result.get("cached") else f"{result.get('frame_count')} frames"
+            log(f"✅ Prepared {target_path.name}: {state} ({time.time() - started:.1f}s)", target=target_path.name)
+
+@app.on_event("startup")
+async def load_video_catalog():
+    """요청을 받기 전에 카탈로그 준비 (바뀐 영상만 해시/분석), 이후 주기적으로 디렉토리 확인"""
+    await run_in_threadpool(video_catalog.refresh)
+    log(f"🎬 Video catalog: {[(entry['id'], entry['filename']) for entry in video_catalog.entries]}",
+        videos=len(video_catalog.entries))
+    asyncio.create_task(refresh_video_catalog())
+
+async def refresh_video_catalog():
+    while True:
+        await asyncio.sleep(VIDEO_CATALOG_INTERVAL)
+        try:
+            if await run_in_threadpool(video_catalog.refresh):
+                log(f"🎬 Video catalog changed: {[(entry['id'], entry['filename']) for entry in video_catalog.entries]}",
+                    videos=len(video_catalog.entries))
+        except Exception as e:
+            log(f"🎬 Video catalog refresh error: {e}", level="error")
+
+@app.on_event("startup")
+async def restore_jobs():
+    """저장소에서 작업 상태 복구 - 완료된 결과는 계속 서빙, 실행 중이던 작업은 실패 처리"""
+    restored = interrupted = 0
+    for job in job_store.load():
+        job_id, status = job["job_id"], job["status"]
+        # 같은 호스트의 다른 워커가 아직 처리 중인 작업은 건드리지 않음 (sqlite 백엔드)
+        if job["state"] not in TERMINAL_STATES and job["owner"] == NODE_ID and job["owner_pid"] != os.getpid() \
+                and pid_alive(job["owner_pid"]):
+            continue
+        if job["state"] == "completed":
+            if not job["output_path"] or not Path(job["output_path"]).exists():
+                job_store.delete([job_id])
+                continue
+            job_file_paths[job_id] = job["output_path"]
+        elif job["state"] not in TERMINAL_STATES:
+            status = {"status": "failed", "progress": 0, "stage": status.get("stage"), "error": "Interrupted by server restart"}
+            state_backend.save(job_id, status, None, True)
+            interrupted += 1
+        job_status[job_id] = status
+        job_index.update(job_id, status["status"], job["created_at"])
+        restored += 1
+    log(f"📂 Restored {restored} jobs from {job_store.db_path} ({interrupted} interrupted, state backend: {state_backend.kind}, node {NODE_ID})")
+    asyncio.create_task(reap_temp_files())
+    if ABANDON_SECONDS <= 0:
+        return
+    if state_backend.shared:
+        # 상태 확인 요청이 다른 프로세스/노드로 갈 수 있어 여기서는 마지막 확인 시각을 알 수 없음
+        log("⏱️ Abandoned job cancellation disabled (shared state backend)")
+        return
+    asyncio.create_task(cancel_abandoned_jobs())
+
+async def cancel_abandoned_jobs():
+    """상태 확인(폴링/SSE/WebSocket)이 ABANDON_SECONDS 동안 없는 작업은 클라이언트가 떠난 것으로 보고 취소"""
+    while True:
+        await asyncio.sleep(ABANDON_CHECK_INTERVAL)
+        try:
+            now = time.time()
+            for job_id, status in list(job_status.items()):
+                # 미리보기는 본 작업을 따라감
+                if status["status"] in TERMINAL_STATES or status.get("parent_job_id"):
+                    continue
+                if job_events.subscriber_count(job_id):
+                    touch_job(job_id)
+                    continue
+                idle = now - job_last_seen.setdefault(job_id, now)
+                if idle > ABANDON_SECONDS:
+                    cancel_with_preview(job_id, "cancelled", f"Abandoned (no status check for {idle:.0f}s)")
+        except Exception as e:
+            log(f"⏱️ Abandon check error: {e}", level="error")
+
+async def reap_temp_files():
+    """주기적으로 만료된 작업과 고아 파일 정리 (파일 시스템 작업은 스레드 풀에서)"""
+    while True:
+        try:
+            active = [job_id for job_id, status in job_status.items() if status.get("status") not in TERMINAL_STATES]
+            reaped = await run_in_threadpool(temp_reaper.run_once, active)
+            for job_id in reaped:
+                forget_job(job_id)
+            if reaped:
+                log(f"🧹 Reaped {len(reaped)} expired jobs (temp usage {temp_reaper.last_usage/1024/1024:.0f}MB)", reaped=len(reaped))
+        except Exception as e:
+            log(f"🧹 Reaper error: {e}", level="error")
+        await asyncio.sleep(REAPER_INTERVAL)
+
+@app.on_event("startup")
+async def start_job_workspaces():
+    """비정상 종료로 남은 임시 프레임 디렉토리 정리 + 사용량 측정 시작"""
+    removed = await run_in_threadpool(job_workspaces.sweep, pid_alive)
+    stats = job_workspaces.stats()
+    log(f"💾 Job temp workspaces: ram={stats['ram_root']} ({stats['ram_quota_bytes']/1024/1024:.0f}MB quota), "
+        f"disk={stats['disk_root']} ({removed} stale removed)")
+    asyncio.create_task(sample_job_workspaces())
+
+async def sample_job_workspaces():
+    while True:
+        await asyncio.sleep(JOB_TEMP_SAMPLE_INTERVAL)
+        if not job_workspaces.workspaces:
+            continue
+        try:
+            await run_in_threadpool(job_workspaces.sample)
+        except Exception as e:
+            log(f"💾 Temp workspace sampling error: {e}", level="error")
+
+def estimate_job_temp_bytes(target_path: Path, profile: ProcessingProfile, tier: str) -> int:
+    """추출될 프레임 크기 예상 - 카탈로그의 프레임 수 × 프로필 출력 해상도"""
+    entry = video_catalog.find(target_path)
+    frames = video_catalog.frame_count(entry) if entry else None
+    if tier == "preview":
+        frames = min(frames or PREVIEW_FRAMES, PREVIEW_FRAMES)
+    return estimate_bytes(frames, resolve_profile(profile, tier).params.get("output_video_resolution"))
+
+async def allocate_job_workspace(key: str, target_path: Path, profile: ProcessingProfile, tier: str) -> JobWorkspace:
+    """작업(또는 묶음) 전용 --temp-path 디렉토리"""
+    workspace = await run_in_threadpool(job_workspaces.allocate, key, estimate_job_temp_bytes(target_path, profile, tier))
+    owner = {"batch_id": key} if key.startswith("batch-") else {"job_id": key}
+    log(f"💾 Temp workspace on {workspace.storage} ({workspace.reserved/1024/1024:.0f}MB reserved)",
+        **owner, temp_storage=workspace.storage, temp_reserved=workspace.reserved)
+    return workspace
+
+async def release_job_workspace(key: str, job_ids: list):
+    """임시 프레임 디렉토리 삭제 (성공/실패/취소 모두) - 최대 사용량을 작업 상태에 기록, 이미 해제했으면 무시"""
+    workspace = await run_in_threadpool(job_workspaces.release, key)
+    if workspace is None:
+        return
+    job_temp_bytes.observe(workspace.peak_bytes, storage=workspace.storage)
+    for job_id in job_ids:
+        update_job_status(job_id, temp_bytes=workspace.peak_bytes, temp_storage=workspace.storage)
+
+@app.on_event("startup")
+async def start_worker_pool():
+    global worker_pool
+    if WORKER_POOL_SIZE <= 0:
+        log("Worker pool disabled - using cold FaceFusion subprocess per job")
+        return
+    worker_pool = WorkerPool(
+        WORKER_POOL_SIZE,
+        WorkerPool.default_command(WORKER_ENGINE, FACEFUSION_DIR, TARGET_ANALYSIS_DIR),
+        env=build_facefusion_env(get_thread_count()),
+        cwd=str(FACEFUSION_DIR) if FACEFUSION_DIR.exists() else None,
+        devices=GPU_DEVICES,
+    )
+    # 예열(모델 로딩)과 타겟 분석은 오래 걸리므로 서버 기동을 막지 않고 백그라운드에서 진행
+    asyncio.create_task(prepare_target_videos())
+
+@app.on_event("shutdown")
+async def stop_worker_pool():
+    if worker_pool:
+        await worker_pool.stop()
+    await run_in_threadpool(result_cache.flush)
+    await run_in_threadpool(state_backend.close)
+
+def progress_reporter(job_id: str):
+    """진행률 스냅샷을 작업 상태에 반영 - 단계가 바뀔 때 외에는 간격을 두고 푸시
+
+    마지막 스냅샷(final, 단계별 시간이 모두 담김)은 간격과 관계없이 항상 반영
+    """
+    last = {"time": 0.0, "stage": None}
+    
+    def report(snapshot: dict):
+        now = time.time()
+        if not snapshot.get("final") and snapshot.get("stage") == last["stage"] and now - last["time"] < PROGRESS_PUBLISH_INTERVAL:
+            return
+        last["time"], last["stage"] = now, snapshot.get("stage")
+        update_job_status(job_id, **{key: snapshot.get(key) for key in PROGRESS_FIELDS})
+    
+    return report
+
+async def run_facefusion_cold(job_id: str, args: list, thread_count: str, on_progress, device: Optional[str] = None):
+    """워커 풀 없이 FaceFusion 을 새 프로세스로 실행 (기존 방식)
+    
+    API 가 이미 facefusion micromamba 환경에서 돌고 있으므로 같은 인터프리터로 바로 실행 -
+    경로/인자를 셸 스크립트에 끼워 넣지 않음.
+    """
+    log(f"⚡ Running FaceFusion with {thread_count} threads on GPU {device or GPU_DEVICES[0]}", job_id=job_id)
+    
+    # 프로세스 실행 - stdout/stderr 를 합쳐서 조금씩 읽으며 진행률 파싱 (전체를 메모리에 모으지 않음)
+    process = await asyncio.create_subprocess_exec(
+        FACEFUSION_PYTHON, "facefusion.py", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        cwd=str(FACEFUSION_DIR),
+        env=build_facefusion_env(thread_count, device),
+        start_new_session=True  # 취소/시간 초과 시 FaceFusion 이 띄운 ffmpeg 까지 프로세스 그룹째 종료
+    )
+    cold_processes[job_id] = process
+    if job_id in job_cancellations:
+        # 프로세스를 띄우는 사이에 취소됨
+        asyncio.create_task(terminate_process_group(process))
+    
+    parser = ProgressParser()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
     try:
-        print(f"[{job_id}] ⚡ Starting optimized FaceFusion processing...")
-        job_status[job_id] = {"status": "processing", "progress": 0, "start_time": time.time()}
+        while True:
+            chunk = await process.stdout.read(65536)
+            if not chunk:
+                break
+            if parser.feed(decoder.decode(chunk)):
+                on_progress(parser.snapshot())
+        await process.wait()
+    finally:
+        cold_processes.pop(job_id, None)
+    parser.finish(process.returncode == 0)
+    # 마지막 단계(merge) 시간과 done 상태까지 반영 - 워커 풀의 마지막 progress 이벤트와 같은 역할
+    on_progress({**parser.snapshot(), "final": True})
+    return process.returncode, parser.error_message()
+
+async def process_facefusion(job_id: str, source_path: Path, target_path: Path, output_path: Path, cache_key: Optional[str] = None,
+                             tier: str = "full", profile: Optional[str] = None, device: Optional[str] = None):
+    """백그라운드에서 FaceFusion 처리 - 최적화됨 (device: 스케줄러가 배정한 GPU)"""
+    timeout_handle = None
+    try:
+        log("⚡ Starting optimized FaceFusion processing...", job_id=job_id)
+        observe_queue_wait(job_id)
+        set_job_status(job_id, {"status": "processing", "progress": 0, "stage": "starting", "start_time": time.time(), "device": device})
         
-        # H200에 최적화된 설정
-        thread_count = os.environ.get('RUNPOD_CPU_COUNT', '16')  # H200에 맞게 더 많은 스레드
-        if int(thread_count) > 64:
-            thread_count = '64'  # H200은 더 많은 스레드 처리 가능
+        processing_profile = processing_profiles.get(profile)
+        timeout_handle = start_job_timeout([job_id], processing_profile.timeout(JOB_TIMEOUT_SECONDS))
+        thread_count = processing_profile.thread_count(get_thread_count())
         
         # 출력 디렉토리 생성
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # H200 최적화된 FaceFusion 실행 명령 - 속도 우선 설정
-        bash_cmd = f"""
-        eval "$(micromamba shell hook --shell bash)"
-        micromamba activate facefusion
-        cd /workspace/facefusion
-        python facefusion.py headless-run \
-            --source-paths {source_path} \
-            --target-path {target_path} \
-            --output-path {output_path} \
-            --processors face_swapper face_enhancer \
-            --face-detector-model yolo_face \
-            --face-swapper-model inswapper_128_fp16 \
-            --face-swapper-pixel-boost 384x384 \
-            --output-video-resolution 1280x720 \
-            --execution-providers cuda \
-            --execution-thread-count {thread_count} \
-            --execution-queue-count 2 \
-            --output-audio-encoder aac \
-            --face-selector-mode one \
-            --face-selector-order right-left \
-            --log-level error
-        """
+        # 처리 프로필로 FaceFusion 실행 인자 생성 (임시 프레임은 작업 전용 디렉토리에)
+        workspace = await allocate_job_workspace(job_id, target_path, processing_profile, tier)
+        args = build_facefusion_args(source_path, target_path, output_path, processing_profile, tier)
+        args += ["--temp-path", str(workspace.path)]
+        
+        on_progress = progress_reporter(job_id)
+        if worker_pool and worker_pool.available:
+            log("⚡ Running on warm worker pool", job_id=job_id)
+            stream_path = None
+            if PROGRESSIVE_OUTPUT:
+                stream_path = stream_output_path(job_id)
+                update_job_status(job_id, progressive=True)
+            result = await worker_pool.run(job_id, args, on_progress, stream_path, device)
+            returncode, error_msg = result.get("returncode", 1), result.get("error")
+        else:
+            returncode, error_msg = await run_facefusion_cold(job_id, args, thread_count, on_progress, device)
+        await release_job_workspace(job_id, [job_id])
+        
+        finalize_seconds = await finalize_output(job_id, output_path, returncode)
+        await finish_job(job_id, output_path, returncode, error_msg, cache_key, finalize_seconds)
+            
+    except Exception as e:
+        log(f"💥 EXCEPTION: {str(e)}", job_id=job_id, level="error")
+        set_job_status(job_id, {"status": "failed", "progress": 0, "error": str(e), "error_class": "exception"})
+    finally:
+        if timeout_handle:
+            timeout_handle.cancel()
+        await release_job_workspace(job_id, [job_id])
+        job_cancellations.pop(job_id, None)
+        if worker_pool:
+            worker_pool.discard(job_id)
+
+def observe_job_phases(job_id: str, processing_time: float, finalize_time: float):
+    """완료된 작업의 단계별 시간 - 모델 로딩은 첫 FaceFusion 단계 전까지(starting), 마무리는 merge + 결과 파일 정리"""
+    status = job_status[job_id]
+    stage_times = status.get("stage_times") or {}
+    model_load = stage_times.get("starting", 0)
+    merge = stage_times.get("merge", 0)
+    tier = status.get("tier", "full")
+    job_phase_seconds.observe(model_load, phase="model_load", tier=tier)
+    job_phase_seconds.observe(max(0.0, processing_time - model_load - merge), phase="processing", tier=tier)
+    job_phase_seconds.observe(merge + finalize_time, phase="finalize", tier=tier)
+
+async def finalize_output(job_id: str, output_path: Path, returncode: int) -> float:
+    """성공한 결과의 moov 를 앞으로 (재인코딩 없이) - 브라우저가 끝부분을 먼저 받지 않고 바로 재생, 걸린 시간 반환
+
+    처리 중 스트리밍한 fragmented MP4 는 FACEFUSION_FASTSTART 와 관계없이 일반 MP4 로 리먹스
+    """
+    if returncode != 0 or job_id in job_cancellations or job_id not in job_status:
+        return 0.0
+    started = time.time()
+    try:
+        moved = False
+        if FASTSTART_OUTPUT or await run_in_threadpool(is_fragmented, output_path):
+            moved = await run_in_threadpool(faststart, output_path)
+    except OSError as e:
+        log(f"🏁 Faststart skipped: {e}", job_id=job_id, level="warning")
+        moved = False
+    if moved:
+        log(f"🏁 Faststart remux ({time.time() - started:.2f}s)", job_id=job_id)
+    return time.time() - started
+
+def start_renditions(job_id: str, output_path: Path):
+    """완료된 전체 렌더의 저해상도 렌디션을 백그라운드에서 인코딩 (상태의 renditions 로 진행 상황)"""
+    if not RENDITION_HEIGHTS or job_status.get(job_id, {}).get("tier", "full") != "full":
+        return
+    update_job_status(job_id, renditions={rendition_name(height): "pending" for height in RENDITION_HEIGHTS})
+    asyncio.create_task(encode_job_renditions(job_id, output_path))
+
+async def encode_job_renditions(job_id: str, output_path: Path):
+    async with rendition_slots:
+        if job_id not in job_status:
+            return
+        started = time.time()
+        try:
+            source_height = (await run_in_threadpool(probe_video, output_path)).get("height")
+            results = await run_in_threadpool(encode_renditions, output_path, RENDITION_HEIGHTS, source_height)
+        except Exception as e:
+            log(f"📱 Rendition encoding error: {e}", job_id=job_id, level="error")
+            results = {}
+    if job_id not in job_status:
+        # 인코딩 중에 정리된 작업
+        for height in RENDITION_HEIGHTS:
+            rendition_path(output_path, height).unlink(missing_ok=True)
+        return
+    renditions = {name: "ready" if size else "failed" for name, size in results.items()}
+    set_job_status(job_id, {**job_status[job_id], "renditions": renditions})
+    if not results:
+        log("📱 Renditions skipped (no ffmpeg, or output already at/below rendition sizes)", job_id=job_id)
+        return
+    log(f"📱 Renditions {renditions} ({time.time() - started:.1f}s)", job_id=job_id,
+        rendition_sizes={name: size for name, size in results.items() if size})
+
+async def finish_job(job_id: str, output_path: Path, returncode: int, error_msg: Optional[str], cache_key: Optional[str],
+               finalize_seconds: float = 0.0):
+    """FaceFusion 실행 결과 반영 - 출력 파일 확인, 결과 캐시 등록, 완료/실패/취소 상태 전환
+    
+    finalize_seconds: 이미 끝난 마무리(faststart) 시간 - 처리 시간에서 빼고 마무리 단계로 집계
+    """
+    # 성공하면 워커가 이미 출력 경로로 옮겼음 - 실패/중단으로 남은 조각 파일 정리
+    stream_output_path(job_id).unlink(missing_ok=True)
+    
+    cancellation = job_cancellations.pop(job_id, None)
+    if cancellation or job_id not in job_status:
+        # 취소/시간 초과된 작업(또는 처리 중에 /cleanup 된 작업)의 결과는 버림
+        output_path.unlink(missing_ok=True)
+        if cancellation and job_id in job_status:
+            state, error_msg = cancellation
+            log(f"🛑 {state.upper()}: {error_msg}", job_id=job_id, level="warning", status=state)
+            set_job_status(job_id, {"status": state, "progress": 0, "stage": job_status[job_id].get("stage"), "error": error_msg})
+        return
+    
+    finalize_started = time.time()
+    processing_time = finalize_started - job_status[job_id]["start_time"] - finalize_seconds
+    
+    log(f"⚡ Return code: {returncode} (took {processing_time:.1f}s)", job_id=job_id,
+        returncode=returncode, processing_time=round(processing_time, 2))
+    
+    # 출력 파일 즉시 확인 및 캐싱
+    actual_output_path = get_cached_output_path(job_id)
+    if not actual_output_path:
+        # 처리 직후 파일 찾기
+        possible_paths = [
+            output_path,
+            WORKSPACE_DIR / "temp_api" / f"output_{job_id}.mp4",
+            TEMP_DIR / f"output_{job_id}.mp4"
+        ]
         
-        print(f"[{job_id}] ⚡ Running FaceFusion with {thread_count} threads on H200")
+        for path in possible_paths:
+            if path.exists():
+                actual_output_path = path
+                job_file_paths[job_id] = str(path)  # 즉시 캐싱
+                break
+    
+    if returncode == 0 and actual_output_path:
+        file_size = actual_output_path.stat().st_size
+        log(f"✅ SUCCESS! File: {actual_output_path} ({file_size/1024/1024:.1f}MB)", job_id=job_id, file_size=file_size)
         
-        # 환경 변수 최적화
-        env = os.environ.copy()
-        env['HF_HOME'] = '/workspace'
-        env['PYTHONIOENCODING'] = 'utf-8'
-        env['CUDA_VISIBLE_DEVICES'] = '0'  # H200 GPU 명시적 사용
-        env['OMP_NUM_THREADS'] = thread_count
+        # 예상 경로와 다르면 복사
+        if actual_output_path != output_path:
+            await run_in_threadpool(shutil.copy, actual_output_path, output_path)
+            job_file_paths[job_id] = str(output_path)  # 캐시 업데이트
         
-        # 프로세스 실행
-        process = await asyncio.create_subprocess_exec(
-            'bash', '-c', bash_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env
-        )
+        # 다음 동일 요청을 위해 결과 캐시에 등록
+        if cache_key:
+            await run_in_threadpool(result_cache.put, cache_key, output_path)
         
-        stdout, stderr = await process.communicate()
-        processing_time = time.time() - job_status[job_id]["start_time"]
+        observe_job_phases(job_id, processing_time, time.time() - finalize_started + finalize_seconds)
+        set_job_status(job_id, {
+            "status": "completed", 
+            "progress": 100, 
+            "stage": "done",
+            "stage_times": job_status[job_id].get("stage_times", {}),
+            "output_path": str(output_path),
+            "processing_time": processing_time,
+            "file_size": file_size
+        })
+        start_renditions(job_id, output_path)
+    else:
+        error_msg = error_msg or "Processing failed"
+        log(f"❌ FAILED: {error_msg}", job_id=job_id, level="error", returncode=returncode, error_class=classify_error(error_msg))
+        set_job_status(job_id, {"status": "failed", "progress": 0, "stage": job_status[job_id].get("stage"), "error": error_msg})
+
+async def process_facefusion_batch(jobs: list, device: Optional[str] = None):
+    """같은 타겟 영상의 작업 여러 개를 한 번의 파이프라인으로 처리
+    
+    워커가 프레임을 한 번만 디코딩/검출하고 소스 얼굴마다 스왑해 결과 영상 N개를 함께 인코딩한다.
+    워커 풀이 없으면(콜드 실행) 한 작업씩 순서대로 처리.
+    """
+    if not (worker_pool and worker_pool.available):
+        for job_id, payload in jobs:
+            await process_facefusion(job_id, **payload, device=device)
+        return
+    
+    batch_id = f"batch-{uuid.uuid4().hex[:8]}"
+    job_ids = [job_id for job_id, _ in jobs]
+    timeout_handle = None
+    try:
+        # 묶음은 프레임을 한 번만 추출하므로 임시 디렉토리도 하나
+        first = jobs[0][1]
+        workspace = await allocate_job_workspace(batch_id, first["target_path"], processing_profiles.get(first.get("profile")),
+                                                 first.get("tier", "full"))
+        entries = []
+        for job_id, payload in jobs:
+            observe_queue_wait(job_id)
+            set_job_status(job_id, {
+                "status": "processing", "progress": 0, "stage": "starting", "start_time": time.time(),
+                "batch_id": batch_id, "batch_size": len(jobs), "progressive": PROGRESSIVE_OUTPUT, "device": device
+            })
+            payload["output_path"].parent.mkdir(parents=True, exist_ok=True)
+            args = build_facefusion_args(payload["source_path"], payload["target_path"], payload["output_path"],
+                                         processing_profiles.get(payload.get("profile")), payload.get("tier", "full"))
+            entry = {"job_id": job_id, "args": args + ["--temp-path", str(workspace.path)]}
+            if PROGRESSIVE_OUTPUT:
+                entry["stream_path"] = str(stream_output_path(job_id))
+            entries.append(entry)
         
-        print(f"[{job_id}] ⚡ Return code: {process.returncode} (took {processing_time:.1f}s)")
+        reporters = [progress_reporter(job_id) for job_id in job_ids]
         
-        # 출력 파일 즉시 확인 및 캐싱
-        actual_output_path = get_cached_output_path(job_id)
-        if not actual_output_path:
-            # 처리 직후 파일 찾기
-            possible_paths = [
-                output_path,
-                WORKSPACE_DIR / "temp_api" / f"output_{job_id}.mp4",
-                TEMP_DIR / f"output_{job_id}.mp4"
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    actual_output_path = path
-                    job_file_paths[job_id] = str(path)  # 즉시 캐싱
-                    break
+        def on_progress(snapshot: dict):
+            for report in reporters:
+                report(snapshot)
         
-        if process.returncode == 0 and actual_output_path:
-            file_size = actual_output_path.stat().st_size
-            print(f"[{job_id}] ✅ SUCCESS! File: {actual_output_path} ({file_size/1024/1024:.1f}MB)")
-            
-            # 예상 경로와 다르면 복사
-            if actual_output_path != output_path:
-                import shutil
-                shutil.copy(actual_output_path, output_path)
-                job_file_paths[job_id] = str(output_path)  # 캐시 업데이트
-                
-            job_status[job_id] = {
-                "status": "completed", 
-                "progress": 100, 
-                "output_path": str(output_path),
-                "processing_time": processing_time,
-                "file_size": file_size
-            }
-        else:
-            error_msg = stderr.decode('utf-8', errors='ignore') if stderr else "Processing failed"
-            print(f"[{job_id}] ❌ FAILED: {error_msg}")
-            job_status[job_id] = {"status": "failed", "progress": 0, "error": error_msg}
-            
+        log(f"🧩 Batch of {len(jobs)} jobs on {first['target_path'].name}", batch_id=batch_id, job_ids=job_ids)
+        # 묶음 전체에 작업 수만큼 늘린 시간 제한 (작업들이 파이프라인을 함께 지나가므로)
+        timeout = max(processing_profiles.get(payload.get("profile")).timeout(JOB_TIMEOUT_SECONDS) for _, payload in jobs)
+        timeout_handle = start_job_timeout(job_ids, timeout * len(jobs))
+        try:
+            result = await worker_pool.run_batch(batch_id, entries, on_progress, device)
+        except Exception as e:
+            result = {"error": str(e)}
     except Exception as e:
-        print(f"[{job_id}] 💥 EXCEPTION: {str(e)}")
-        job_status[job_id] = {"status": "failed", "progress": 0, "error": str(e)}
+        # 준비 단계(임시 디렉토리, 출력 디렉토리, 인자 생성) 실패 - 묶음의 모든 작업을 실패로
+        log(f"💥 EXCEPTION: {str(e)}", batch_id=batch_id, level="error", job_ids=job_ids)
+        for job_id in job_ids:
+            if job_id in job_status:
+                set_job_status(job_id, {"status": "failed", "progress": 0, "error": str(e), "error_class": "exception"})
+            job_cancellations.pop(job_id, None)
+            worker_pool.discard(job_id)
+        return
+    finally:
+        if timeout_handle:
+            timeout_handle.cancel()
+        await release_job_workspace(batch_id, job_ids)
+        worker_pool.discard(batch_id)
+    
+    results = {entry["job_id"]: entry for entry in result.get("results", [])}
+    for job_id, payload in jobs:
+        job_result = results.get(job_id, {"returncode": 1, "error": result.get("error") or "Batch processing failed"})
+        try:
+            finalize_seconds = await finalize_output(job_id, payload["output_path"], job_result.get("returncode", 1))
+            await finish_job(job_id, payload["output_path"], job_result.get("returncode", 1), job_result.get("error"), payload.get("cache_key"),
+                       finalize_seconds)
+        except Exception as e:
+            log(f"💥 EXCEPTION: {str(e)}", job_id=job_id, level="error")
+            set_job_status(job_id, {"status": "failed", "progress": 0, "error": str(e), "error_class": "exception"})
+        finally:
+            job_cancellations.pop(job_id, None)
+            worker_pool.discard(job_id)
+
+# 🚦 작업 스케줄러 - GPU 하나에 동시에 몰리지 않도록 동시 실행 수와 대기열 길이 제한
+MAX_CONCURRENT_JOBS = int(os.environ.get('FACEFUSION_MAX_CONCURRENT_JOBS', str(device_pool.capacity)))
+MAX_QUEUED_JOBS = int(os.environ.get('FACEFUSION_MAX_QUEUED_JOBS', '20'))
+# 단체 관람 - 같은 영상을 고른 작업이 이 시간(초) 안에 모이면 한 번에 처리 (0이면 비활성화)
+BATCH_WINDOW = float(os.environ.get('FACEFUSION_BATCH_WINDOW', '0'))
+MAX_BATCH_SIZE = int(os.environ.get('FACEFUSION_MAX_BATCH', '4'))
+scheduler = JobScheduler(
+    process_facefusion, max_concurrent=MAX_CONCURRENT_JOBS, max_queue=MAX_QUEUED_JOBS,
+    batch_processor=process_facefusion_batch, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH_SIZE,
+    devices=device_pool
+)
+
+def queue_full_response(error: QueueFullError) -> ORJSONResponse:
+    """대기열 초과 시 429 + Retry-After"""
+    retry_after = max(1, int(error.retry_after))
+    return ORJSONResponse(
+        status_code=429,
+        content={"success": False, "error": "Server is busy, please retry later", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
 
 @app.get("/")
 async def root():
@@ -204,146 +958,632 @@ async def health_check():
         "facefusion_available": facefusion_exists,
         "facefusion_path": str(FACEFUSION_DIR),
         "gpu_available": any(os.path.exists(f"/dev/nvidia{i}") for i in range(8)),
+        "gpu_devices": GPU_DEVICES,
         "workspace": str(WORKSPACE_DIR),
         "temp_dir": str(TEMP_DIR),
         "videos_dir": str(VIDEOS_DIR)
     }
 
 @app.get("/videos")
-async def get_video_list():
+async def get_video_list(request: Request):
+    """영상 목록 + 메타데이터 (카탈로그에서 바로) - ETag 가 같으면 304
+    
+    id: 기존 번호 (파일별로 고정), key: 내용 기반 ID - 둘 다 video_id 로 쓸 수 있음
+    """
+    etag = video_catalog.etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    videos = [
+        {
+            "id": entry["id"],
+            "key": entry["key"],
+            "filename": entry["filename"],
+            "path": str(video_catalog.path(entry)),
+            "size": entry["size"],
+            **{field: entry.get(field) for field in ("duration", "fps", "width", "height", "frame_count")},
+            "poster_url": f"/videos/{entry['key']}/poster" if entry.get("poster") else None,
+        }
+        for entry in video_catalog.entries
+    ]
+    return ORJSONResponse({"videos": videos}, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@app.get("/videos/{video_key}/poster")
+@app.head("/videos/{video_key}/poster")
+async def get_video_poster(video_key: str, request: Request):
+    """영상 포스터 이미지 (카탈로그가 만든 JPEG)"""
+    entry = video_catalog.resolve(video_key)
+    if not entry or not entry.get("poster"):
+        raise HTTPException(status_code=404, detail="Poster not found")
+    poster_path = video_catalog.poster_path(entry["key"])
+    poster_stat = await run_in_threadpool(stat_or_none, poster_path)
+    if poster_stat is None:
+        raise HTTPException(status_code=404, detail="Poster not found")
+    return serve_file(request, poster_path, poster_stat, "image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+@app.get("/profiles")
+async def get_processing_profiles():
+    """선택 가능한 처리 프로필과 각 설정"""
+    return processing_profiles.to_dict()
+
+class UploadTooLargeError(Exception):
+    pass
+
+async def save_jpeg_upload(job_id: str, chunks) -> tuple:
+    """업로드 스트림을 디스크로 바로 저장 - 크기 제한 + JPEG 검증, 저장하면서 해시 계산
+
+    파일 열기/쓰기/닫기는 스레드 풀에서 (이벤트 루프를 막지 않게), 쓰기는 UPLOAD_CHUNK_SIZE 만큼 모아서 한 번에
+    """
+    source_path = TEMP_DIR / f"camera_face_{job_id}.jpg"
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    tail = b""
+    pending = []
+    pending_bytes = 0
+    f = await run_in_threadpool(open, source_path, "wb")
     try:
-        video_files = []
-        # 파일명 순서대로 정렬하여 일관된 순서 보장
-        sorted_files = sorted(VIDEOS_DIR.glob("*.mp4"), key=lambda x: x.name)
-        for i, file_path in enumerate(sorted_files):
-            video_files.append({
-                "id": i + 1,
-                "filename": file_path.name,
-                "path": str(file_path)
-            })
-        print(f"Available videos: {[f['filename'] for f in video_files]}")
-        return {"videos": video_files}
-    except Exception as e:
-        print(f"Error getting video list: {str(e)}")
-        return {"error": str(e), "videos": []}
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise UploadTooLargeError()
+            if len(head) < 3:
+                head += chunk[:3 - len(head)]
+            tail = (tail + chunk)[-JPEG_EOI_SEARCH_BYTES:]
+            digest.update(chunk)
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+            if pending_bytes >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(f.writelines, pending)
+                pending, pending_bytes = [], 0
+        if pending:
+            await run_in_threadpool(f.writelines, pending)
+    except UploadTooLargeError:
+        await run_in_threadpool(f.close)
+        source_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=413, detail=f"Image too large (max {MAX_UPLOAD_BYTES} bytes)")
+    finally:
+        await run_in_threadpool(f.close)
+    
+    # JPEG 시그니처(SOI) + 끝 마커(EOI) 확인 - 잘린 업로드나 다른 형식 거절
+    if head != b"\xff\xd8\xff" or b"\xff\xd9" not in tail:
+        source_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=415, detail="Image must be a complete JPEG")
+    
+    log(f"Saved uploaded image: {source_path} ({size} bytes)", job_id=job_id)
+    return source_path, digest.digest()
+
+async def save_base64_upload(job_id: str, data_url: str) -> tuple:
+    """기존 호환용 base64(data URL) 업로드 - 디코딩 전에 크기 제한, 디코딩은 스레드 풀에서, 저장/검증은 save_jpeg_upload 로"""
+    base64_data = data_url.split(',', 1)[1] if ',' in data_url else data_url
+    # base64 는 3바이트를 4글자로 - 공백/개행이 섞여 있어도 디코딩 결과는 이보다 작으므로 먼저 걸러냄
+    if (len(base64_data) - 4) * 3 // 4 > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image too large (max {MAX_UPLOAD_BYTES} bytes)")
+    
+    def decode() -> bytes:
+        return base64.b64decode(base64_data.strip().replace('\n', '').replace('\r', ''))
+    
+    try:
+        image_data = await run_in_threadpool(decode)
+    except ValueError as e:
+        log(f"Image processing error: {e}", job_id=job_id, level="error")
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
+    if len(image_data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image too large (max {MAX_UPLOAD_BYTES} bytes)")
+    
+    async def single_chunk():
+        yield image_data
+    
+    return await save_jpeg_upload(job_id, single_chunk())
+
+async def normalize_source_face(job_id: str, source_path: Path, profile: ProcessingProfile):
+    """대기열에 넣기 전에 CPU 에서 얼굴 수 확인 + 얼굴 영역 크롭 - 얼굴이 없거나 여러 명이면 422"""
+    if not SOURCE_FACE_CHECK:
+        return
+    started = time.time()
+    try:
+        result = await run_in_threadpool(
+            prepare_source_face, source_path, source_face_size(profile.params.get("face_swapper_pixel_boost")))
+    except SourceFaceError as e:
+        source_path.unlink(missing_ok=True)
+        source_face_rejections_total.inc(reason=e.reason)
+        log(f"🙅 Rejected source image: {e}", job_id=job_id, level="warning", reason=e.reason, faces=e.faces)
+        raise HTTPException(status_code=422, detail=str(e))
+    source_face_seconds.observe(time.time() - started)
+    if result["checked"]:
+        log(f"🙂 Source face cropped {result['original_size']} -> {result['size']}px ({time.time() - started:.3f}s)",
+            job_id=job_id, face_box=result["face_box"])
+
+async def iter_upload_file(upload: UploadFile):
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+async def complete_from_cache(job_id: str, source_path: Path, source_digest: bytes, target_path: Path, output_path: Path,
+                        profile: ProcessingProfile, tier: str = "full") -> Optional[str]:
+    """결과 캐시 확인 - 적중하면 FaceFusion 없이 바로 완료 처리하고 None, 아니면 등록할 캐시 키 반환"""
+    if not result_cache.enabled:
+        return None
+    cache_args = build_facefusion_args(source_path, target_path, output_path, profile, tier)
+    cache_key = ResultCache.make_key(source_digest, target_path, cache_args)
+    cached_path = await run_in_threadpool(result_cache.get, cache_key)
+    if not cached_path:
+        return cache_key
+    await run_in_threadpool(result_cache.materialize, cached_path, output_path)
+    job_file_paths[job_id] = str(output_path)
+    set_job_status(job_id, {
+        "status": "completed",
+        "progress": 100,
+        "stage": "done",
+        "output_path": str(output_path),
+        "processing_time": 0,
+        "file_size": output_path.stat().st_size,
+        "cache_hit": True
+    })
+    log("⚡ Result cache hit - skipping FaceFusion", job_id=job_id)
+    start_renditions(job_id, output_path)
+    return None
+
+async def submit_preview_job(job_id: str, source_path: Path, source_digest: bytes, target_path: Path, profile: ProcessingProfile,
+                       frame_count: Optional[int] = None) -> Optional[str]:
+    """미리보기 작업 등록 - 대기열이 가득 차면 미리보기 없이 전체 렌더만 진행 (None 반환)"""
+    preview_id = preview_job_id(job_id)
+    output_path = TEMP_DIR / f"output_{preview_id}.mp4"
+    set_job_status(preview_id, {"status": "queued", "progress": 0, "stage": "queued", "queued_at": time.time(),
+                                "tier": "preview", "parent_job_id": job_id,
+                                "profile": profile.name, "profile_params": resolve_profile(profile, "preview").params})
+    cache_key = await complete_from_cache(preview_id, source_path, source_digest, target_path, output_path, profile, "preview")
+    if job_status[preview_id]["status"] == "completed":
+        return preview_id
+    try:
+        scheduler.submit(preview_id, {
+            "source_path": source_path,
+            "target_path": target_path,
+            "output_path": output_path,
+            "cache_key": cache_key,
+            "tier": "preview",
+            "profile": profile.name
+        }, priority=PREVIEW_PRIORITY, batch_key=f"{target_path}|{profile.name}|preview",
+            cost=min(frame_count, PREVIEW_FRAMES) if frame_count else None)
+    except QueueFullError:
+        log("🚦 Queue full - skipping preview", job_id=job_id, level="warning")
+        forget_job(preview_id)
+        state_backend.delete(preview_id)
+        return None
+    log(f"👀 Preview queued as {preview_id} ({PREVIEW_FRAMES} frames, {PREVIEW_RESOLUTION})", job_id=job_id)
+    return preview_id
+
+def cancel_job(job_id: str):
+    """대기열에서 빼거나 실행 중이면 중단하고 상태 삭제 - 구독 중인 클라이언트에게는 마지막으로 알림"""
+    if not scheduler.cancel(job_id):
+        cancel_running_job(job_id, "cancelled", "Cleaned up")
+    if job_id in job_status:
+        job_events.publish(job_id, {"status": "cancelled"})
+    forget_job(job_id)
+    state_backend.delete(job_id)
+
+def get_request_profile(name: Optional[str]) -> ProcessingProfile:
+    """요청의 profile 값 확인 - 없는 이름이면 업로드를 읽기 전에 400"""
+    try:
+        return processing_profiles.get(name)
+    except ProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_request_video(video_id: str) -> dict:
+    """요청의 video_id 확인 (번호 또는 내용 키 - 카탈로그에서) - 없으면 업로드를 읽기 전에 400"""
+    if not video_catalog.entries:
+        raise HTTPException(status_code=400, detail="No video files found")
+    video = video_catalog.resolve(video_id)
+    if video is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid video_id: {video_id}. Available: {', '.join(str(entry['id']) for entry in video_catalog.entries)}"
+        )
+    return video
+
+async def submit_faceswap_job(job_id: str, source_path: Path, source_digest: bytes, video: dict, preview: bool = False,
+                        profile: Optional[ProcessingProfile] = None):
+    """소스 이미지가 저장된 뒤의 공통 처리 - 결과 캐시 확인, 대기열 등록 (video 는 get_request_video 로 확인한 항목)
+    
+    preview 면 앞부분만 빠르게 처리하는 미리보기 작업을 먼저 (높은 우선순위로) 등록하고
+    전체 렌더는 그 뒤에 - 상태 응답의 preview 필드로 미리보기 결과를 먼저 받을 수 있음.
+    """
+    target_path = video_catalog.path(video)
+    frame_count = video_catalog.frame_count(video)
+    
+    output_path = TEMP_DIR / f"output_{job_id}.mp4"
+    
+    log(f"Using video: {target_path} ({video['size']} bytes)", job_id=job_id, video_id=video["id"], video_key=video["key"])
+    
+    # 작업 상태 초기화 - 어떤 설정으로 처리하는지도 기록
+    profile = profile or processing_profiles.get()
+    set_job_status(job_id, {"status": "queued", "progress": 0, "stage": "queued", "queued_at": time.time(),
+                            "profile": profile.name, "profile_params": profile.params})
+    touch_job(job_id)
+    
+    # 결과 캐시 확인 - 적중하면 FaceFusion 없이 바로 완료 처리 (미리보기도 필요 없음)
+    cache_key = await complete_from_cache(job_id, source_path, source_digest, target_path, output_path, profile)
+    if job_status[job_id]["status"] == "completed":
+        return ProcessResponse(success=True, job_id=job_id)
+    
+    # 미리보기를 먼저 등록해야 빈 슬롯을 전체 렌더가 먼저 차지하지 않음
+    preview_id = await submit_preview_job(job_id, source_path, source_digest, target_path, profile, frame_count) if preview else None
+    if preview_id:
+        update_job_status(job_id, preview_job_id=preview_id)
+    
+    # 스케줄러 대기열에 등록 - 슬롯이 비면 FaceFusion 실행
+    try:
+        position = scheduler.submit(job_id, {
+            "source_path": source_path,
+            "target_path": target_path,
+            "output_path": output_path,
+            "cache_key": cache_key,
+            "profile": profile.name
+        }, batch_key=f"{target_path}|{profile.name}", cost=frame_count)
+    except QueueFullError as e:
+        if preview_id:
+            cancel_job(preview_id)
+        forget_job(job_id)
+        state_backend.delete(job_id)
+        source_path.unlink(missing_ok=True)
+        return queue_full_response(e)
+    
+    log(f"Job queued (position {position}), returning job_id immediately", job_id=job_id)
+    return ProcessResponse(success=True, job_id=job_id, preview_job_id=preview_id)
 
 @app.post("/faceswap-with-camera")
 async def faceswap_with_camera(
-    background_tasks: BackgroundTasks,
-    face_image_base64: str = Form(...),
-    video_id: int = Form(...)  # 숫자로 다시 변경
+    face_image_base64: Optional[str] = Form(None),  # 기존 호환용 (data URL 문자열)
+    video_id: str = Form(...),  # 번호(/videos 의 id) 또는 내용 키(key)
+    face_image: Optional[UploadFile] = File(None),  # 바이너리 JPEG (권장 - base64 변환 없음)
+    preview: Optional[bool] = Form(None),  # 빠른 미리보기를 먼저 (기본값: FACEFUSION_PREVIEW)
+    profile: Optional[str] = Form(None)  # 처리 프로필 이름 (GET /profiles, 기본값: 설정 파일의 default)
 ):
     job_id = str(uuid.uuid4())
+    processing_profile = get_request_profile(profile)
+    video = get_request_video(video_id)
     
+    # 대기열이 가득 찼으면 이미지 디코딩 전에 바로 거절
     try:
-        print(f"[{job_id}] Starting face swap with camera")
-        
-        # base64 이미지 저장 - 오류 처리 개선
-        try:
-            # base64 데이터 정리
-            if ',' in face_image_base64:
-                # data:image/jpeg;base64,... 형태에서 실제 데이터 부분만 추출
-                base64_data = face_image_base64.split(',')[1]
-            else:
-                base64_data = face_image_base64
-            
-            # 공백 및 개행 문자 제거
-            base64_data = base64_data.strip().replace('\n', '').replace('\r', '')
-            
-            print(f"[{job_id}] Base64 data length: {len(base64_data)}")
-            
-            # base64 디코딩
-            image_data = base64.b64decode(base64_data)
-            
-            source_path = TEMP_DIR / f"camera_face_{job_id}.jpg"
-            
-            with open(source_path, "wb") as f:
-                f.write(image_data)
-                
-            print(f"[{job_id}] Saved source image: {source_path} ({len(image_data)} bytes)")
-                
-        except Exception as img_error:
-            print(f"[{job_id}] Image processing error: {str(img_error)}")
-            raise HTTPException(status_code=400, detail=f"Invalid image data: {str(img_error)}")
+        scheduler.check_admission()
+    except QueueFullError as e:
+        log(f"🚦 Rejected - queue full ({scheduler.queue_depth} waiting)", job_id=job_id, level="warning")
+        return queue_full_response(e)
+    
+    # 바이너리 업로드는 바로 디스크로 저장, base64 는 디코딩 후 같은 경로로 (크기/형식 오류는 413/415)
+    if face_image is not None:
+        source_path, source_digest = await save_jpeg_upload(job_id, iter_upload_file(face_image))
+    elif face_image_base64:
+        source_path, source_digest = await save_base64_upload(job_id, face_image_base64)
+    else:
+        raise HTTPException(status_code=400, detail="face_image or face_image_base64 is required")
+    
+    try:
+        log("Starting face swap with camera", job_id=job_id)
         
-        # 비디오 파일 찾기 (숫자 기반)
-        try:
-            video_files = sorted(VIDEOS_DIR.glob("*.mp4"), key=lambda x: x.name)
-            if not video_files:
-                raise HTTPException(status_code=400, detail="No video files found")
-            
-            if video_id < 1 or video_id > len(video_files):
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Invalid video_id: {video_id}. Available: 1-{len(video_files)}"
-                )
-            
-            target_path = video_files[video_id - 1]  # 1-based index
-            video_filename = target_path.name
-            
-        except HTTPException:
+        await normalize_source_face(job_id, source_path, processing_profile)
+        return await submit_faceswap_job(job_id, source_path, source_digest, video,
+                                         PREVIEW_DEFAULT if preview is None else preview, processing_profile)
+    
+    except HTTPException as e:
+        # 대기열에 들어가지 못한 업로드는 남기지 않음
+        source_path.unlink(missing_ok=True)
+        if e.status_code == 422:
             raise
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error finding video: {str(e)}")
-        
-        print(f"[{job_id}] Looking for video: {video_filename}")
-        print(f"[{job_id}] Target path: {target_path}")
-        
-        output_path = TEMP_DIR / f"output_{job_id}.mp4"
-        
-        print(f"[{job_id}] Selected video: {video_filename}")
-        print(f"[{job_id}] Using video: {target_path}")
-        
-        print(f"[{job_id}] Video file size: {target_path.stat().st_size} bytes")
-        
-        # 작업 상태 초기화
-        job_status[job_id] = {"status": "started", "progress": 0}
-        
-        # 백그라운드에서 FaceFusion 실행
-        background_tasks.add_task(process_facefusion, job_id, source_path, target_path, output_path)
-        
-        print(f"[{job_id}] Job started in background, returning job_id immediately")
-        return ProcessResponse(success=True, job_id=job_id)
-            
+        log(f"EXCEPTION: {str(e)}", job_id=job_id, level="error")
+        return ProcessResponse(success=False, error=str(e), job_id=job_id)
     except Exception as e:
-        print(f"[{job_id}] EXCEPTION: {str(e)}")
+        source_path.unlink(missing_ok=True)
+        log(f"EXCEPTION: {str(e)}", job_id=job_id, level="error")
         return ProcessResponse(success=False, error=str(e), job_id=job_id)
 
-@app.get("/status/{job_id}")
-async def get_job_status(job_id: str):
-    """작업 상태 확인 - 최적화됨"""
-    if job_id not in job_status:
-        raise HTTPException(status_code=404, detail="Job not found")
+@app.post("/faceswap-with-camera/raw")
+async def faceswap_with_camera_raw(request: Request, video_id: str, preview: Optional[bool] = None, profile: Optional[str] = None):
+    """요청 본문(image/jpeg)을 그대로 디스크로 스트리밍 - multipart 파싱도 없음"""
+    job_id = str(uuid.uuid4())
+    processing_profile = get_request_profile(profile)
+    video = get_request_video(video_id)
+    
+    try:
+        scheduler.check_admission()
+    except QueueFullError as e:
+        log(f"🚦 Rejected - queue full ({scheduler.queue_depth} waiting)", job_id=job_id, level="warning")
+        return queue_full_response(e)
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in ("image/jpeg", "image/jpg"):
+        raise HTTPException(status_code=415, detail="Content-Type must be image/jpeg")
+    
+    # Content-Length 로 미리 거를 수 있으면 본문을 읽기 전에 거절
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image too large (max {MAX_UPLOAD_BYTES} bytes)")
     
-    status = job_status[job_id].copy()
+    source_path, source_digest = await save_jpeg_upload(job_id, request.stream())
+    await normalize_source_face(job_id, source_path, processing_profile)
+    
+    try:
+        log("Starting face swap with raw upload", job_id=job_id)
+        return await submit_faceswap_job(job_id, source_path, source_digest, video,
+                                         PREVIEW_DEFAULT if preview is None else preview, processing_profile)
+    except Exception as e:
+        source_path.unlink(missing_ok=True)
+        log(f"EXCEPTION: {str(e)}", job_id=job_id, level="error")
+        return ProcessResponse(success=False, error=str(e), job_id=job_id)
+
+def build_job_status(job_id: str, status: dict, owner_url: Optional[str] = None, check_files: bool = True) -> dict:
+    """응답용 작업 상태 - 폴링과 푸시가 같은 형식을 사용
+    
+    check_files=False: 파일 시스템을 보지 않고 기록된 상태만으로 (일괄 조회/목록 - 작업 수만큼 stat 하지 않음)
+    """
+    status = status.copy()
+    
+    # 대기 중이면 순번과 예상 대기 시간 (이 프로세스의 대기열에 있는 작업만 알 수 있음)
+    if status["status"] == "queued" and job_id in job_status:
+        status["queue_position"] = scheduler.position(job_id)
+        status["estimated_wait"] = scheduler.estimated_wait(job_id)
+    
+    # 처리 중이라도 결과가 쌓이기 시작했으면 /video 로 바로 재생 가능
+    if status["status"] == "processing" and status.get("progressive"):
+        if check_files and job_id in job_status and not status.get("stream_ready"):
+            if stream_output_path(job_id).exists():
+                update_job_status(job_id, stream_ready=True)
+                status["stream_ready"] = True
+        if status.get("stream_ready"):
+            status["stream_url"] = f"/video/{job_id}"
     
     # 완료된 작업이면 파일 정보도 함께 반환
-    if status["status"] == "completed":
+    if status["status"] == "completed" and not check_files:
+        # 완료 시 기록한 경로/크기 (파일이 지워지면 reaper 가 작업도 함께 정리)
+        status["file_ready"] = bool(job_file_paths.get(job_id) or status.get("output_path")) or owner_url is not None
+    elif status["status"] == "completed":
         file_path = get_cached_output_path(job_id)
         if file_path:
             status["file_ready"] = True
             status["file_size"] = file_path.stat().st_size
         else:
-            status["file_ready"] = False
+            # 다른 노드가 처리한 작업이면 그 노드에 파일이 있음 (결과 요청은 리다이렉트)
+            status["file_ready"] = owner_url is not None
     
+    # 미리보기 작업 진행/결과 (먼저 끝나면 video_url 로 바로 재생)
+    preview_id = status.get("preview_job_id")
+    if preview_id in job_status:
+        preview = build_job_status(preview_id, job_status[preview_id], check_files=check_files)
+        status["preview"] = {key: preview[key] for key in ("job_id", "status", "progress", "stage", "file_ready", "stream_url", "error") if key in preview}
+        if preview.get("file_ready"):
+            status["preview"]["video_url"] = f"/video/{preview_id}"
+    
+    status["job_id"] = job_id
     return status
 
+class StatusBatchRequest(BaseModel):
+    job_ids: List[str]
+
+@app.post("/status/batch")
+async def get_job_status_batch(body: StatusBatchRequest):
+    """여러 작업 상태를 한 번에 (키오스크/여러 방문자 추적) - 메모리 상태만 보고 파일 stat 없음
+    
+    이 프로세스에 없는 작업은 공유 백엔드에서 찾고, 어디에도 없으면 missing 에
+    """
+    if len(body.job_ids) > STATUS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many job_ids (max {STATUS_BATCH_MAX})")
+    status_requests_total.inc(transport="batch")
+    jobs = {}
+    missing = []
+    for job_id in dict.fromkeys(body.job_ids):
+        if job_id in job_status:
+            touch_job(job_id)
+            jobs[job_id] = build_job_status(job_id, job_status[job_id], check_files=False)
+            continue
+        status, owner_url = await lookup_job(job_id)
+        if status is None:
+            missing.append(job_id)
+        else:
+            jobs[job_id] = build_job_status(job_id, status, owner_url, check_files=False)
+    return {"jobs": jobs, "missing": missing}
+
+def parse_jobs_cursor(cursor: str) -> tuple:
+    created_at, _, job_id = cursor.partition(":")
+    try:
+        return float(created_at), job_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/jobs")
+async def list_jobs(request: Request, state: Optional[str] = None, since: Optional[float] = None,
+                    cursor: Optional[str] = None, limit: int = 50):
+    """작업 목록 (운영자 화면) - 상태 필터(state=queued,processing), 생성 시각 since 이후, 오래된 순 페이지
+    
+    이 프로세스가 받은 작업만 (재시작 후 복구한 작업 포함) - 다음 페이지는 next_cursor 로
+    """
+    if not ADMIN_TOKEN:
+        # 토큰 없이 열어 두면 누구나 다른 사용자의 작업 ID(= 결과 URL)를 볼 수 있음
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {ADMIN_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Admin token required")
+    states = [name.strip() for name in state.split(",") if name.strip()] if state else None
+    unknown = set(states or ()) - JOB_STATES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown state: {', '.join(sorted(unknown))} (available: {', '.join(sorted(JOB_STATES))})")
+    limit = max(1, min(limit, JOBS_PAGE_MAX))
+    page = job_index.page(states, since, parse_jobs_cursor(cursor) if cursor else None, limit + 1)
+    has_more = len(page) > limit
+    page = page[:limit]
+    jobs = [
+        {**build_job_status(job_id, job_status[job_id], check_files=False), "created_at": created_at}
+        for created_at, job_id in page if job_id in job_status
+    ]
+    return {
+        "jobs": jobs,
+        "next_cursor": f"{page[-1][0]!r}:{page[-1][1]}" if has_more else None,
+        "counts": job_index.counts(),
+        "node": NODE_ID,
+    }
+
+@app.get("/status/{job_id}")
+async def get_job_status(job_id: str):
+    """작업 상태 확인 - 최적화됨"""
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    touch_job(job_id)
+    status_requests_total.inc(transport="poll")
+    return build_job_status(job_id, status, owner_url)
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job_request(job_id: str, request: Request):
+    """작업 취소 - 대기 중이면 대기열에서 빼고, 실행 중이면 FaceFusion 프로세스 그룹을 종료 (미리보기 포함)
+    
+    취소된 작업은 status 가 cancelled 로 끝나고 기록은 남음 (파일/기록 삭제는 /cleanup)
+    """
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job_id not in job_status:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
+        # 같은 노드의 다른 API 워커 프로세스가 실행 중 - 그 프로세스만 중단할 수 있음
+        raise HTTPException(status_code=409, detail="Job is owned by another API worker process")
+    if status["status"] in TERMINAL_STATES:
+        return {"success": False, "job_id": job_id, "status": status["status"], "error": "Job already finished"}
+    cancel_with_preview(job_id)
+    return {"success": True, "job_id": job_id, "status": job_status[job_id]["status"]}
+
+async def iter_remote_job_status(job_id: str):
+    """다른 프로세스/노드의 작업 - 이벤트를 받을 수 없으므로 공유 상태를 주기적으로 확인"""
+    last = None
+    last_sent = 0.0
+    while True:
+        status, owner_url = await lookup_job(job_id)
+        if status is None:
+            break
+        if status != last:
+            last, last_sent = status, time.time()
+            yield build_job_status(job_id, status, owner_url)
+            if status["status"] in TERMINAL_STATES:
+                break
+        elif time.time() - last_sent >= STATUS_KEEPALIVE_INTERVAL:
+            last_sent = time.time()
+            yield None
+        await asyncio.sleep(REMOTE_STATUS_POLL_INTERVAL)
+
+async def iter_job_status(job_id: str):
+    """상태가 바뀔 때마다 스냅샷을 내보내는 비동기 제너레이터 (종료 상태에서 끝남)
+    
+    대기 중인 작업은 순번/예상 대기 시간이 앞 작업에 따라 바뀌므로 주기적으로 다시 보냄.
+    그 외에는 변화가 없으면 None 을 내보내 연결 유지(keepalive) 신호로 사용.
+    """
+    if job_id not in job_status:
+        async for status in iter_remote_job_status(job_id):
+            yield status
+        return
+    
+    queue = job_events.subscribe(job_id)
+    touch_job(job_id)
+    try:
+        status = build_job_status(job_id, job_status[job_id])
+        yield status
+        while status["status"] not in TERMINAL_STATES:
+            timeout = STATUS_QUEUED_REFRESH if status["status"] == "queued" else STATUS_KEEPALIVE_INTERVAL
+            try:
+                await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if status["status"] != "queued":
+                    yield None
+                    continue
+            if job_id not in job_status:
+                break
+            # 밀린 이벤트는 건너뛰고 항상 최신 상태를 보냄
+            while not queue.empty():
+                queue.get_nowait()
+            status = build_job_status(job_id, job_status[job_id])
+            yield status
+    finally:
+        job_events.unsubscribe(job_id, queue)
+        touch_job(job_id)  # 연결이 끊긴 시점부터 다시 셈
+
+@app.get("/status/{job_id}/events")
+async def job_status_events(job_id: str):
+    """Server-Sent Events 로 상태 변경 푸시 - 폴링 대체"""
+    status, _ = await lookup_job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status_requests_total.inc(transport="sse")
+    
+    async def event_stream():
+        yield f"retry: {STATUS_SSE_RETRY_MS}\n\n"
+        async for status in iter_job_status(job_id):
+            if status is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: status\ndata: {orjson.dumps(status).decode()}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"  # 프록시 버퍼링 방지
+        }
+    )
+
+@app.websocket("/status/{job_id}/ws")
+async def job_status_websocket(websocket: WebSocket, job_id: str):
+    """WebSocket 으로 상태 변경 푸시"""
+    await websocket.accept()
+    status, _ = await lookup_job(job_id)
+    if status is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    status_requests_total.inc(transport="ws")
+    try:
+        async for status in iter_job_status(job_id):
+            if status is None:
+                await websocket.send_text('{"type": "keepalive"}')
+            else:
+                await websocket.send_text(orjson.dumps(status).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/result/{job_id}/url")
-async def get_result_url(job_id: str):
-    """결과 파일 URL 반환 - 초고속 최적화!"""
+async def get_result_url(job_id: str, request: Request, rendition: Optional[str] = None):
+    """결과 파일 URL 반환 - 초고속 최적화!
+    
+    렌디션이 있으면 클라이언트 힌트(?rendition=480p, Save-Data, ECT, Viewport-Width × DPR)로 골라서 반환
+    """
     # 작업 상태 확인
-    if job_id not in job_status:
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    status = job_status[job_id]
     if status["status"] != "completed":
         return {"success": False, "status": status["status"], "error": "Job not completed yet"}
     
     # 캐시된 파일 경로 사용
-    file_path = get_cached_output_path(job_id)
+    file_path, file_stat = await locate_result(job_id, get_cached_output_path)
     if not file_path:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
         raise HTTPException(status_code=404, detail="Result file not found")
     
+    # 저해상도 렌디션 선택 (없거나 아직 인코딩 중이면 원본)
+    available = [name for name, state in (status.get("renditions") or {}).items() if state == "ready"]
+    chosen = choose_rendition(available, request.headers, rendition)
+    if chosen:
+        chosen_path = rendition_path(file_path, int(chosen[:-1]))
+        chosen_stat = await run_in_threadpool(stat_or_none, chosen_path)
+        if chosen_stat:
+            file_path, file_stat = chosen_path, chosen_stat
+        else:
+            chosen = None
+    
     # 상대 경로 계산
     relative_path = file_path.relative_to(TEMP_DIR)
     
@@ -354,61 +1594,48 @@ async def get_result_url(job_id: str):
     else:
         file_url = f"http://localhost:8001/files/{relative_path}"
     
-    file_size = file_path.stat().st_size
-    print(f"[{job_id}] ⚡ Ultra-fast URL: {file_url} ({file_size/1024/1024:.1f}MB)")
+    file_size = file_stat.st_size
+    log(f"⚡ Ultra-fast URL: {file_url} ({file_size/1024/1024:.1f}MB)", job_id=job_id, rendition=chosen or "full")
     
-    return {
+    return ORJSONResponse({
         "success": True, 
         "file_url": file_url,
         "format": "mp4",
         "job_id": job_id,
         "file_size": file_size,
-        "processing_time": status.get("processing_time", 0)
-    }
+        "processing_time": status.get("processing_time", 0),
+        "rendition": chosen or "full",
+        "renditions": ["full", *available]
+    }, headers={
+        # 다음 요청부터 화면 폭/연결 상태 힌트를 보내도록 요청
+        "Accept-CH": "Sec-CH-Viewport-Width, Sec-CH-DPR, Viewport-Width, DPR, ECT, Save-Data",
+        "Vary": "Sec-CH-Viewport-Width, Sec-CH-DPR, Viewport-Width, DPR, ECT, Save-Data",
+    })
 
 @app.get("/result/{job_id}/stream")
-async def stream_result(job_id: str):
-    """결과 파일 스트리밍 - 가장 빠른 방법!"""
-    if job_id not in job_status:
+@app.head("/result/{job_id}/stream")
+async def stream_result(job_id: str, request: Request):
+    """결과 파일 스트리밍 - Range/조건부 요청 지원"""
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    status = job_status[job_id]
     if status["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed yet")
     
-    file_path = get_cached_output_path(job_id)
+    file_path, file_stat = await locate_result(job_id, get_cached_output_path)
     if not file_path:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
         raise HTTPException(status_code=404, detail="Result file not found")
     
-    file_size = file_path.stat().st_size
-    
-    def iterfile():
-        with open(file_path, mode="rb") as file_like:
-            yield from file_like
-    
-    return StreamingResponse(
-        iterfile(), 
-        media_type="video/mp4",
-        headers={
-            "Content-Disposition": f"attachment; filename=result_{job_id}.mp4",
-            "Content-Length": str(file_size),
-            "Accept-Ranges": "bytes",  # 부분 요청 지원
-            "Cache-Control": "public, max-age=3600",  # 1시간 캐시
-            "Content-Type": "video/mp4"
-        }
-    )
+    return serve_file(request, file_path, file_stat, "video/mp4", headers={
+        "Content-Disposition": f"attachment; filename=result_{job_id}.mp4",
+        "Cache-Control": "public, max-age=3600",  # 1시간 캐시
+    })
 
-@app.get("/result/{job_id}/base64")
-async def get_result_base64(job_id: str):
-    # 작업 상태 확인
-    if job_id not in job_status:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    status = job_status[job_id]
-    if status["status"] != "completed":
-        return {"success": False, "status": status["status"], "error": "Job not completed yet"}
-    
-    # 여러 경로에서 결과 파일 찾기
+def find_result_file(job_id: str) -> Optional[Path]:
+    """여러 경로에서 결과 파일 찾기 (mp4 외 이미지 결과도 지원)"""
     possible_locations = [
         TEMP_DIR,  # /workspace/facefusion/temp/
         WORKSPACE_DIR / "temp_api",  # /workspace/temp_api/
@@ -419,62 +1646,106 @@ async def get_result_base64(job_id: str):
         for ext in ['mp4', 'jpg', 'png']:
             output_path = location / f"output_{job_id}.{ext}"
             if output_path.exists():
-                print(f"[{job_id}] Found result file at: {output_path}")
-                with open(output_path, "rb") as f:
-                    file_data = f.read()
-                    base64_data = base64.b64encode(file_data).decode()
-                    return {"success": True, "data": base64_data, "format": ext, "job_id": job_id}
+                return output_path
+    return None
+
+async def locate_result(job_id: str, finder) -> tuple:
+    """결과 파일 찾기 + stat 을 스레드 풀에서 한 번에 - 느린 디스크가 이벤트 루프를 막지 않도록"""
+    def locate():
+        path = finder(job_id)
+        file_stat = stat_or_none(path) if path else None
+        return (path, file_stat) if file_stat else (None, None)
+    return await run_in_threadpool(locate)
+
+@app.get("/result/{job_id}/base64")
+async def get_result_base64(job_id: str, request: Request):
+    """결과 파일을 base64 JSON 으로 스트리밍 - 청크 단위 인코딩으로 메모리 사용량 일정"""
+    # 작업 상태 확인
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    print(f"[{job_id}] Result file not found in any location")
-    print(f"[{job_id}] Searched locations: {[str(loc) for loc in possible_locations]}")
-    raise HTTPException(status_code=404, detail="Result file not found")
+    if status["status"] != "completed":
+        return {"success": False, "status": status["status"], "error": "Job not completed yet"}
+    
+    output_path, file_stat = await locate_result(job_id, find_result_file)
+    if not output_path:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
+        log("Result file not found in any location", job_id=job_id, level="warning")
+        raise HTTPException(status_code=404, detail="Result file not found")
+    
+    log(f"Found result file at: {output_path}", job_id=job_id)
+    ext = output_path.suffix.lstrip('.')
+    etag = file_etag(file_stat, "b64")
+    cache_headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified(file_stat),
+        "Cache-Control": "public, max-age=86400",
+    }
+    
+    # 같은 결과를 다시 받는 경우 본문 없이 304
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    
+    fields = {"success": True, "format": ext, "job_id": job_id}
+    head, tail = base64_json_envelope(fields)
+    # 동기 제너레이터라 Starlette 가 청크 읽기/인코딩을 스레드 풀에서 실행
+    return StreamingResponse(
+        iter_base64_json(str(output_path), fields),
+        media_type="application/json",
+        headers={
+            **cache_headers,
+            "Content-Length": str(len(head) + base64_length(file_stat.st_size) + len(tail)),
+        }
+    )
 
 @app.get("/download/{job_id}")
-async def download_result(job_id: str):
+@app.head("/download/{job_id}")
+async def download_result(job_id: str, request: Request):
     """결과 파일 다운로드 (blob 형태)"""
-    from fastapi.responses import FileResponse
-    
     # 작업 상태 확인
-    if job_id not in job_status:
+    status, owner_url = await lookup_job(job_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    status = job_status[job_id]
     if status["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed yet")
     
-    # 여러 경로에서 결과 파일 찾기
-    possible_locations = [
-        TEMP_DIR,  # /workspace/facefusion/temp/
-        WORKSPACE_DIR / "temp_api",  # /workspace/temp_api/
-        Path("/workspace/temp_api")  # 절대 경로
-    ]
-    
-    for location in possible_locations:
-        for ext in ['mp4', 'jpg', 'png']:
-            output_path = location / f"output_{job_id}.{ext}"
-            if output_path.exists():
-                return FileResponse(
-                    path=str(output_path),
-                    media_type=f"video/{ext}" if ext == 'mp4' else f"image/{ext}",
-                    filename=f"result_{job_id}.{ext}"
-                )
+    output_path, file_stat = await locate_result(job_id, find_result_file)
+    if not output_path:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
+        raise HTTPException(status_code=404, detail="Result file not found")
     
-    raise HTTPException(status_code=404, detail="Result file not found")
+    ext = output_path.suffix.lstrip('.')
+    return serve_file(
+        request, output_path, file_stat,
+        f"video/{ext}" if ext == 'mp4' else f"image/{ext}",
+        headers={"Content-Disposition": f'attachment; filename="result_{job_id}.{ext}"'}
+    )
 
 @app.delete("/cleanup/{job_id}")
-async def cleanup_files(job_id: str):
+async def cleanup_files(job_id: str, request: Request):
+    # 다른 노드가 처리한 작업은 파일도 그 노드에 있음
+    if job_id not in job_status:
+        _, owner_url = await lookup_job(job_id)
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
+    
     cleaned_files = []
-    for pattern in [f"source_{job_id}.*", f"target_{job_id}.*", f"output_{job_id}.*", f"camera_face_{job_id}.*"]:
-        for file_path in TEMP_DIR.glob(pattern):
-            try:
-                file_path.unlink()
-                cleaned_files.append(str(file_path))
-            except:
-                pass
+    for file_path in job_files(TEMP_DIR, job_id):
+        try:
+            file_path.unlink()
+            cleaned_files.append(str(file_path))
+        except:
+            pass
     
-    # 작업 상태도 정리
-    if job_id in job_status:
-        del job_status[job_id]
+    # 대기 중인 작업이면 대기열에서 빼고 상태도 정리 (미리보기 작업 포함)
+    preview_id = job_status.get(job_id, {}).get("preview_job_id")
+    if preview_id:
+        cancel_job(preview_id)
+    cancel_job(job_id)
     
     return {"success": True, "cleaned_files": cleaned_files}
 
@@ -483,6 +1754,10 @@ async def cleanup_files(job_id: str):
 async def faceswap_options():
     return {"message": "OK"}
 
+@app.options("/faceswap-with-camera/raw")
+async def faceswap_raw_options():
+    return {"message": "OK"}
+
 @app.options("/videos")
 async def videos_options():
     return {"message": "OK"}
@@ -503,6 +1778,17 @@ async def download_options(job_id: str):
 async def cleanup_options(job_id: str):
     return {"message": "OK"}
 
+@app.options("/jobs/{job_id}/cancel")
+async def cancel_options(job_id: str):
+    return {"message": "OK"}
+
+async def device_stats() -> list:
+    """장치별 실행 중/누적 작업, 점유율, 워커를 기다리는 작업 수 + nvidia-smi 실측 사용률 (있으면)"""
+    devices = device_pool.stats(await run_in_threadpool(query_nvidia_smi))
+    for device in devices:
+        device["waiting"] = worker_pool.waiting.get(device["device"], 0) if worker_pool else 0
+    return devices
+
 @app.get("/debug")
 async def debug_info():
     """디버깅 정보 제공"""
@@ -517,9 +1803,27 @@ async def debug_info():
         "environment": {
             "HF_HOME": os.environ.get("HF_HOME", "Not set"),
             "RUNPOD_CPU_COUNT": os.environ.get("RUNPOD_CPU_COUNT", "Not set"),
-        }
+        },
+        "worker_pool": worker_pool.stats() if worker_pool else None,
+        "scheduler": scheduler.stats(),
+        "devices": await device_stats(),
+        "result_cache": result_cache.stats(),
+        "job_workspaces": job_workspaces.stats(),
+        "status_subscribers": job_events.subscriber_count(),
+        "job_store": job_store.count_by_state(),
+        "node": {"id": NODE_ID, "url": NODE_URL, "pid": os.getpid(), "state_backend": state_backend.stats()},
+        "temp_reaper": temp_reaper.stats(),
+        "target_analysis": target_analysis.stats(
+            video_catalog.paths(), target_analysis_args
+        ),
+        "video_catalog": video_catalog.stats()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 수집용 메트릭 (text exposition format)"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.options("/debug")
 async def debug_options():
     return {"message": "OK"}
@@ -528,115 +1832,71 @@ async def debug_options():
 @app.get("/video/{job_id}")
 @app.head("/video/{job_id}")
 async def serve_video_optimized(job_id: str, request: Request):
-    """안정적 비디오 스트리밍 - 중간 로딩 방지"""
-    from fastapi import Request
-    from fastapi.responses import Response
-    import re
+    """비디오 스트리밍 - 탐색/병렬 다운로더용 Range(다중 구간 포함), ETag 재검증 지원
     
-    if job_id not in job_status or job_status[job_id]["status"] != "completed":
+    처리 중인 작업은 지금까지 인코딩된 fragmented MP4 를 처음부터 보내고 작업이 끝날 때까지
+    파일 끝을 따라가며 이어 보낸다 (길이를 모르므로 Range/캐시 없음).
+    """
+    status, owner_url = await lookup_job(job_id)
+    if status is not None and status["status"] == "processing" and status.get("progressive"):
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
+        stream_stat = await run_in_threadpool(stat_or_none, stream_output_path(job_id))
+        if stream_stat:
+            async def is_finished() -> bool:
+                current, _ = await lookup_job(job_id)
+                return current is None or current["status"] != "processing"
+            
+            log(f"📡 Streaming video while processing ({stream_stat.st_size/1024/1024:.1f}MB so far)", job_id=job_id)
+            return GrowingFileResponse(stream_output_path(job_id), is_finished, media_type="video/mp4", headers={
+                'Cache-Control': 'no-store',  # 완성본과 내용이 달라지므로 캐시 금지
+                'X-Accel-Buffering': 'no',
+                'X-Content-Type-Options': 'nosniff',
+            })
+        # 결과가 아직 안 쌓였거나 그 사이 작업이 끝남
+        status, owner_url = await lookup_job(job_id)
+    if status is None or status["status"] != "completed":
         raise HTTPException(status_code=404, detail="Video not ready")
     
-    file_path = get_cached_output_path(job_id)
+    file_path, file_stat = await locate_result(job_id, get_cached_output_path)
     if not file_path:
+        if owner_url:
+            return redirect_to_owner(owner_url, request)
         raise HTTPException(status_code=404, detail="Video file not found")
     
-    file_size = file_path.stat().st_size
-    
-    # HEAD 요청 처리 (병렬 다운로더 지원)
-    if request.method == "HEAD":
-        return Response(
-            status_code=200,
-            headers={
-                'Content-Length': str(file_size),
-                'Accept-Ranges': 'bytes',
-                'Content-Type': 'video/mp4',
-                'Cache-Control': 'public, max-age=86400',
-                'X-Content-Type-Options': 'nosniff'
-            }
-        )
-    
-    range_header = request.headers.get('range')
-    
-    # Range 요청 처리 - 더 큰 청크로 안정화
-    if range_header:
-        range_match = re.search(r'bytes=(\d+)-(\d*)', range_header)
-        if range_match:
-            start = int(range_match.group(1))
-            end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
-            end = min(end, file_size - 1)
-            
-            content_length = end - start + 1
-            
-            def buffered_range_generator():
-                with open(file_path, 'rb') as f:
-                    f.seek(start)
-                    remaining = content_length
-                    while remaining > 0:
-                        # 초고속 전송을 위한 대용량 청크 (1MB)
-                        chunk_size = min(1048576, remaining)  
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        remaining -= len(chunk)
-                        yield chunk
-            
-            return StreamingResponse(
-                buffered_range_generator(),
-                status_code=206,  # Partial Content
-                            headers={
-                'Content-Range': f'bytes {start}-{end}/{file_size}',
-                'Accept-Ranges': 'bytes',
-                'Content-Length': str(content_length),
-                'Content-Type': 'video/mp4',
-                'Cache-Control': 'public, max-age=86400',  # 24시간 캐시
-                'Connection': 'keep-alive',  # 연결 유지
-                'X-Accel-Buffering': 'no',  # nginx 버퍼링 방지
-                'X-Content-Type-Options': 'nosniff',
-                'Access-Control-Expose-Headers': 'Content-Range, Accept-Ranges, Content-Length'
-            }
-            )
-    
-    # 전체 파일 스트리밍 - 안정적 버퍼링
-    def stable_file_generator():
-        with open(file_path, 'rb') as f:
-            while True:
-                chunk = f.read(1048576)  # 1MB 청크로 초고속화
-                if not chunk:
-                    break
-                yield chunk
-    
-    return StreamingResponse(
-        stable_file_generator(),
-        media_type="video/mp4",
-        headers={
-            'Content-Length': str(file_size),
-            'Accept-Ranges': 'bytes',
-            'Content-Type': 'video/mp4',
-            'Cache-Control': 'public, max-age=86400',  # 24시간 캐시
-            'Connection': 'keep-alive',  # 연결 유지
-            'X-Accel-Buffering': 'no',  # nginx 버퍼링 방지
-            'X-Content-Type-Options': 'nosniff',
-            'Access-Control-Expose-Headers': 'Content-Range, Accept-Ranges, Content-Length'
-        }
-    )
+    return serve_file(request, file_path, file_stat, "video/mp4", headers={
+        'Cache-Control': 'public, max-age=86400',  # 24시간 캐시
+        'Connection': 'keep-alive',  # 연결 유지
+        'X-Accel-Buffering': 'no',  # nginx 버퍼링 방지
+        'X-Content-Type-Options': 'nosniff',
+        'Access-Control-Expose-Headers': 'Content-Range, Accept-Ranges, Content-Length, ETag, Last-Modified'
+    })
 
 if __name__ == "__main__":
     import uvicorn
     
     # RunPod 환경에서 실행
     port = 8001  # 고정 포트
-    print(f"Starting FaceFusion Backend API on port {port}")
+    log(f"Starting FaceFusion Backend API on port {port}")
     pod_id = os.environ.get('RUNPOD_POD_ID')
     if pod_id:
         proxy_url = f"https://{pod_id}-8001.proxy.runpod.net"
-        print(f"RunPod Proxy URL: {proxy_url}/")
-        print(f"Health check: {proxy_url}/health")
+        log(f"RunPod Proxy URL: {proxy_url}/")
+        log(f"Health check: {proxy_url}/health")
     else:
-        print(f"Local development: http://localhost:{port}/")
-        print(f"Health check: http://localhost:{port}/health")
+        log(f"Local development: http://localhost:{port}/")
+        log(f"Health check: http://localhost:{port}/health")
+    
+    # API 워커(프로세스)마다 자기 대기열(JobScheduler)과 GPU 슬롯(DevicePool)을 따로 가지므로 워커 여러 개면
+    # 동시 실행 수/대기열 길이가 워커 수만큼 늘어나 같은 GPU 에 몰림 - 작업은 항상 프로세스 안에서 스케줄하므로 1개로
+    # (확장은 GPU 를 나눠 맡은 API 프로세스/노드를 늘리고 sqlite/redis 백엔드로 상태만 공유)
+    if int(os.environ.get('FACEFUSION_API_WORKERS', '1')) > 1:
+        log("⚠️ FACEFUSION_API_WORKERS > 1 is not supported: the job queue and GPU slots are per process "
+            "(run one API process per GPU set / node with FACEFUSION_STATE_BACKEND=sqlite or redis) - running 1 worker",
+            level="warning")
     
     uvicorn.run(
-        app, 
+        app,
         host="0.0.0.0",  # 모든 인터페이스에서 접근 가능
         port=port,
         log_level="info",
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""동시 영상 다운로드 중 이벤트 루프 지연 측정
+
+임시 워크스페이스에 완료된 가짜 작업(결과 영상)을 만들고 uvicorn 으로 API 를 띄운 뒤
+1) 다운로드 없이, 2) N개의 동시 다운로드 중에 다음을 잰다.
+
+- 이벤트 루프 지연: 서버 루프 안에서 10ms 마다 깨어나는 코루틴의 지각 시간
+- 상태 폴링 응답 시간: GET /status/{job_id}
+
+--disk-delay-ms 를 주면 os.stat/os.pread 마다 지연을 넣어 느린 디스크(네트워크 볼륨)를 흉내낸다.
+--endpoint legacy 는 이전 방식(핸들러 안에서 exists/stat 호출)과 비교하기 위한 경로.
+
+    python benchmarks/bench_event_loop.py --downloads 16 --size-mb 64 --disk-delay-ms 5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_JOB_ID = "bench-job"
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def slow_disk(delay: float):
+    """os.stat / os.pread 호출마다 블로킹 지연 추가 (스레드 풀에서 불리면 루프는 영향 없음)"""
+    original_stat, original_pread = os.stat, os.pread
+
+    def stat(*args, **kwargs):
+        time.sleep(delay)
+        return original_stat(*args, **kwargs)
+
+    def pread(*args, **kwargs):
+        time.sleep(delay)
+        return original_pread(*args, **kwargs)
+
+    os.stat, os.pread = stat, pread
+
+
+def create_app(workspace: Path, size_mb: int):
+    os.environ["FACEFUSION_WORKSPACE"] = str(workspace)
+    os.environ["FACEFUSION_WORKERS"] = "0"
+    os.environ["FACEFUSION_RESULT_CACHE_MB"] = "0"
+    sys.path.insert(0, str(ROOT))
+    import backend_api
+    from fastapi.responses import StreamingResponse
+
+    output_path = backend_api.TEMP_DIR / f"output_{BENCH_JOB_ID}.mp4"
+    with open(output_path, "wb") as f:
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            f.write(block)
+    backend_api.job_status[BENCH_JOB_ID] = {"status": "completed", "progress": 100, "stage": "done"}
+
+    @backend_api.app.get("/bench/legacy/{job_id}")
+    async def legacy_video(job_id: str):
+        # 변경 전 방식: 이벤트 루프에서 exists()/stat() 후 동기 제너레이터로 전송
+        file_path = backend_api.TEMP_DIR / f"output_{job_id}.mp4"
+        if not file_path.exists():
+            return {"error": "not found"}
+        file_size = file_path.stat().st_size
+
+        def iterfile():
+            with open(file_path, "rb") as f:
+                while True:
+                    chunk = f.read(1048576)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        return StreamingResponse(iterfile(), media_type="video/mp4", headers={"Content-Length": str(file_size)})
+
+    return backend_api.app
+
+
+class LoopLagProbe:
+    """서버 이벤트 루프 안에서 주기적으로 깨어나며 지각 시간을 기록"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self.recording = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            if self.recording:
+                self.samples.append(max(0.0, loop.time() - expected))
+
+    def take(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+
+async def download_loop(client, url: str, stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        async with client.stream("GET", url) as response:
+            async for chunk in response.aiter_raw():
+                counter[0] += len(chunk)
+                if stop.is_set():
+                    break
+
+
+async def status_loop(client, url: str, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def run_phase(base_url: str, path: str, downloads: int, duration: float, probe: LoopLagProbe) -> dict:
+    import httpx
+
+    stop = asyncio.Event()
+    counter = [0]
+    status_latencies = []
+    limits = httpx.Limits(max_connections=downloads + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        probe.take()
+        probe.recording = True
+        tasks = [asyncio.create_task(download_loop(client, path, stop, counter)) for _ in range(downloads)]
+        tasks.append(asyncio.create_task(status_loop(client, f"/status/{BENCH_JOB_ID}", stop, status_latencies)))
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        stop.set()
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*tasks, return_exceptions=True)
+        probe.recording = False
+    lag = probe.take()
+    return {
+        "downloads": downloads,
+        "lag_p50_ms": percentile(lag, 0.5) * 1000,
+        "lag_p99_ms": percentile(lag, 0.99) * 1000,
+        "lag_max_ms": max(lag, default=0.0) * 1000,
+        "status_p50_ms": percentile(status_latencies, 0.5) * 1000,
+        "status_p99_ms": percentile(status_latencies, 0.99) * 1000,
+        "status_polls": len(status_latencies),
+        "throughput_mb_s": counter[0] / elapsed / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event loop latency under concurrent video downloads")
+    parser.add_argument("--downloads", type=int, nargs="+", default=[0, 4, 16, 32])
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--disk-delay-ms", type=float, default=0.0)
+    parser.add_argument("--endpoint", choices=["video", "stream", "legacy"], default="video")
+    parser.add_argument("--port", type=int, default=18001)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    workspace = Path(tempfile.mkdtemp(prefix="bench_event_loop_"))
+    app = create_app(workspace, args.size_mb)
+    probe = LoopLagProbe()
+
+    @app.on_event("startup")
+    async def start_probe():
+        asyncio.get_running_loop().create_task(probe.run())
+
+    if args.disk_delay_ms:
+        slow_disk(args.disk_delay_ms / 1000)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    path = {
+        "video": f"/video/{BENCH_JOB_ID}",
+        "stream": f"/result/{BENCH_JOB_ID}/stream",
+        "legacy": f"/bench/legacy/{BENCH_JOB_ID}",
+    }[args.endpoint]
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"endpoint={path} size={args.size_mb}MB duration={args.duration}s disk_delay={args.disk_delay_ms}ms")
+    print(f"{'downloads':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9} {'status p50':>11} {'status p99':>11} {'MB/s':>8}")
+    for downloads in args.downloads:
+        result = asyncio.run(run_phase(base_url, path, downloads, args.duration, probe))
+        print(
+            f"{result['downloads']:>9} {result['lag_p50_ms']:>8.1f}ms {result['lag_p99_ms']:>8.1f}ms "
+            f"{result['lag_max_ms']:>8.1f}ms {result['status_p50_ms']:>10.1f}ms {result['status_p99_ms']:>10.1f}ms "
+            f"{result['throughput_mb_s']:>8.1f}"
+        )
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
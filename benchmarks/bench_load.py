@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""API 부하 테스트 - 가짜 FaceFusion 으로 업로드부터 결과 받기까지 전체 흐름을 동시에 돌림
+
+GPU/모델/네트워크 없이 CPU 만 있는 리눅스에서 서빙 경로(업로드, 상태 폴링, 영상 다운로드,
+base64) 의 회귀를 잡기 위한 것. 임시 워크스페이스에 샘플 영상과 가짜 facefusion.py
+(benchmarks/fake_facefusion.py - 잠든 뒤 타겟 영상을 복사)를 두고 uvicorn 으로 API 를 띄운다.
+
+가상 클라이언트 하나는 프론트엔드와 같은 순서로 반복한다.
+1) POST /faceswap-with-camera/raw 로 사진 업로드
+2) 끝날 때까지 GET /status/{job_id} 폴링
+3) parallelDownloader.js 처럼 HEAD 후 If-Range 를 붙인 Range 요청 N개로 /video/{job_id} 병렬 다운로드
+4) --base64-ratio 비율로 GET /result/{job_id}/base64
+5) DELETE /cleanup/{job_id}
+
+엔드포인트별 p50/p95/p99 지연과 처리량을 출력하고 --json 으로 저장할 수 있다.
+--engine stub 은 콜드 실행 대신 상주 워커 풀(스텁 엔진) 경로를 잰다.
+
+    python benchmarks/bench_load.py --clients 8 --duration 30 --job-delay 2 --video-mb 8
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_FACEFUSION = Path(__file__).resolve().parent / "fake_facefusion.py"
+TERMINAL_STATES = {"completed", "failed", "cancelled"}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def write_sample_video(path: Path, size_mb: float, rng: random.Random):
+    """MP4 처럼 보이는 샘플 (ftyp 박스 + 임의 데이터) - 가짜 FaceFusion 은 복사만 하므로 디코딩 불필요"""
+    with open(path, "wb") as f:
+        f.write(b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2")
+        remaining = int(size_mb * 1024 * 1024)
+        while remaining > 0:
+            block = rng.randbytes(min(remaining, 1024 * 1024))
+            f.write(block)
+            remaining -= len(block)
+
+
+def fake_jpeg(rng: random.Random) -> bytes:
+    """매번 다른 사진 (결과 캐시에 걸리지 않도록)"""
+    return b"\xff\xd8\xff\xe0" + rng.randbytes(rng.randint(20_000, 60_000)) + b"\xff\xd9"
+
+
+def create_app(workspace: Path, args, rng: random.Random):
+    videos_dir = workspace / "videos"
+    videos_dir.mkdir(parents=True)
+    if args.sample:
+        shutil.copyfile(args.sample, videos_dir / "sample.mp4")
+    else:
+        write_sample_video(videos_dir / "sample.mp4", args.video_mb, rng)
+    facefusion_dir = workspace / "facefusion"
+    facefusion_dir.mkdir()
+    shutil.copyfile(FAKE_FACEFUSION, facefusion_dir / "facefusion.py")
+
+    os.environ.update({
+        "FACEFUSION_WORKSPACE": str(workspace),
+        "FACEFUSION_PYTHON": sys.executable,
+        "FACEFUSION_WORKERS": str(args.slots) if args.engine == "stub" else "0",
+        "FACEFUSION_WORKER_ENGINE": "stub",
+        "FACEFUSION_STUB_JOB_DELAY": str(args.job_delay),
+        "FACEFUSION_PREPARE_TARGETS": "0",
+        "FACEFUSION_GPUS": "0",
+        "FACEFUSION_JOBS_PER_GPU": str(args.slots),
+        "FACEFUSION_MAX_QUEUED_JOBS": str(max(20, args.clients * 2)),
+        "BENCH_FACEFUSION_DELAY": str(args.job_delay),
+    })
+    sys.path.insert(0, str(ROOT))
+    import backend_api
+    return backend_api
+
+
+class Recorder:
+    """엔드포인트별 지연/바이트/에러 집계"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.bytes = {}
+        self.errors = {}
+
+    def record(self, endpoint: str, latency: float, size: int = 0, ok: bool = True):
+        self.latencies.setdefault(endpoint, []).append(latency)
+        self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    async def timed(self, endpoint: str, request, expect=(200,)):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.record(endpoint, time.perf_counter() - started, ok=False)
+            return None
+        self.record(endpoint, time.perf_counter() - started, len(response.content), response.status_code in expect)
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        return {
+            endpoint: {
+                "count": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": percentile(values, 0.5) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "req_s": len(values) / elapsed,
+                "mb_s": self.bytes.get(endpoint, 0) / elapsed / 1024 / 1024,
+            }
+            for endpoint, values in self.latencies.items()
+        }
+
+
+async def parallel_download(client, recorder: Recorder, url: str, chunk_count: int) -> bool:
+    """parallelDownloader.js 와 같은 방식 - HEAD 로 크기/ETag 확인 후 If-Range 를 붙인 구간 요청"""
+    head = await recorder.timed("HEAD /video", client.head(url))
+    if head is None or head.status_code != 200:
+        return False
+    total = int(head.headers.get("content-length", 0))
+    etag = head.headers.get("etag")
+    chunk_size = -(-total // chunk_count)
+    ranges = [(start, min(start + chunk_size, total) - 1) for start in range(0, total, chunk_size)]
+
+    async def fetch(start: int, end: int):
+        headers = {"Range": f"bytes={start}-{end}", "Accept": "video/mp4,video/*,*/*"}
+        if etag:
+            headers["If-Range"] = etag
+        response = await recorder.timed("GET /video (range)", client.get(url, headers=headers), expect=(206,))
+        return response is not None and response.status_code == 206 and len(response.content) == end - start + 1
+
+    results = await asyncio.gather(*(fetch(start, end) for start, end in ranges))
+    return all(results)
+
+
+async def virtual_client(client, recorder: Recorder, args, rng: random.Random, stop: asyncio.Event, jobs: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        upload = await recorder.timed(
+            "POST /faceswap-with-camera/raw",
+            client.post("/faceswap-with-camera/raw", params={"video_id": 1}, content=fake_jpeg(rng),
+                        headers={"Content-Type": "image/jpeg"}),
+            expect=(200, 429),
+        )
+        if upload is None:
+            await asyncio.sleep(1)
+            continue
+        if upload.status_code == 429:
+            await asyncio.sleep(float(upload.headers.get("retry-after", 1)))
+            continue
+        job_id = upload.json().get("job_id")
+        if not upload.json().get("success") or not job_id:
+            continue
+
+        state = None
+        deadline = time.perf_counter() + args.job_timeout
+        while time.perf_counter() < deadline:
+            status = await recorder.timed("GET /status", client.get(f"/status/{job_id}"))
+            if status is not None and status.status_code == 200:
+                state = status.json().get("status")
+                if state in TERMINAL_STATES:
+                    break
+            await asyncio.sleep(args.poll_interval)
+        jobs.append({"job_id": job_id, "status": state, "seconds": time.perf_counter() - started})
+
+        if state == "completed":
+            if not await parallel_download(client, recorder, f"/video/{job_id}", args.chunks):
+                recorder.errors["download"] = recorder.errors.get("download", 0) + 1
+            if rng.random() < args.base64_ratio:
+                await recorder.timed("GET /result/base64", client.get(f"/result/{job_id}/base64"))
+        await recorder.timed("DELETE /cleanup", client.delete(f"/cleanup/{job_id}"))
+
+
+async def run_load(base_url: str, args, rng: random.Random) -> dict:
+    import httpx
+
+    recorder = Recorder()
+    jobs = []
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.clients * (args.chunks + 2))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.job_timeout, limits=limits) as client:
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(virtual_client(client, recorder, args, random.Random(rng.random()), stop, jobs))
+            for _ in range(args.clients)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        # 진행 중인 작업은 끝까지 (결과 다운로드 포함) - 중간에 끊으면 지연 분포가 왜곡됨
+        await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    completed = [job["seconds"] for job in jobs if job["status"] == "completed"]
+    return {
+        "elapsed": elapsed,
+        "endpoints": recorder.summary(elapsed),
+        "download_errors": recorder.errors.get("download", 0),
+        "jobs": {
+            "submitted": len(jobs),
+            "completed": len(completed),
+            "failed": sum(1 for job in jobs if job["status"] != "completed"),
+            "per_minute": len(completed) / elapsed * 60,
+            "e2e_p50_s": percentile(completed, 0.5),
+            "e2e_p95_s": percentile(completed, 0.95),
+        },
+    }
+
+
+def print_report(result: dict, out):
+    print(f"{'endpoint':<32} {'count':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'MB/s':>8}", file=out)
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:<32} {stats['count']:>6} {stats['errors']:>6} {stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms "
+            f"{stats['p99_ms']:>7.1f}ms {stats['req_s']:>8.1f} {stats['mb_s']:>8.1f}",
+            file=out,
+        )
+    jobs = result["jobs"]
+    print(
+        f"jobs: {jobs['completed']}/{jobs['submitted']} completed ({jobs['per_minute']:.1f}/min), "
+        f"end-to-end p50 {jobs['e2e_p50_s']:.2f}s p95 {jobs['e2e_p95_s']:.2f}s, download errors {result['download_errors']}",
+        file=out,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a fake FaceFusion backend (offline, CPU only)")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep submitting new jobs")
+    parser.add_argument("--job-delay", type=float, default=2.0, help="fake FaceFusion processing time per job (s)")
+    parser.add_argument("--slots", type=int, default=2, help="concurrent jobs (FACEFUSION_JOBS_PER_GPU)")
+    parser.add_argument("--engine", choices=["cold", "stub"], default="cold",
+                        help="cold: fake facefusion.py per job, stub: warm worker pool with the stub engine")
+    parser.add_argument("--video-mb", type=float, default=8.0, help="size of the generated sample video")
+    parser.add_argument("--sample", help="use this MP4 as the target/result instead of generated bytes")
+    parser.add_argument("--chunks", type=int, default=8, help="parallel range requests per download (parallelDownloader.js)")
+    parser.add_argument("--base64-ratio", type=float, default=0.25, help="fraction of jobs that also fetch /result/{id}/base64")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--job-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--server-log", default=os.devnull, help="where server/worker output goes")
+    parser.add_argument("--port", type=int, default=18002)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    rng = random.Random(args.seed)
+    workspace = Path(tempfile.mkdtemp(prefix="bench_load_"))
+    backend_api = create_app(workspace, args, rng)
+
+    # 서버/워커 로그는 따로 - 결과 표만 원래 stdout 으로
+    out = os.fdopen(os.dup(1), "w")
+    log_fd = os.open(args.server_log, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+
+    server = uvicorn.Server(uvicorn.Config(backend_api.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    if args.engine == "stub":
+        while not (backend_api.worker_pool and backend_api.worker_pool.available):
+            time.sleep(0.1)
+
+    print(
+        f"engine={args.engine} clients={args.clients} slots={args.slots} job_delay={args.job_delay}s "
+        f"video={args.sample or f'{args.video_mb}MB'} chunks={args.chunks} duration={args.duration}s",
+        file=out, flush=True,
+    )
+    result = asyncio.run(run_load(f"http://127.0.0.1:{args.port}", args, rng))
+    print_report(result, out)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), **result}, f, indent=2)
+    out.flush()
+
+    server.should_exit = True
+    thread.join(timeout=10)
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""벤치마크용 가짜 facefusion.py - GPU/모델 없이 API 서빙 경로만 측정
+
+bench_load.py 가 워크스페이스의 facefusion/facefusion.py 로 복사해 콜드 실행 경로에서 쓴다.
+FaceFusion 과 같은 형식의 단계 로그/진행바를 출력하며 BENCH_FACEFUSION_DELAY 초 동안 잠든 뒤
+타겟 영상을 출력 경로로 복사한다.
+"""
+
+import os
+import sys
+import time
+import shutil
+
+FRAMES = 10
+
+
+def get_arg_value(args, name):
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+
+def main():
+    args = sys.argv[1:]
+    target_path = get_arg_value(args, "--target-path")
+    output_path = get_arg_value(args, "--output-path")
+    if not target_path or not output_path:
+        print("[FACEFUSION.CORE] Missing --target-path or --output-path", flush=True)
+        return 1
+    delay = float(os.environ.get("BENCH_FACEFUSION_DELAY", "2"))
+
+    print("[FACEFUSION.CORE] Extracting frames with a resolution of 1280x720 and 30 frames per second", flush=True)
+    print("[FACEFUSION.PROCESSORS.MODULES.FACE_SWAPPER.CORE] Processing", flush=True)
+    for frame in range(1, FRAMES + 1):
+        time.sleep(delay / FRAMES)
+        print(f"\rProcessing: {frame * 10}%| | {frame}/{FRAMES} [00:00<00:00, {FRAMES / max(delay, 0.01):.2f}frame/s]", end="", flush=True)
+    print(flush=True)
+    print("[FACEFUSION.CORE] Merging video with a resolution of 1280x720 and 30 frames per second", flush=True)
+    shutil.copyfile(target_path, output_path)
+    print("[FACEFUSION.CORE] Processing to video succeed", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
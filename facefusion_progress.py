@@ -0,0 +1,145 @@
+"""FaceFusion 출력(로그 + tqdm 진행바)을 읽어 단계별/프레임 단위 진행률로 변환
+
+    [FACEFUSION.CORE] Extracting frames with a resolution of 1280x720 and 30 frames per second
+    [FACEFUSION.PROCESSORS.MODULES.FACE_SWAPPER.CORE] Processing
+    Processing:  45%|████▌     | 405/900 [00:10<00:12, 40.12frame/s, ...]
+    Processing:   2%|▏         | 18/900 [00:58<47:10, 3.21s/frame, ...]   (프레임당 1초 이상이면 tqdm 이 단위를 뒤집음)
+    [FACEFUSION.CORE] Merging video with a resolution of 1280x720 and 30 frames per second
+
+tqdm 은 \\r 로 같은 줄을 덮어쓰므로 \\r 과 \\n 둘 다 줄 구분으로 취급한다.
+"""
+
+import re
+import time
+from collections import deque
+from typing import List, Optional
+
+TQDM_PATTERN = re.compile(r"(\d+)/(\d+) \[[\d:]+<([\d:?]+),\s*([\d.]+|\?)\s*((?:frame|it)/s|s/(?:frame|it))")
+
+# 단계별 전체 진행률 구간 (시작, 끝) - 스왑/인핸스가 대부분의 시간을 차지
+STAGE_RANGES = {
+    "queued": (0, 0),
+    "starting": (0, 2),
+    "extract": (2, 10),
+    "swap": (10, 55),
+    "enhance": (55, 90),
+    "merge": (90, 99),
+    "done": (100, 100),
+}
+
+PROGRESS_FIELDS = ("progress", "stage", "frames_done", "frames_total", "fps", "eta", "stage_times")
+
+STAGE_MARKERS = [
+    ("extracting frames", "extract"),
+    ("face_swapper", "swap"),
+    ("face_enhancer", "enhance"),
+    ("merging video", "merge"),
+    ("restoring audio", "merge"),
+    ("skipping audio", "merge"),
+]
+
+
+def parse_eta(value: str) -> Optional[float]:
+    if "?" in value:
+        return None
+    seconds = 0
+    for part in value.split(":"):
+        seconds = seconds * 60 + int(part)
+    return float(seconds)
+
+
+def parse_rate(value: str, unit: str) -> Optional[float]:
+    """초당 프레임 수 - s/frame(s/it) 단위면 역수"""
+    if value == "?":
+        return None
+    rate = float(value)
+    if unit.startswith("s/"):
+        return round(1 / rate, 4) if rate else None
+    return rate
+
+
+class ProgressParser:
+    """출력 조각을 받아 진행 상태를 갱신 - 마지막 몇 줄은 에러 메시지용으로 보관"""
+
+    def __init__(self, tail_lines: int = 40):
+        self.buffer = ""
+        self.tail = deque(maxlen=tail_lines)
+        self.stage = "starting"
+        self.frames_done = 0
+        self.frames_total = 0
+        self.fps: Optional[float] = None
+        self.eta: Optional[float] = None
+        self.stage_started = time.time()
+        self.stage_times = {}
+
+    def feed(self, text: str) -> bool:
+        """출력 조각 처리 - 진행 상태가 바뀌었으면 True"""
+        self.buffer += text
+        *lines, self.buffer = re.split(r"[\r\n]", self.buffer)
+        changed = False
+        for line in lines:
+            changed = self._parse_line(line.strip()) or changed
+        return changed
+
+    def _set_stage(self, stage: str):
+        if stage == self.stage:
+            return
+        now = time.time()
+        self.stage_times[self.stage] = round(now - self.stage_started, 2)
+        self.stage = stage
+        self.stage_started = now
+        self.frames_done = 0
+        self.frames_total = 0
+        self.fps = None
+        self.eta = None
+
+    def _parse_line(self, line: str) -> bool:
+        if not line:
+            return False
+        match = TQDM_PATTERN.search(line)
+        if match:
+            self.frames_done = int(match.group(1))
+            self.frames_total = int(match.group(2))
+            self.eta = parse_eta(match.group(3))
+            self.fps = parse_rate(match.group(4), match.group(5))
+            return True
+        self.tail.append(line)
+        lowered = line.lower()
+        for marker, stage in STAGE_MARKERS:
+            if marker in lowered:
+                self._set_stage(stage)
+                return True
+        return False
+
+    def finish(self, succeeded: bool):
+        """남은 출력 처리 후 마지막 단계 시간 기록 - 성공이면 done 단계로"""
+        if self.buffer:
+            self._parse_line(self.buffer.strip())
+            self.buffer = ""
+        if succeeded:
+            self._set_stage("done")
+        elif self.stage != "done":
+            # 실패해도 어느 단계에서 얼마나 걸렸는지는 남김 (단계는 그대로)
+            self.stage_times[self.stage] = round(time.time() - self.stage_started, 2)
+
+    @property
+    def progress(self) -> int:
+        start, end = STAGE_RANGES.get(self.stage, (0, 0))
+        if self.frames_total:
+            return int(start + (end - start) * self.frames_done / self.frames_total)
+        return start
+
+    def error_message(self) -> Optional[str]:
+        lines: List[str] = list(self.tail)
+        return "\n".join(lines) if lines else None
+
+    def snapshot(self) -> dict:
+        return {
+            "progress": self.progress,
+            "stage": self.stage,
+            "frames_done": self.frames_done,
+            "frames_total": self.frames_total,
+            "fps": self.fps,
+            "eta": self.eta,
+            "stage_times": dict(self.stage_times),
+        }
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""상주형 FaceFusion 워커 프로세스
+
+모델(face detector, inswapper, face enhancer)을 한 번만 로드해 두고
+stdin 으로 들어오는 작업을 JSON 한 줄 단위로 처리한다.
+결과 이벤트도 stdout 에 JSON 한 줄씩 쓴다.
+
+    {"type": "run", "job_id": "...", "args": ["headless-run", ...]}
+    -> {"event": "done", "job_id": "...", "returncode": 0, "error": null}
+
+    {"type": "run_batch", "batch_id": "...", "jobs": [{"job_id": "...", "args": [...]}, ...]}
+    -> {"event": "batch_done", "batch_id": "...", "results": [{"job_id": "...", "returncode": 0, "error": null}, ...]}
+
+run 메시지나 batch 의 작업에 "stream_path" 가 있으면 처리된 프레임을 바로 fragmented MP4 로
+인코딩해 그 경로에 이어 쓰고 (처리 중에도 재생 가능), 끝나면 --output-path 로 이름을 바꾼다.
+
+GPU 없이 테스트할 때는 --engine stub 으로 실행한다.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import traceback
+import subprocess
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from target_analysis import TargetAnalysisCache
+from facefusion_progress import ProgressParser
+
+DEFAULT_FACEFUSION_DIR = Path("/workspace/facefusion")
+DEFAULT_ANALYSIS_DIR = Path("/workspace/target_analysis")
+BATCH_SWAP_SHARE = 0.35  # 스텁: 작업 하나 시간 중 소스별로 반복되는 스왑/인핸스 비중
+# 키프레임마다 fragment 를 끊고 moov 를 맨 앞에 둬서 쓰는 중인 파일도 처음부터 재생 가능
+FRAGMENTED_MP4_FLAGS = "+frag_keyframe+empty_moov+default_base_moof"
+SOURCE_FACE_CACHE_SIZE = 64  # 소스 사진별 얼굴(임베딩 포함) 캐시 - 미리보기/전체 렌더/재시도가 같은 사진을 다시 분석하지 않음
+# 작업이 끝나면 출력 파이프에 써서 pump_output 이 그 앞의 출력(마지막 진행 줄)까지 다 읽었는지 확인
+DRAIN_MARKER = b"\n[FACEFUSION_WORKER.DRAIN]\n"
+DRAIN_TIMEOUT = 5.0
+
+
+def split_drain_marker(data: bytes) -> tuple:
+    """(마커 앞 출력, 마커를 찾았는지, 다음 조각과 이어 볼 나머지)
+
+    마커가 조각 경계에 걸릴 수 있으므로 끝부분이 마커의 앞부분과 같으면 남겨 둔다.
+    """
+    index = data.find(DRAIN_MARKER)
+    if index >= 0:
+        return data[:index], True, data[index + len(DRAIN_MARKER):]
+    for keep in range(min(len(data), len(DRAIN_MARKER) - 1), 0, -1):
+        if DRAIN_MARKER.startswith(data[-keep:]):
+            return data[:-keep], False, data[-keep:]
+    return data, False, b""
+
+
+def get_arg_value(args: List[str], name: str) -> Optional[str]:
+    """CLI 인자 리스트에서 옵션 값 꺼내기"""
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+
+class ProgressiveCopy:
+    """스텁: 처리된 프레임 비율만큼 타겟 영상을 stream_path 에 이어 써서 자라는 결과 파일을 흉내"""
+
+    def __init__(self, target_path: str, stream_path: str):
+        self.size = os.path.getsize(target_path)
+        self.source = open(target_path, "rb")
+        Path(stream_path).parent.mkdir(parents=True, exist_ok=True)
+        self.output = open(stream_path, "wb")
+
+    def advance(self, fraction: float):
+        wanted = int(self.size * fraction) - self.output.tell()
+        if wanted > 0:
+            self.output.write(self.source.read(wanted))
+            self.output.flush()
+
+    def close(self):
+        self.advance(1.0)
+        self.source.close()
+        self.output.close()
+
+
+def frame_inputs(reference_faces, source_face, source_frames, frame) -> dict:
+    """processor.process_frame 입력 - FaceFusion 프로세서 Inputs(TypedDict) 키의 합집합 (각 프로세서는 필요한 키만 읽음)"""
+    return {
+        "reference_faces": reference_faces,
+        "source_face": source_face,
+        "source_vision_frames": source_frames,
+        "source_audio_frame": None,
+        "target_vision_frame": frame,
+        "temp_vision_frame": frame,
+    }
+
+
+class StubEngine:
+    """FaceFusion 대신 쓰는 CPU 스텁 - 잠깐 쉬고 타겟 영상을 그대로 복사"""
+
+    name = "stub"
+
+    def __init__(self, warmup_delay: float = 0.0, job_delay: float = 0.0):
+        self.warmup_delay = warmup_delay
+        self.job_delay = job_delay
+
+    def warmup(self):
+        time.sleep(self.warmup_delay)
+
+    def _fake_pipeline(self, delay: float, streams: List[ProgressiveCopy] = ()):
+        # FaceFusion 과 같은 형식으로 로그/진행바를 출력해 진행률 파싱 경로도 함께 검증
+        frames = 10
+        print("[FACEFUSION.CORE] Extracting frames with a resolution of 1280x720 and 30 frames per second", file=sys.stderr, flush=True)
+        for step, module in enumerate(["FACE_SWAPPER", "FACE_ENHANCER"]):
+            print(f"[FACEFUSION.PROCESSORS.MODULES.{module}.CORE] Processing", file=sys.stderr, flush=True)
+            for frame in range(1, frames + 1):
+                time.sleep(delay / (2 * frames))
+                for stream in streams:
+                    stream.advance((step * frames + frame) / (2 * frames))
+                print(f"\rProcessing: {frame * 10}%| | {frame}/{frames} [00:00<00:00, {frames / max(delay, 0.01):.2f}frame/s]", end="", file=sys.stderr, flush=True)
+            print(file=sys.stderr, flush=True)
+        print("[FACEFUSION.CORE] Merging video with a resolution of 1280x720 and 30 frames per second", file=sys.stderr, flush=True)
+
+    def run(self, args: List[str], stream_path: Optional[str] = None) -> Optional[str]:
+        return self.run_batch([{"job_id": "run", "args": args, "stream_path": stream_path}])["run"]
+
+    def run_batch(self, jobs: List[dict]) -> Dict[str, Optional[str]]:
+        errors: Dict[str, Optional[str]] = {}
+        valid, streams = [], []
+        for job in jobs:
+            target_path = get_arg_value(job["args"], "--target-path")
+            output_path = get_arg_value(job["args"], "--output-path")
+            if not target_path or not output_path:
+                errors[job["job_id"]] = "Missing --target-path or --output-path"
+                continue
+            valid.append((job, target_path, output_path))
+            if job.get("stream_path"):
+                streams.append(ProgressiveCopy(target_path, job["stream_path"]))
+        # 디코딩/검출/인코딩을 나눠 쓰는 효과를 흉내 - 작업이 늘어도 시간은 스왑 부분만 증가
+        self._fake_pipeline(self.job_delay * (1 + BATCH_SWAP_SHARE * (len(valid) - 1)), streams)
+        for stream in streams:
+            stream.close()
+        for job, target_path, output_path in valid:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            if job.get("stream_path"):
+                os.replace(job["stream_path"], output_path)
+            else:
+                shutil.copyfile(target_path, output_path)
+            errors[job["job_id"]] = None
+        return errors
+
+    def prepare(self, target_path: Path, args: List[str]) -> dict:
+        # 스텁은 얼굴 분석을 하지 않음
+        return {"prepared": False}
+
+
+class FaceFusionEngine:
+    """FaceFusion 을 프로세스 안에서 직접 호출 - 추론 세션은 모듈 캐시에 유지됨"""
+
+    name = "facefusion"
+
+    def __init__(self, facefusion_dir: Path, processors: List[str], analysis: TargetAnalysisCache):
+        self.facefusion_dir = facefusion_dir
+        self.processors = processors
+        self.analysis = analysis
+        self.initialized = False
+        self.source_faces: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def _import(self):
+        os.chdir(self.facefusion_dir)
+        if str(self.facefusion_dir) not in sys.path:
+            sys.path.insert(0, str(self.facefusion_dir))
+
+    def _apply(self, args: List[str]):
+        from facefusion import state_manager, logger
+        from facefusion.args import apply_args
+        from facefusion.program import create_program
+
+        program = create_program()
+        parsed = vars(program.parse_args(args))
+        # 첫 작업은 init_item, 이후 작업은 set_item 으로 상태 덮어쓰기
+        apply_args(parsed, state_manager.set_item if self.initialized else state_manager.init_item)
+        logger.init(state_manager.get_item("log_level"))
+        self.initialized = True
+        return parsed
+
+    def warmup(self):
+        self._import()
+        from facefusion import core
+        from facefusion.processors.core import get_processors_modules
+
+        # 모델 다운로드/검증 + 추론 세션 미리 생성 (CUDA 컨텍스트 포함)
+        self._apply(["headless-run", "--processors", *self.processors, "--execution-providers", "cuda"])
+        if not core.common_pre_check() or not core.processors_pre_check():
+            raise RuntimeError("FaceFusion pre-check failed")
+
+        from facefusion import face_detector, face_landmarker, face_recognizer, face_classifier
+        modules = [face_detector, face_landmarker, face_recognizer, face_classifier]
+        modules.extend(get_processors_modules(self.processors))
+        for module in modules:
+            if hasattr(module, "get_inference_pool"):
+                module.get_inference_pool()
+
+    def prepare(self, target_path: Path, args: List[str]) -> dict:
+        """타겟 영상 프레임 추출 + 얼굴 분석을 한 번만 수행해 캐시에 저장"""
+        if self.analysis.is_valid(target_path, args):
+            return {"prepared": True, "cached": True}
+
+        from facefusion import state_manager, face_analyser, face_store, ffmpeg
+        from facefusion.temp_helper import clear_temp_directory, create_temp_directory, get_temp_frame_paths
+        from facefusion.vision import read_image, restrict_video_fps, restrict_video_resolution, pack_resolution, unpack_resolution
+
+        self._apply(args)
+        target = str(target_path)
+        # FaceFusion 이 작업 때 추출하는 것과 같은 해상도/fps 로 추출해야 프레임 해시가 일치함
+        temp_video_resolution = pack_resolution(restrict_video_resolution(target, unpack_resolution(state_manager.get_item("output_video_resolution"))))
+        temp_video_fps = restrict_video_fps(target, state_manager.get_item("output_video_fps"))
+        clear_temp_directory(target)
+        create_temp_directory(target)
+        try:
+            if not ffmpeg.extract_frames(target, temp_video_resolution, temp_video_fps, state_manager.get_item("trim_frame_start"), state_manager.get_item("trim_frame_end")):
+                raise RuntimeError(f"Frame extraction failed: {target}")
+            manifest = self.analysis.write(
+                target_path, args, get_temp_frame_paths(target), read_image,
+                lambda frame: face_analyser.get_many_faces([frame]),
+                face_store.create_frame_hash,
+                state_manager.get_item("face_selector_order"),
+            )
+        finally:
+            clear_temp_directory(target)
+        return {"prepared": True, "cached": False, "frame_count": manifest["frame_count"]}
+
+    def _seed_static_faces(self, args: List[str]) -> int:
+        """캐시된 얼굴 분석 결과를 FaceFusion face_store 에 미리 채워 검출 단계를 건너뜀"""
+        target = get_arg_value(args, "--target-path")
+        if not target or not self.analysis.is_valid(Path(target), args):
+            return 0
+
+        from facefusion import face_store
+        try:
+            from facefusion.types import Face
+        except ImportError:
+            from facefusion.typing import Face
+
+        data = self.analysis.open(Path(target))
+        labels = data["manifest"]["labels"]
+        static_faces = face_store.FACE_STORE["static_faces"]
+        seeded = 0
+        for index, frame_hash in enumerate(data["frame_hashes"]):
+            count = int(data["face_counts"][index])
+            if not count or str(frame_hash) in static_faces:
+                continue
+            static_faces[str(frame_hash)] = [
+                Face(
+                    bounding_box=data["boxes"][index, slot],
+                    score_set={"detector": float(data["detector_scores"][index, slot]), "landmarker": float(data["landmarker_scores"][index, slot])},
+                    landmark_set={
+                        "5": data["landmarks_5"][index, slot],
+                        "5/68": data["landmarks_5_68"][index, slot],
+                        "68": data["landmarks_68"][index, slot],
+                        "68/5": data["landmarks_68_5"][index, slot],
+                    },
+                    angle=int(data["angles"][index, slot]),
+                    embedding=data["embeddings"][index, slot],
+                    normed_embedding=data["normed_embeddings"][index, slot],
+                    gender=labels["gender"][data["genders"][index, slot]],
+                    age=range(*data["ages"][index, slot]),
+                    race=labels["race"][data["races"][index, slot]],
+                )
+                for slot in range(count)
+            ]
+            seeded += 1
+        return seeded
+
+    def _source_faces(self, source_path: str, source_frames) -> list:
+        """소스 사진의 얼굴 목록 (검출 + 랜드마크 + 임베딩) - 파일(경로/mtime/크기) 단위로 캐시"""
+        from facefusion import face_analyser
+
+        stat = os.stat(source_path)
+        key = (source_path, stat.st_mtime_ns, stat.st_size)
+        faces = self.source_faces.get(key)
+        if faces is None:
+            faces = face_analyser.get_many_faces(source_frames)
+            self.source_faces[key] = faces
+            while len(self.source_faces) > SOURCE_FACE_CACHE_SIZE:
+                self.source_faces.popitem(last=False)
+        else:
+            self.source_faces.move_to_end(key)
+        return faces
+
+    def _seed_source_faces(self, args: List[str]):
+        """headless 실행도 캐시된 소스 얼굴을 쓰도록 face_store 에 채움"""
+        from facefusion import face_store
+        from facefusion.vision import read_static_images
+
+        source = get_arg_value(args, "--source-paths")
+        source_frames = read_static_images([source])
+        if source_frames:
+            face_store.FACE_STORE["static_faces"][face_store.create_frame_hash(source_frames[0])] = self._source_faces(source, source_frames)
+
+    def run(self, args: List[str], stream_path: Optional[str] = None) -> Optional[str]:
+        if stream_path:
+            # 프레임 단위 파이프라인이어야 처리 중에 결과를 이어 쓸 수 있음 (실패하면 아래 기존 방식)
+            return self.run_batch([{"job_id": "run", "args": args, "stream_path": stream_path}])["run"]
+
+        from facefusion import core, state_manager
+        from facefusion.jobs import job_manager
+
+        parsed = self._apply(args)
+        try:
+            self._seed_static_faces(args)
+            self._seed_source_faces(args)
+        except Exception:
+            # 캐시가 맞지 않으면 FaceFusion 이 평소처럼 직접 검출
+            traceback.print_exc()
+        if not job_manager.init_jobs(state_manager.get_item("jobs_path")):
+            return "Failed to initialize FaceFusion jobs"
+        if core.process_headless(parsed) != 0:
+            return "FaceFusion headless run failed"
+        return None
+
+    def run_batch(self, jobs: List[dict]) -> Dict[str, Optional[str]]:
+        """같은 타겟 영상 작업 여러 개를 한 번에 - 프레임 추출/얼굴 검출은 한 번, 소스별 스왑, 결과는 작업별 인코더로"""
+        try:
+            return self._run_batch(jobs)
+        except Exception:
+            # 설치된 FaceFusion 버전과 프레임 단위 API 가 맞지 않으면 한 작업씩 기존 방식으로
+            traceback.print_exc()
+            errors: Dict[str, Optional[str]] = {}
+            for job in jobs:
+                if job.get("stream_path"):
+                    Path(job["stream_path"]).unlink(missing_ok=True)
+                try:
+                    errors[job["job_id"]] = self.run(job["args"])
+                except Exception as e:
+                    traceback.print_exc()
+                    errors[job["job_id"]] = str(e)
+            return errors
+
+    def _run_batch(self, jobs: List[dict]) -> Dict[str, Optional[str]]:
+        from facefusion import state_manager, face_analyser, ffmpeg
+        from facefusion.processors.core import get_processors_modules
+        from facefusion.temp_helper import clear_temp_directory, create_temp_directory, get_temp_frame_paths
+        from facefusion.vision import read_image, read_static_images, restrict_video_fps, restrict_video_resolution, pack_resolution, unpack_resolution
+
+        # 작업끼리 다른 건 소스/출력 경로뿐 - 첫 작업 인자로 상태 설정
+        args = jobs[0]["args"]
+        self._apply(args)
+        try:
+            self._seed_static_faces(args)
+        except Exception:
+            traceback.print_exc()
+        target = get_arg_value(args, "--target-path")
+        temp_video_resolution = pack_resolution(restrict_video_resolution(target, unpack_resolution(state_manager.get_item("output_video_resolution"))))
+        temp_video_fps = restrict_video_fps(target, state_manager.get_item("output_video_fps"))
+        processors = get_processors_modules(state_manager.get_item("processors"))
+        errors: Dict[str, Optional[str]] = {}
+        outputs = []
+        for job in jobs:
+            source_path = get_arg_value(job["args"], "--source-paths")
+            source_frames = read_static_images([source_path])
+            source_face = face_analyser.get_average_face(self._source_faces(source_path, source_frames))
+            if source_face is None:
+                errors[job["job_id"]] = "No face detected in source image"
+                continue
+            outputs.append({
+                "job_id": job["job_id"],
+                "source_face": source_face,
+                "source_frames": source_frames,
+                "output_path": get_arg_value(job["args"], "--output-path"),
+                "stream_path": job.get("stream_path"),
+            })
+        if not outputs:
+            return errors
+
+        reference_faces = self._reference_faces()
+        clear_temp_directory(target)
+        create_temp_directory(target)
+        try:
+            print(f"[FACEFUSION.CORE] Extracting frames with a resolution of {temp_video_resolution} and {temp_video_fps} frames per second", file=sys.stderr, flush=True)
+            if not ffmpeg.extract_frames(target, temp_video_resolution, temp_video_fps, state_manager.get_item("trim_frame_start"), state_manager.get_item("trim_frame_end")):
+                raise RuntimeError(f"Frame extraction failed: {target}")
+            frame_paths = get_temp_frame_paths(target)
+
+            # 프레임은 한 번만 읽고 (얼굴 검출도 프레임 해시 캐시로 한 번) 소스 얼굴마다 스왑 + 인핸스,
+            # 결과 프레임은 디스크에 쓰지 않고 작업별 ffmpeg 인코더에 바로 넘김 (인코딩도 작업끼리 병렬)
+            print("[FACEFUSION.PROCESSORS.MODULES.FACE_SWAPPER.CORE] Processing", file=sys.stderr, flush=True)
+            started = time.time()
+            for index, frame_path in enumerate(frame_paths):
+                target_frame = read_image(frame_path)
+                for output in outputs:
+                    if output.get("error"):
+                        continue
+                    frame = target_frame.copy()
+                    for processor in processors:
+                        frame = processor.process_frame(frame_inputs(reference_faces, output["source_face"], output["source_frames"], frame))
+                    if "encoder" not in output:
+                        output["encoder"] = self._open_encoder(output, target, frame.shape[1], frame.shape[0], temp_video_fps)
+                    try:
+                        output["encoder"].stdin.write(frame.tobytes())
+                    except (BrokenPipeError, OSError):
+                        output["error"] = self._close_encoder(output) or "ffmpeg encoder exited"
+                fps = (index + 1) / max(time.time() - started, 1e-6)
+                print(f"\rProcessing: | {index + 1}/{len(frame_paths)} [00:00<00:00, {fps:.2f}frame/s]", end="", file=sys.stderr, flush=True)
+            print(file=sys.stderr, flush=True)
+
+            print(f"[FACEFUSION.CORE] Merging video with a resolution of {temp_video_resolution} and {temp_video_fps} frames per second", file=sys.stderr, flush=True)
+            for output in outputs:
+                if "encoder" not in output:
+                    output["error"] = "No frames extracted"
+                errors[output["job_id"]] = output.get("error") or self._close_encoder(output)
+                if errors[output["job_id"]] is None and output["encode_path"] != output["output_path"]:
+                    os.replace(output["encode_path"], output["output_path"])
+        finally:
+            for output in outputs:
+                if output.get("encoder") and output["encoder"].poll() is None:
+                    output["encoder"].kill()
+            clear_temp_directory(target)
+        return errors
+
+    def _reference_faces(self):
+        """FaceFusion core 와 같은 기준 - face_selector_mode 가 reference 일 때만 타겟의 기준 프레임에서 추출"""
+        from facefusion import core, state_manager
+        from facefusion.face_store import get_reference_faces
+
+        if "reference" not in state_manager.get_item("face_selector_mode"):
+            return None
+        core.conditional_append_reference_faces()
+        return get_reference_faces()
+
+    def _open_encoder(self, output: dict, target: str, width: int, height: int, fps: float) -> subprocess.Popen:
+        """raw BGR 프레임을 stdin 으로 받아 원본 오디오와 함께 인코딩 (FaceFusion 출력 설정 사용)
+
+        stream_path 가 있으면 fragmented MP4 로 써서 인코딩 중인 파일도 재생할 수 있게 한다.
+        """
+        from facefusion import state_manager
+
+        encoder = state_manager.get_item("output_video_encoder") or "libx264"
+        quality = state_manager.get_item("output_video_quality") or 80
+        quality_args = ["-crf", str(round(51 - quality * 0.51))]
+        if "nvenc" in encoder:
+            quality_args = ["-cq", str(round(51 - quality * 0.51))]
+        elif encoder in ("libx264", "libx265"):
+            quality_args += ["-preset", state_manager.get_item("output_video_preset") or "veryfast"]
+        output["encode_path"] = output.get("stream_path") or output["output_path"]
+        container_args = []
+        if output.get("stream_path"):
+            # 1초마다 키프레임 -> fragment 가 1초 단위로 파일에 붙음
+            container_args = ["-g", str(max(1, round(fps))), "-movflags", FRAGMENTED_MP4_FLAGS]
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-framerate", str(fps), "-i", "-",
+            "-i", target, "-map", "0:v:0", "-map", "1:a:0?",
+            "-c:v", encoder, *quality_args, "-pix_fmt", "yuv420p",
+            "-c:a", state_manager.get_item("output_audio_encoder") or "aac", "-shortest",
+            *container_args, "-f", "mp4", output["encode_path"],
+        ]
+        # stderr 는 임시 파일로 - 파이프면 ffmpeg 가 로그로 막혀 stdin 쓰기까지 멈출 수 있음
+        output["encoder_log"] = tempfile.TemporaryFile()
+        return subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=output["encoder_log"])
+
+    def _close_encoder(self, output: dict) -> Optional[str]:
+        encoder = output["encoder"]
+        try:
+            encoder.stdin.close()
+        except OSError:
+            pass
+        encoder.wait()
+        log = output["encoder_log"]
+        log.seek(0)
+        message = log.read().decode("utf-8", errors="ignore").strip()
+        log.close()
+        if encoder.returncode != 0:
+            return message[-500:] or "ffmpeg merge failed"
+        return None
+
+
+def create_engine(options) -> object:
+    if options.engine == "stub":
+        return StubEngine(options.stub_warmup_delay, options.stub_job_delay)
+    return FaceFusionEngine(Path(options.facefusion_dir), options.processors, TargetAnalysisCache(Path(options.analysis_dir)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm FaceFusion worker")
+    parser.add_argument("--engine", choices=["facefusion", "stub"], default=os.environ.get("FACEFUSION_WORKER_ENGINE", "facefusion"))
+    parser.add_argument("--facefusion-dir", default=str(DEFAULT_FACEFUSION_DIR))
+    parser.add_argument("--analysis-dir", default=str(DEFAULT_ANALYSIS_DIR))
+    parser.add_argument("--processors", nargs="+", default=["face_swapper", "face_enhancer"])
+    parser.add_argument("--stub-warmup-delay", type=float, default=float(os.environ.get("FACEFUSION_STUB_WARMUP_DELAY", "0")))
+    parser.add_argument("--stub-job-delay", type=float, default=float(os.environ.get("FACEFUSION_STUB_JOB_DELAY", "0")))
+    options = parser.parse_args()
+
+    # FaceFusion 의 print/로그가 프로토콜 채널(stdout)을 오염시키지 않도록 분리하고,
+    # stdout/stderr 를 파이프로 받아 진행률을 파싱한 뒤 원래 stderr 로 그대로 흘려보냄
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    real_stderr = os.dup(sys.stderr.fileno())
+    read_fd, write_fd = os.pipe()
+    os.dup2(write_fd, sys.stdout.fileno())
+    os.dup2(write_fd, sys.stderr.fileno())
+    protocol_lock = threading.Lock()
+    current = {"job_id": None, "parser": None}
+    drained = threading.Event()
+
+    def emit(**event):
+        with protocol_lock:
+            protocol.write(json.dumps(event) + "\n")
+            protocol.flush()
+
+    def pump_output():
+        last_emit, last_stage = 0.0, None
+        carry = b""
+        with os.fdopen(read_fd, "rb", buffering=0) as reader:
+            while True:
+                chunk = reader.read(65536)
+                if not chunk:
+                    break
+                chunk, found, carry = split_drain_marker(carry + chunk)
+                if chunk:
+                    os.write(real_stderr, chunk)
+                job_id, parser = current["job_id"], current["parser"]
+                changed = parser is not None and chunk and parser.feed(chunk.decode("utf-8", errors="ignore"))
+                if found:
+                    drained.set()
+                if not changed:
+                    continue
+                # 진행바는 초당 수십 번 갱신되므로 단계가 바뀔 때 외에는 0.25초 간격으로만 전송
+                now = time.time()
+                if parser.stage != last_stage or now - last_emit >= 0.25:
+                    last_emit, last_stage = now, parser.stage
+                    emit(event="progress", job_id=job_id, **parser.snapshot())
+
+    def finish_progress(succeeded: bool):
+        """남은 출력을 pump_output 이 다 읽을 때까지 기다린 뒤 마지막 단계를 닫고 최종 진행 상태 전송
+
+        done 이벤트 뒤의 진행 이벤트는 API 가 읽지 않으므로 반드시 done 보다 먼저
+        """
+        sys.stdout.flush()
+        sys.stderr.flush()
+        drained.clear()
+        os.write(sys.stdout.fileno(), DRAIN_MARKER)
+        drained.wait(DRAIN_TIMEOUT)
+        job_id, parser = current["job_id"], current["parser"]
+        current["job_id"], current["parser"] = None, None
+        parser.finish(succeeded)
+        emit(event="progress", job_id=job_id, final=True, **parser.snapshot())
+
+    threading.Thread(target=pump_output, daemon=True).start()
+
+    engine = create_engine(options)
+    started = time.time()
+    try:
+        engine.warmup()
+    except Exception as e:
+        traceback.print_exc()
+        emit(event="failed", error=f"Warmup failed: {e}")
+        return 1
+    emit(event="ready", engine=engine.name, pid=os.getpid(), warmup_time=time.time() - started)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            emit(event="error", error="Invalid message")
+            continue
+
+        if message.get("type") == "shutdown":
+            break
+
+        if message.get("type") == "prepare":
+            try:
+                result = engine.prepare(Path(message["target_path"]), message.get("args", []))
+                emit(event="prepared", target_path=message["target_path"], error=None, **result)
+            except Exception as e:
+                traceback.print_exc()
+                emit(event="prepared", target_path=message["target_path"], prepared=False, error=str(e))
+            continue
+
+        if message.get("type") == "run_batch":
+            batch_id = message.get("batch_id")
+            jobs = message.get("jobs", [])
+            job_started = time.time()
+            current["job_id"], current["parser"] = batch_id, ProgressParser()
+            try:
+                errors = engine.run_batch(jobs)
+            except Exception as e:
+                traceback.print_exc()
+                errors = {job["job_id"]: str(e) for job in jobs}
+            finish_progress(all(errors.get(job["job_id"]) is None for job in jobs))
+            emit(
+                event="batch_done",
+                batch_id=batch_id,
+                results=[
+                    {"job_id": job["job_id"], "returncode": 0 if errors.get(job["job_id"]) is None else 1,
+                     "error": errors.get(job["job_id"])}
+                    for job in jobs
+                ],
+                processing_time=time.time() - job_started,
+            )
+            continue
+
+        job_id = message.get("job_id")
+        job_started = time.time()
+        current["job_id"], current["parser"] = job_id, ProgressParser()
+        try:
+            error = engine.run(message.get("args", []), message.get("stream_path"))
+        except Exception as e:
+            traceback.print_exc()
+            error = str(e)
+        finish_progress(error is None)
+        emit(
+            event="done",
+            job_id=job_id,
+            returncode=0 if error is None else 1,
+            error=error,
+            processing_time=time.time() - job_started,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""결과 파일 서빙 헬퍼 - 캐시 검증(ETag), base64 스트리밍 인코딩, 논블로킹 파일 전송
+
+async 핸들러 안에서 open()/read()/stat() 을 직접 부르면 느린 디스크 읽기 하나가
+이벤트 루프 전체(상태 폴링, 업로드)를 멈춘다. 파일 접근은 전부 스레드 풀이나
+서버의 sendfile 로 넘긴다.
+"""
+
+import os
+import json
+import uuid
+import base64
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple, Union
+
+import anyio
+from starlette.responses import Response
+
+# 3의 배수여야 청크별 base64 결과를 이어 붙여도 전체 인코딩과 같음 (중간 패딩 없음)
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+
+FILE_CHUNK_SIZE = 1024 * 1024  # 스레드 풀 pread 한 번에 읽는 크기
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+MAX_RANGES = 16  # 이보다 잘게 쪼갠 Range 요청은 무시하고 전체 전송 (과도한 multipart 방지)
+GROWING_FILE_POLL_INTERVAL = 0.5  # 작성 중인 파일 끝에 도달했을 때 다시 확인하는 간격 (초)
+
+
+def file_etag(stat: os.stat_result, variant: str = "") -> str:
+    """파일 크기 + 수정 시각 기반 ETag (표현 형식이 다르면 variant 로 구분)"""
+    prefix = f"{variant}-" if variant else ""
+    return f'"{prefix}{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def last_modified(stat: os.stat_result) -> str:
+    return formatdate(stat.st_mtime, usegmt=True)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag 와 맞는지 (약한 비교)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def base64_length(size: int) -> int:
+    return 4 * ((size + 2) // 3)
+
+
+def base64_json_envelope(fields: dict) -> tuple:
+    """{"...": ..., "data": "<base64>"} 의 앞/뒤 조각 - data 는 스트리밍으로 채움"""
+    head = json.dumps(fields)[:-1] + ', "data": "'
+    return head.encode(), b'"}'
+
+
+def iter_base64_json(path: str, fields: dict, chunk_size: int = BASE64_CHUNK_SIZE) -> Iterator[bytes]:
+    """파일을 고정 크기 청크로 읽으며 base64 로 인코딩 - 메모리 사용량이 파일 크기와 무관"""
+    head, tail = base64_json_envelope(fields)
+    yield head
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+    yield tail
+
+
+def stat_or_none(path) -> Optional[os.stat_result]:
+    """파일이 없거나 그 사이 지워졌으면 None (exists() 후 stat() 사이의 경쟁 없음)"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+class FileSendResponse(Response):
+    """파일 구간(들) 전송 - 이벤트 루프에서 디스크를 읽지 않음
+
+    parts 는 (offset, length) 파일 구간 또는 그대로 보낼 bytes (multipart 경계 등) 의 목록.
+    서버가 ASGI zerocopysend 확장을 지원하면 파일 구간은 커널 sendfile 로 바로 소켓에 쓰고,
+    아니면 os.pread 를 스레드 풀에서 실행해 청크 단위로 보낸다.
+    클라이언트가 끊으면 남은 구간은 읽지 않는다.
+    """
+
+    chunk_size = FILE_CHUNK_SIZE
+
+    def __init__(self, path, parts: List[Union[bytes, Tuple[int, int]]], status_code: int = 200,
+                 headers: Optional[dict] = None, media_type: Optional[str] = None):
+        self.path = path
+        self.parts = parts
+        self.length = sum(len(part) if isinstance(part, bytes) else part[1] for part in parts)
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.length)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        zerocopy = ZEROCOPY_EXTENSION in (scope.get("extensions") or {})
+
+        async with anyio.create_task_group() as task_group:
+            async def send_then_stop():
+                await self._send_parts(send, zerocopy)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(send_then_stop)
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            task_group.cancel_scope.cancel()
+
+    async def _send_parts(self, send, zerocopy: bool):
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            for part in self.parts:
+                if isinstance(part, bytes):
+                    await send({"type": "http.response.body", "body": part, "more_body": True})
+                elif zerocopy:
+                    with os.fdopen(fd, "rb", closefd=False) as file:
+                        await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": part[0],
+                                    "count": part[1], "more_body": True})
+                elif not await self._send_range(send, fd, *part):
+                    break  # 파일이 전송 중에 줄어듦 - 받은 만큼만 보내고 끝
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+    async def _send_range(self, send, fd: int, position: int, remaining: int) -> bool:
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), position)
+            if not chunk:
+                return False
+            position += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        return True
+
+
+class GrowingFileResponse(FileSendResponse):
+    """작성 중인 파일을 처음부터 따라가며 전송 (tail -f) - 길이를 모르므로 chunked, Range 없음
+
+    파일 끝에 도달하면 잠시 기다렸다 다시 읽고, is_finished() 가 True 가 된 뒤 끝까지 보내면 종료.
+    작성이 끝나 파일 이름이 바뀌거나 지워져도 열어 둔 fd 로 끝까지 읽는다.
+    """
+
+    poll_interval = GROWING_FILE_POLL_INTERVAL
+
+    def __init__(self, path, is_finished: Callable[[], Awaitable[bool]],
+                 headers: Optional[dict] = None, media_type: Optional[str] = None):
+        self.path = path
+        self.is_finished = is_finished
+        self.length = None
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def _send_parts(self, send, zerocopy: bool):
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            position = 0
+            while True:
+                # 끝났는지 먼저 확인하고 읽어야 마지막에 붙은 데이터를 놓치지 않음
+                finished = await self.is_finished()
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, self.chunk_size, position)
+                if chunk:
+                    position += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    continue
+                if finished:
+                    break
+                await anyio.sleep(self.poll_interval)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Range 헤더 -> 정렬/병합된 (start, end) 목록 (RFC 7233)
+
+    None: 문법이 틀렸거나 구간이 너무 많음 - 헤더를 무시하고 전체 전송
+    []: 문법은 맞지만 만족할 수 있는 구간이 없음 - 416
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        first, dash, last = (value.strip() for value in item.partition("-"))
+        if not dash:
+            return None
+        if not first:
+            # 접미 구간: bytes=-500 은 마지막 500 바이트
+            if not last.isdigit():
+                return None
+            suffix = int(last)
+            if suffix > 0 and size > 0:
+                ranges.append((max(0, size - suffix), size - 1))
+            continue
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def serve_file(request, path, stat: os.stat_result, media_type: str, headers: Optional[dict] = None) -> Response:
+    """모든 결과 파일 엔드포인트가 공유하는 응답 생성 - 조건부 요청 + Range (RFC 7232/7233)
+
+    - If-Match / If-Unmodified-Since 불일치: 412
+    - If-None-Match / If-Modified-Since 일치: 304
+    - Range (If-Range 가 현재 버전과 맞을 때만): 단일 구간 206, 여러 구간 multipart/byteranges
+    - 만족할 수 없는 구간: 416 + Content-Range: bytes */크기
+    """
+    size = stat.st_size
+    etag = file_etag(stat)
+    modified = last_modified(stat)
+    headers = {**(headers or {}), "ETag": etag, "Last-Modified": modified, "Accept-Ranges": "bytes"}
+    request_headers = request.headers
+
+    if_match = request_headers.get("if-match")
+    unmodified_since = parse_http_date(request_headers.get("if-unmodified-since"))
+    if (if_match and not etag_matches(if_match, etag)) or (
+        not if_match and unmodified_since is not None and int(stat.st_mtime) > unmodified_since
+    ):
+        return Response(status_code=412, headers=headers)
+
+    if_none_match = request_headers.get("if-none-match")
+    modified_since = parse_http_date(request_headers.get("if-modified-since"))
+    if etag_matches(if_none_match, etag) or (
+        not if_none_match and modified_since is not None and int(stat.st_mtime) <= modified_since
+    ):
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request_headers.get("range")
+    if range_header and request.method == "GET":
+        # If-Range 는 강한 비교 - 파일이 바뀌었으면 구간 대신 전체를 보냄
+        if_range = request_headers.get("if-range")
+        if not if_range or if_range.strip() in (etag, modified):
+            ranges = parse_range(range_header, size)
+
+    if ranges is None:
+        return FileSendResponse(path, [(0, size)], headers=headers, media_type=media_type)
+    if not ranges:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return FileSendResponse(
+            path, [(start, end - start + 1)], status_code=206, media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+        )
+
+    boundary = uuid.uuid4().hex
+    parts: List[Union[bytes, Tuple[int, int]]] = []
+    for index, (start, end) in enumerate(ranges):
+        delimiter = f"--{boundary}" if index == 0 else f"\r\n--{boundary}"
+        parts.append((
+            f"{delimiter}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode())
+        parts.append((start, end - start + 1))
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return FileSendResponse(
+        path, parts, status_code=206, headers=headers,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+    )
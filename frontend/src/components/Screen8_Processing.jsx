@@ -3,7 +3,7 @@ import { useNavigate } from "react-router-dom";
 import styled from "styled-components";
 import CommonHeader from "./CommonHeader";
 import { useDeepfake } from "../context/DeepfakeContext";
-import { getResultBase64Fast, getResultStreamingFast, getJobStatus } from "../services/api";
+import { getResultBase64Fast, getResultStreamingFast, getJobStatus, subscribeJobStatus } from "../services/api";
 import { playNavigationSound } from '../utils/soundUtils';
 
 const Container = styled.div`
@@ -343,6 +343,9 @@ export default function Screen8_Processing() {
     // ⚡ 초고속 적응형 결과 체크 - URL 우선 방식
     let isChecking = false;
     let lastStatus = null;
+    // 📡 푸시 연결이 살아 있으면 주기적 폴링 대신 상태 이벤트로만 체크
+    let pushConnected = false;
+    let pushedFinalStatus = false;
     
     const checkResult = async () => {
       if (isChecking) return; // 중복 체크 방지
@@ -488,14 +491,35 @@ export default function Screen8_Processing() {
       } finally {
         isChecking = false;
         
-        // 적응형 다음 체크 스케줄링
+        // 적응형 다음 체크 스케줄링 (푸시 연결 중이면 생략)
         const nextInterval = getAdaptiveInterval(elapsed, lastStatus);
-        if (nextInterval > 0 && !processedJobs.has(jobId)) {
+        if (nextInterval > 0 && !processedJobs.has(jobId) && (!pushConnected || pushedFinalStatus)) {
           setTimeout(checkResult, nextInterval);
         }
       }
     };
 
+    // 📡 상태 푸시 구독 - 실제 진행률 반영, 완료/실패 시 즉시 결과 체크
+    const unsubscribeStatus = subscribeJobStatus(jobId, {
+      onStatus: (status) => {
+        pushConnected = true;
+        if (status.status === 'processing' && typeof status.progress === 'number') {
+          setProgress(prev => Math.max(prev, status.progress));
+        }
+        if (status.status === 'completed' || status.status === 'failed') {
+          pushedFinalStatus = true;
+          checkResult();
+        }
+      },
+      onError: () => {
+        // 푸시가 끊기면 폴링으로 복귀
+        if (pushConnected) {
+          pushConnected = false;
+          setTimeout(checkResult, 1000);
+        }
+      }
+    });
+
     // 첫 체크는 5초 후 시작 (백엔드 처리 시간 고려)
     const initialTimeout = setTimeout(checkResult, 5000);
 
@@ -503,6 +527,7 @@ export default function Screen8_Processing() {
       console.log("🧹 Cleaning up Screen8_Processing...");
       clearInterval(progressInterval);
       clearTimeout(initialTimeout);
+      if (unsubscribeStatus) unsubscribeStatus();
       // 카운트다운 interval도 정리
       if (window.processingCountdownInterval) {
         clearInterval(window.processingCountdownInterval);
@@ -59,10 +59,15 @@ export const startFaceFusion = async (capturedImage, videoId) => {
       throw new Error('유효하지 않은 비디오 ID입니다');
     }
 
-    // base64 이미지를 그대로 전송 (백엔드에서 처리)
-    
+    // 📦 data URL 을 바이너리 JPEG 로 변환해서 전송 (base64 대비 33% 작고 백엔드 디코딩 없음)
     const formData = new FormData();
-    formData.append('face_image_base64', capturedImage); // base64 그대로 전송
+    try {
+      const imageBlob = await (await fetch(capturedImage)).blob();
+      formData.append('face_image', imageBlob, 'face.jpg');
+    } catch (conversionError) {
+      console.warn('⚠️ Blob conversion failed, sending base64 instead:', conversionError);
+      formData.append('face_image_base64', capturedImage); // base64 그대로 전송 (호환용)
+    }
     formData.append('video_id', videoId); // 문자열 ID 전송 (male_1, female_2 등)
     
     console.log('📡 Sending request to API...', {
@@ -132,6 +137,32 @@ export const getJobStatus = async (jobId) => {
   }
 };
 
+// 📡 작업 상태 푸시 구독 (SSE) - 폴링 없이 상태 변경/진행률을 받음
+// 반환값: 구독 해제 함수. EventSource 를 지원하지 않으면 null 반환 (폴링 사용)
+export const subscribeJobStatus = (jobId, { onStatus, onError } = {}) => {
+  if (typeof window === 'undefined' || typeof window.EventSource === 'undefined') {
+    return null;
+  }
+  
+  const source = new EventSource(`${API_BASE_URL}/status/${jobId}/events`);
+  
+  source.addEventListener('status', (event) => {
+    const status = JSON.parse(event.data);
+    if (onStatus) onStatus(status);
+    // 종료 상태면 자동 재연결되지 않도록 직접 닫기
+    if (['completed', 'failed', 'cancelled'].includes(status.status)) {
+      source.close();
+    }
+  });
+  
+  source.onerror = (error) => {
+    console.warn('📡 Status stream error (browser will retry):', error);
+    if (onError) onError(error);
+  };
+  
+  return () => source.close();
+};
+
 // ⚡ 초고속 결과 체크 - 스트리밍 방식 (새로운 최적화!)
 export const getResultStreamingFast = async (jobId) => {
   const checkTime = Date.now();
@@ -23,6 +23,7 @@ export class ParallelVideoDownloader {
       
       const contentLength = headResponse.headers.get('content-length');
       const acceptRanges = headResponse.headers.get('accept-ranges');
+      const etag = headResponse.headers.get('etag');
       
       console.log('🔍 HEAD response headers:', {
         'content-length': contentLength,
@@ -67,6 +68,8 @@ export class ParallelVideoDownloader {
         const response = await fetch(this.url, {
           headers: {
             'Range': `bytes=${chunk.start}-${chunk.end}`,
+            // 파일이 바뀌었으면 서버가 구간 대신 전체(200)를 보내므로 섞인 청크를 막을 수 있음
+            ...(etag ? { 'If-Range': etag } : {}),
             'Accept': 'video/mp4,video/*,*/*'
           },
           signal: this.signal
@@ -76,6 +79,10 @@ export class ParallelVideoDownloader {
           throw new Error(`Chunk ${chunk.index} failed: ${response.status}`);
         }
         
+        if (response.status !== 206) {
+          throw new Error(`Chunk ${chunk.index} got full response (${response.status}) - file changed`);
+        }
+        
         const arrayBuffer = await response.arrayBuffer();
         results[chunk.index] = new Uint8Array(arrayBuffer);
         
@@ -0,0 +1,133 @@
+"""GPU 장치 찾기 + 장치별 동시 실행 슬롯
+
+작업마다 CUDA_VISIBLE_DEVICES 를 하나로 고정해 실행하고, 어느 장치에서 몇 개가 돌고 있는지
+여기서 관리한다. 장치 목록과 시계를 주입할 수 있어 GPU 없이도 배정 로직을 확인할 수 있다.
+
+    pool = DevicePool(["0", "1"], per_device=2)
+    device = pool.acquire()  # 가장 한가한 장치 (꽉 찼으면 None)
+    ...
+    pool.release(device)
+"""
+
+import os
+import re
+import time
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional
+
+NVIDIA_DEVICE_PATTERN = re.compile(r"^nvidia(\d+)$")
+NVIDIA_SMI_QUERY = "index,uuid,utilization.gpu,memory.used,memory.total"
+
+
+def discover_devices(env: Optional[Mapping[str, str]] = None, dev_dir: Path = Path("/dev")) -> List[str]:
+    """사용할 GPU 목록 - FACEFUSION_GPUS > CUDA_VISIBLE_DEVICES > /dev/nvidiaN 순서로 확인"""
+    env = os.environ if env is None else env
+    configured = env.get("FACEFUSION_GPUS") or env.get("CUDA_VISIBLE_DEVICES")
+    if configured:
+        return [device.strip() for device in configured.split(",") if device.strip()]
+    try:
+        indexes = [NVIDIA_DEVICE_PATTERN.match(path.name) for path in dev_dir.iterdir()]
+    except OSError:
+        return []
+    return [str(index) for index in sorted(int(match.group(1)) for match in indexes if match)]
+
+
+def query_nvidia_smi(runner: Callable = subprocess.run) -> Dict[str, dict]:
+    """장치 번호/UUID -> 실제 사용률, 메모리 (nvidia-smi 가 없거나 실패하면 빈 dict)"""
+    if runner is subprocess.run and not shutil.which("nvidia-smi"):
+        return {}
+    try:
+        completed = runner(
+            ["nvidia-smi", f"--query-gpu={NVIDIA_SMI_QUERY}", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    if completed.returncode != 0:
+        return {}
+    metrics: Dict[str, dict] = {}
+    for line in completed.stdout.splitlines():
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) != 5:
+            continue
+        index, uuid, utilization, memory_used, memory_total = fields
+        try:
+            entry = {
+                "gpu_utilization": int(utilization),
+                "memory_used_mb": int(memory_used),
+                "memory_total_mb": int(memory_total),
+            }
+        except ValueError:
+            continue
+        metrics[index] = metrics[uuid] = entry
+    return metrics
+
+
+class DevicePool:
+    """장치별 동시 실행 수 제한 - 빈 슬롯이 있는 장치 중 가장 한가한 곳에 배정"""
+
+    def __init__(self, devices: List[str], per_device: int = 1, clock: Callable[[], float] = time.monotonic):
+        if not devices:
+            raise ValueError("DevicePool needs at least one device")
+        self.per_device = max(1, per_device)
+        self.clock = clock
+        self.created = clock()
+        self.devices: Dict[str, dict] = {
+            device: {"active": 0, "completed": 0, "busy_seconds": 0.0, "busy_since": None}
+            for device in devices
+        }
+
+    @property
+    def capacity(self) -> int:
+        return self.per_device * len(self.devices)
+
+    @property
+    def active(self) -> int:
+        return sum(state["active"] for state in self.devices.values())
+
+    def _busy_seconds(self, state: dict, now: float) -> float:
+        """슬롯 하나라도 쓰고 있던 누적 시간"""
+        if state["busy_since"] is None:
+            return state["busy_seconds"]
+        return state["busy_seconds"] + now - state["busy_since"]
+
+    def acquire(self) -> Optional[str]:
+        """슬롯 하나 배정 - 실행 중인 작업이 적은 장치, 같으면 덜 쓴 장치 (모두 꽉 찼으면 None)"""
+        now = self.clock()
+        free = [device for device, state in self.devices.items() if state["active"] < self.per_device]
+        if not free:
+            return None
+        device = min(free, key=lambda d: (self.devices[d]["active"], self._busy_seconds(self.devices[d], now)))
+        state = self.devices[device]
+        if state["active"] == 0:
+            state["busy_since"] = now
+        state["active"] += 1
+        return device
+
+    def release(self, device: str):
+        state = self.devices[device]
+        state["active"] = max(0, state["active"] - 1)
+        state["completed"] += 1
+        if state["active"] == 0 and state["busy_since"] is not None:
+            state["busy_seconds"] += self.clock() - state["busy_since"]
+            state["busy_since"] = None
+
+    def stats(self, gpu_metrics: Optional[Dict[str, dict]] = None) -> List[dict]:
+        """장치별 실행 수/누적 처리 수/점유율 (utilization: 생성 후 작업이 돌고 있던 시간 비율)"""
+        now = self.clock()
+        elapsed = max(now - self.created, 1e-9)
+        return [
+            {
+                "device": device,
+                "active": state["active"],
+                "capacity": self.per_device,
+                "free": self.per_device - state["active"],
+                "completed": state["completed"],
+                "busy_seconds": round(self._busy_seconds(state, now), 2),
+                "utilization": round(self._busy_seconds(state, now) / elapsed, 3),
+                **((gpu_metrics or {}).get(device) or {}),
+            }
+            for device, state in self.devices.items()
+        ]
@@ -0,0 +1,39 @@
+"""작업 상태 푸시 채널 - 상태가 바뀔 때마다 구독자에게 전달
+
+작업마다 구독자 큐 목록을 두고, publish 한 번으로 모든 구독자에게 같은 스냅샷을 넣는다.
+느린 구독자는 오래된 이벤트를 버리고 최신 상태만 받는다.
+"""
+
+import asyncio
+from typing import Dict, Set
+
+TERMINAL_STATES = {"completed", "failed", "cancelled"}
+
+
+class JobEventHub:
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(job_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[job_id]
+
+    def publish(self, job_id: str, event: dict):
+        for queue in self.subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()  # 최신 상태가 더 중요하므로 가장 오래된 이벤트 버림
+            queue.put_nowait(event)
+
+    def subscriber_count(self, job_id: str = None) -> int:
+        if job_id is not None:
+            return len(self.subscribers.get(job_id, ()))
+        return sum(len(queues) for queues in self.subscribers.values())
@@ -0,0 +1,66 @@
+"""작업 보조 인덱스 - 상태별, 생성 시각 순서 (POST /status/batch, GET /jobs)
+
+job_status 는 ID 로만 찾을 수 있어 "처리 중인 작업 목록" 같은 조회가 불가능하다.
+상태가 바뀔 때마다(set_job_status) 여기도 함께 갱신하므로 조회는 메모리만 본다.
+
+    index.update(job_id, "processing")
+    index.page(["queued", "processing"], since=..., after=None, limit=50)  # [(created_at, job_id), ...]
+"""
+
+import time
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Entry = Tuple[float, str]  # (생성 시각, job_id) - 같은 시각이면 ID 순
+
+
+class JobIndex:
+    def __init__(self):
+        self.by_state: Dict[str, List[Entry]] = {}  # 상태 -> 생성 시각 순 정렬 목록
+        self.jobs: Dict[str, Tuple[str, float]] = {}  # job_id -> (상태, 생성 시각)
+
+    def update(self, job_id: str, state: str, created_at: Optional[float] = None):
+        """처음 보는 작업이면 추가 (created_at 없으면 지금), 상태가 바뀌었으면 목록 이동"""
+        current = self.jobs.get(job_id)
+        if current is not None:
+            if current[0] == state:
+                return
+            self._remove(job_id, *current)
+            created_at = current[1]
+        elif created_at is None:
+            created_at = time.time()
+        self.jobs[job_id] = (state, created_at)
+        insort(self.by_state.setdefault(state, []), (created_at, job_id))
+
+    def remove(self, job_id: str):
+        current = self.jobs.pop(job_id, None)
+        if current is not None:
+            self._remove(job_id, *current)
+
+    def _remove(self, job_id: str, state: str, created_at: float):
+        entries = self.by_state[state]
+        index = bisect_left(entries, (created_at, job_id))
+        if index < len(entries) and entries[index] == (created_at, job_id):
+            del entries[index]
+
+    def created_at(self, job_id: str) -> Optional[float]:
+        current = self.jobs.get(job_id)
+        return current[1] if current else None
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(entries) for state, entries in self.by_state.items() if entries}
+
+    def page(self, states: Optional[Iterable[str]] = None, since: Optional[float] = None,
+             after: Optional[Entry] = None, limit: int = 50) -> List[Entry]:
+        """생성 시각 오름차순 - since 이후(포함), after(이전 페이지 마지막 항목) 다음부터 limit 개"""
+        states = list(states) if states else list(self.by_state)
+        start = max(filter(None, [(since, "") if since is not None else None, after]), default=None)
+        streams = []
+        for state in states:
+            entries = self.by_state.get(state, [])
+            offset = 0
+            if start is not None:
+                offset = bisect_right(entries, start) if start == after else bisect_left(entries, start)
+            streams.append(entries[offset:offset + limit])
+        return list(heapq.merge(*streams))[:limit]
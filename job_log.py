@@ -0,0 +1,34 @@
+"""작업 로그 - job_id 를 키로 한 JSON 한 줄 로그 (FACEFUSION_LOG_FORMAT=text 면 기존 형식)
+
+    log("✅ SUCCESS", job_id=job_id, file_size=1234)
+    {"ts": "2025-01-01T12:00:00.123Z", "level": "info", "job_id": "...", "msg": "✅ SUCCESS", "file_size": 1234}
+    [job_id] ✅ SUCCESS
+"""
+
+import os
+import sys
+import time
+import orjson
+from typing import Optional
+
+LOG_FORMAT = os.environ.get('FACEFUSION_LOG_FORMAT', 'json')  # json | text
+
+
+def timestamp(now: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f".{int(now % 1 * 1000):03d}Z"
+
+
+def log(message: str, job_id: Optional[str] = None, level: str = "info", **fields):
+    """stdout 으로 한 줄 - fields 는 JSON 에서는 최상위 키, text 에서는 접두어(batch_id/worker)만"""
+    if LOG_FORMAT == "text":
+        prefix = job_id or fields.get("batch_id") or (f"worker-{fields['worker']}" if "worker" in fields else None)
+        line = f"[{prefix}] {message}" if prefix else message
+    else:
+        record = {"ts": timestamp(time.time()), "level": level}
+        if job_id:
+            record["job_id"] = job_id
+        record["msg"] = message
+        record.update(fields)
+        line = orjson.dumps(record, default=str).decode()
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
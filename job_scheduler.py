@@ -0,0 +1,234 @@
+"""작업 스케줄러 - 동시 실행 수 제한 + 우선순위 대기열 + 입장 제어
+
+GPU 하나에서 FaceFusion 이 동시에 너무 많이 돌면 서로 자원을 뺏어 전체 처리량이 무너진다.
+최대 동시 실행 수만큼만 돌리고 나머지는 대기열에 세우며, 대기열이 가득 차면 QueueFullError.
+
+batch_window 가 있으면 같은 batch_key(타겟 영상)의 작업을 잠깐 모았다가
+batch_processor([(job_id, payload), ...]) 한 번으로 실행한다 (슬롯 하나 사용).
+
+devices(DevicePool)가 있으면 실행할 때마다 가장 한가한 GPU 슬롯을 배정하고
+processor/batch_processor 에 device= 로 넘긴다. 대기열은 모든 장치가 공유하므로
+먼저 비는 장치가 다음 작업을 가져간다.
+
+submit(cost=...) 로 작업량(프레임 수 등)을 주면 끝난 작업들로 단위 작업량당 시간을 익혀
+대기 시간을 작업별로 예측한다 (cost 가 없으면 평균 작업 시간).
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from gpu_devices import DevicePool
+from job_log import log
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """processor(job_id, **payload) 를 max_concurrent 개까지만 동시에 실행"""
+
+    def __init__(self, processor: Callable[..., Awaitable[Any]], max_concurrent: int = 1,
+                 max_queue: int = 20, default_duration: float = 60.0,
+                 batch_processor: Optional[Callable[[List[Tuple[str, dict]]], Awaitable[Any]]] = None,
+                 batch_window: float = 0.0, max_batch: int = 4, devices: Optional[DevicePool] = None):
+        self.processor = processor
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.avg_duration = default_duration
+        self.seconds_per_cost: Optional[float] = None  # 단위 작업량당 처리 시간 (이동 평균)
+        self.costs: Dict[str, float] = {}  # 대기/실행 중인 작업의 작업량
+        self.slot_costs: Dict[str, float] = {}  # 실행 단위 -> 작업량
+        self.batch_processor = batch_processor
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+        self.devices = devices
+        self.queue: List[tuple] = []  # (priority, seq, job_id) - priority 가 작을수록 먼저
+        self.payloads: Dict[str, dict] = {}
+        self.batch_keys: Dict[str, str] = {}
+        self.submitted: Dict[str, float] = {}
+        self.running: Dict[str, float] = {}  # job_id -> 시작 시각
+        self.slots: Dict[str, float] = {}  # 실행 단위(단일 작업 또는 배치) -> 시작 시각
+        self.slot_devices: Dict[str, str] = {}  # 실행 단위 -> 배정된 장치
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.counter = itertools.count()
+        self.wakeup: Optional[asyncio.TimerHandle] = None
+        self.completed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_jobs = 0
+
+    @property
+    def batching(self) -> bool:
+        return self.batch_processor is not None and self.batch_window > 0 and self.max_batch > 1
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.queue)
+
+    def check_admission(self):
+        """대기열이 가득 찼으면 QueueFullError - 이미지 저장 전에 미리 확인"""
+        if len(self.queue) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(retry_after=self._estimate_wait([entry[2] for entry in self.queue]))
+
+    def submit(self, job_id: str, payload: dict, priority: int = 0, batch_key: Optional[str] = None,
+               cost: Optional[float] = None) -> int:
+        """작업 등록 후 대기 순번(1부터, 0이면 바로 실행) 반환 (cost: 작업량 - 영상 프레임 수 등)"""
+        self.check_admission()
+        heapq.heappush(self.queue, (priority, next(self.counter), job_id))
+        self.payloads[job_id] = payload
+        self.submitted[job_id] = time.time()
+        if cost:
+            self.costs[job_id] = cost
+        if batch_key is not None:
+            self.batch_keys[job_id] = batch_key
+        self._dispatch()
+        return self.position(job_id) or 0
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중인 작업 제거 (실행 중인 작업은 건드리지 않음)"""
+        for entry in self.queue:
+            if entry[2] == job_id:
+                self.queue.remove(entry)
+                heapq.heapify(self.queue)
+                self._forget(job_id)
+                self.costs.pop(job_id, None)
+                return True
+        return False
+
+    def position(self, job_id: str) -> Optional[int]:
+        for index, entry in enumerate(sorted(self.queue)):
+            if entry[2] == job_id:
+                return index + 1
+        return None
+
+    def estimated_wait(self, job_id: str) -> Optional[float]:
+        position = self.position(job_id)
+        if position is None:
+            return 0.0 if job_id in self.running else None
+        return self._estimate_wait([entry[2] for entry in sorted(self.queue)][:position - 1])
+
+    def _expected_duration(self, cost: Optional[float]) -> float:
+        if cost and self.seconds_per_cost:
+            return cost * self.seconds_per_cost
+        return self.avg_duration
+
+    def _estimate_wait(self, ahead: List[str]) -> float:
+        """ahead 작업들이 앞에 기다릴 때 실행 시작까지 걸리는 예상 시간(초)"""
+        now = time.time()
+        slots = [
+            max(self._expected_duration(self.slot_costs.get(label)) - (now - started), 0.0)
+            for label, started in self.slots.items()
+        ]
+        slots.extend([0.0] * (self.max_concurrent - len(slots)))
+        heapq.heapify(slots)
+        for job_id in ahead:
+            heapq.heappush(slots, heapq.heappop(slots) + self._expected_duration(self.costs.get(job_id)))
+        return slots[0]
+
+    def _forget(self, job_id: str) -> dict:
+        """대기열에서 빠질 때 - 작업량은 실행이 끝날 때까지 유지 (취소면 함께 지움)"""
+        self.batch_keys.pop(job_id, None)
+        self.submitted.pop(job_id, None)
+        return self.payloads.pop(job_id, None)
+
+    def _next_group(self) -> Optional[List[str]]:
+        """다음에 실행할 작업 묶음 - 배치 대기 시간이 안 지난 묶음은 건너뛰고 나중에 다시 확인"""
+        now = time.time()
+        ordered = sorted(self.queue)
+        wait: Optional[float] = None
+        for _, _, job_id in ordered:
+            key = self.batch_keys.get(job_id)
+            if not self.batching or key is None:
+                return [job_id]
+            group = [entry[2] for entry in ordered if self.batch_keys.get(entry[2]) == key][:self.max_batch]
+            if group[0] != job_id:
+                continue  # 같은 묶음의 앞 작업에서 이미 판단함
+            remaining = self.submitted[job_id] + self.batch_window - now
+            if len(group) >= self.max_batch or remaining <= 0:
+                return group
+            wait = remaining if wait is None else min(wait, remaining)
+        if wait is not None and self.wakeup is None:
+            self.wakeup = asyncio.get_running_loop().call_later(wait, self._wake)
+        return None
+
+    def _wake(self):
+        self.wakeup = None
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.queue and len(self.slots) < self.max_concurrent:
+            if self.devices and self.devices.active >= self.devices.capacity:
+                break
+            group = self._next_group()
+            if not group:
+                break
+            self.queue = [entry for entry in self.queue if entry[2] not in group]
+            heapq.heapify(self.queue)
+            jobs = [(job_id, self._forget(job_id)) for job_id in group]
+            started = time.time()
+            for job_id in group:
+                self.running[job_id] = started
+            label = group[0]
+            self.slots[label] = started
+            # 묶음은 프레임을 함께 처리하므로 가장 큰 작업량 기준
+            cost = max((self.costs.get(job_id, 0) for job_id in group), default=0)
+            if cost:
+                self.slot_costs[label] = cost
+            if self.devices:
+                self.slot_devices[label] = self.devices.acquire()
+            self.tasks[label] = asyncio.create_task(self._run(label, jobs))
+
+    async def _run(self, label: str, jobs: List[Tuple[str, dict]]):
+        started = self.slots[label]
+        device = self.slot_devices.get(label)
+        extra = {"device": device} if device is not None else {}
+        try:
+            if len(jobs) == 1:
+                job_id, payload = jobs[0]
+                await self.processor(job_id, **payload, **extra)
+            else:
+                self.batches += 1
+                self.batched_jobs += len(jobs)
+                await self.batch_processor(jobs, **extra)
+        except Exception as e:
+            log(f"💥 Scheduler processor error: {e}", job_id=label, level="error")
+        finally:
+            # 이동 평균으로 작업 시간 추정치 갱신
+            duration = time.time() - started
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
+            cost = self.slot_costs.pop(label, None)
+            if cost:
+                rate = duration / cost
+                self.seconds_per_cost = rate if self.seconds_per_cost is None else 0.8 * self.seconds_per_cost + 0.2 * rate
+            for job_id, _ in jobs:
+                self.running.pop(job_id, None)
+                self.costs.pop(job_id, None)
+            self.slots.pop(label, None)
+            self.tasks.pop(label, None)
+            if self.slot_devices.pop(label, None) is not None:
+                self.devices.release(device)
+            self.completed += len(jobs)
+            self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queued": len(self.queue),
+            "running": len(self.running),
+            "running_slots": len(self.slots),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_duration": round(self.avg_duration, 2),
+            "seconds_per_cost": round(self.seconds_per_cost, 5) if self.seconds_per_cost else None,
+            "batch_window": self.batch_window,
+            "batches": self.batches,
+            "batched_jobs": self.batched_jobs,
+        }
@@ -0,0 +1,126 @@
+"""작업 상태 영구 저장소 (SQLite, WAL 모드)
+
+메모리의 job_status 는 빠른 조회용이고, 상태 전환(queued -> processing -> completed/failed)은
+여기에도 기록해 서버가 재시작돼도 완료된 결과를 계속 서빙할 수 있게 한다.
+진행률처럼 자주 바뀌는 값은 기록하지 않는다 (state_backend 가 sqlite 면 공유를 위해 기록).
+각 레코드에는 작업을 처리하는 노드/프로세스(owner)를 함께 남긴다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    output_path TEXT,
+    data TEXT NOT NULL,
+    owner TEXT,
+    owner_pid INTEGER,
+    owner_url TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state_updated ON jobs (state, updated_at);
+"""
+
+# 이전 버전 DB 에 없는 컬럼 (시작 시 추가)
+OWNER_COLUMNS = {"owner": "TEXT", "owner_pid": "INTEGER", "owner_url": "TEXT"}
+COLUMNS = "job_id, state, created_at, updated_at, output_path, data, owner, owner_pid, owner_url"
+
+
+class JobStore:
+    """job_id -> 마지막 상태 (작은 인덱스 - 결과 파일 자체는 TEMP_DIR 에 있음)"""
+
+    def __init__(self, db_path: Path, node_id: Optional[str] = None, node_url: Optional[str] = None):
+        self.db_path = db_path
+        self.node_id = node_id
+        self.node_url = node_url
+        self.lock = threading.Lock()  # 리퍼는 스레드 풀에서 돌기 때문에 연결 공유 시 직렬화
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # WAL 에서는 전원 장애 시 마지막 커밋만 잃음
+        self.db.executescript(SCHEMA)
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for name, column_type in OWNER_COLUMNS.items():
+            if name not in existing:
+                self.db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    def save(self, job_id: str, status: dict, output_path: Optional[str] = None):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                """
+                INSERT INTO jobs (job_id, state, created_at, updated_at, output_path, data, owner, owner_pid, owner_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_id) DO UPDATE SET
+                    state = excluded.state,
+                    updated_at = excluded.updated_at,
+                    output_path = COALESCE(excluded.output_path, jobs.output_path),
+                    data = excluded.data,
+                    owner = excluded.owner,
+                    owner_pid = excluded.owner_pid,
+                    owner_url = excluded.owner_url
+                """,
+                (job_id, status.get("status", "unknown"), now, now, output_path, json.dumps(status),
+                 self.node_id, os.getpid(), self.node_url),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.db.execute(f"SELECT {COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def delete(self, job_ids: Iterable[str]):
+        with self.lock:
+            self.db.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+
+    def load(self) -> List[dict]:
+        with self.lock:
+            rows = self.db.execute(f"SELECT {COLUMNS} FROM jobs ORDER BY created_at").fetchall()
+        return [self._row(row) for row in rows]
+
+    def finished_before(self, states: Iterable[str], before: float, limit: int = 500) -> List[dict]:
+        """updated_at 이 before 보다 오래된 종료 상태 작업 (오래된 순)"""
+        states = list(states)
+        placeholders = ",".join("?" * len(states))
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT {COLUMNS} FROM jobs "
+                f"WHERE state IN ({placeholders}) AND updated_at < ? ORDER BY updated_at LIMIT ?",
+                (*states, before, limit),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def job_ids(self) -> set:
+        with self.lock:
+            return {row[0] for row in self.db.execute("SELECT job_id FROM jobs")}
+
+    def count_by_state(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    @staticmethod
+    def _row(row) -> dict:
+        job_id, state, created_at, updated_at, output_path, data, owner, owner_pid, owner_url = row
+        return {
+            "job_id": job_id,
+            "state": state,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "output_path": output_path,
+            "status": json.loads(data),
+            "owner": owner,
+            "owner_pid": owner_pid,
+            "owner_url": owner_url,
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
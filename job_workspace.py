@@ -0,0 +1,153 @@
+"""작업별 FaceFusion 임시 프레임 디렉토리 (--temp-path) - RAM(/dev/shm) 우선, 한도를 넘으면 디스크
+
+FaceFusion 은 타겟 프레임을 temp 디렉토리에 추출 -> 처리 -> 병합하는데 기본 위치는 네트워크 볼륨이고
+같은 타겟 영상을 처리하는 작업끼리 디렉토리(영상 이름 기준)도 겹친다. 작업(또는 묶음)마다 자기
+디렉토리를 주고, 예상 크기(프레임 수 × 해상도)를 RAM 한도에 예약해 넘치면 디스크로 보낸다.
+실제 사용량은 주기적으로 측정해 최대치를 작업별로 기록하고, 끝나면(성공/실패/취소) 디렉토리째 지운다.
+
+API 프로세스가 여러 개일 수 있어 각 루트 아래에 프로세스(pid)별 디렉토리를 쓴다.
+
+    /dev/shm/facefusion-jobs/<pid>/<job_id>/facefusion/<target>/0001.png
+"""
+
+import os
+import time
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+BYTES_PER_PIXEL = 1.5  # FaceFusion 기본 temp 프레임 형식(png) 기준 대략적인 프레임당 크기
+DEFAULT_FRAMES = 300  # 프레임 수를 모를 때 (30fps 10초)
+
+
+def directory_bytes(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def estimate_bytes(frames: Optional[int], resolution: Optional[str]) -> int:
+    """추출될 프레임 전체 크기 추정 ("1280x720" 해상도 기준)"""
+    width, height = (int(v) for v in (resolution or "1280x720").split("x"))
+    return int((frames or DEFAULT_FRAMES) * width * height * BYTES_PER_PIXEL)
+
+
+class JobWorkspace:
+    def __init__(self, key: str, path: Path, storage: str, reserved: int):
+        self.key = key
+        self.path = path
+        self.storage = storage  # ram | disk
+        self.reserved = reserved
+        self.peak_bytes = 0
+        self.created_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {"path": str(self.path), "storage": self.storage, "reserved": self.reserved, "peak_bytes": self.peak_bytes}
+
+
+class JobWorkspaceManager:
+    """RAM 한도는 작업별 max(예상 크기, 측정한 사용량) 합으로 관리 (스레드 풀에서 호출되므로 잠금)"""
+
+    def __init__(self, ram_base: Optional[Path], disk_base: Path, ram_quota_bytes: Optional[int] = None,
+                 owner: Optional[str] = None):
+        self.owner = owner or str(os.getpid())
+        self.bases = [base for base in (ram_base, disk_base) if base]
+        self.disk_root = disk_base / self.owner
+        self.ram_root = ram_base / self.owner if ram_base and self._usable(ram_base / self.owner) else None
+        if self.ram_root and ram_quota_bytes is None:
+            # 기본값: tmpfs 크기의 절반 (나머지는 다른 프로세스/공유 메모리 몫)
+            stat = os.statvfs(self.ram_root)
+            ram_quota_bytes = stat.f_blocks * stat.f_frsize // 2
+        self.ram_quota_bytes = (ram_quota_bytes or 0) if self.ram_root else 0
+        self.workspaces: Dict[str, JobWorkspace] = {}
+        self.lock = threading.Lock()
+        self.allocated = {"ram": 0, "disk": 0}
+        self.released_bytes = 0
+
+    @staticmethod
+    def _usable(root: Path) -> bool:
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            return os.access(root, os.W_OK)
+        except OSError:
+            return False
+
+    def _charge(self, workspace: JobWorkspace) -> int:
+        return max(workspace.reserved, workspace.peak_bytes)
+
+    @property
+    def ram_used(self) -> int:
+        return sum(self._charge(w) for w in self.workspaces.values() if w.storage == "ram")
+
+    def allocate(self, key: str, estimated_bytes: int) -> JobWorkspace:
+        """key(작업 또는 묶음 ID) 전용 빈 디렉토리 - RAM 한도 안이고 tmpfs 여유가 있으면 RAM"""
+        with self.lock:
+            storage = "disk"
+            if self.ram_root and self.ram_used + estimated_bytes <= self.ram_quota_bytes:
+                stat = os.statvfs(self.ram_root)
+                if stat.f_bavail * stat.f_frsize >= estimated_bytes:
+                    storage = "ram"
+            path = (self.ram_root if storage == "ram" else self.disk_root) / key
+            workspace = JobWorkspace(key, path, storage, estimated_bytes)
+            self.workspaces[key] = workspace
+            self.allocated[storage] += 1
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True, exist_ok=True)
+        return workspace
+
+    def sample(self) -> Dict[str, int]:
+        """사용 중인 디렉토리 크기 측정 - 최대치 갱신 (블로킹)"""
+        sizes = {}
+        for workspace in list(self.workspaces.values()):
+            size = directory_bytes(workspace.path)
+            workspace.peak_bytes = max(workspace.peak_bytes, size)
+            sizes[workspace.key] = size
+        return sizes
+
+    def release(self, key: str) -> Optional[JobWorkspace]:
+        """디렉토리 삭제 - 마지막 측정을 포함한 최대 사용량이 담긴 JobWorkspace 반환 (블로킹)"""
+        with self.lock:
+            workspace = self.workspaces.pop(key, None)
+        if workspace is None:
+            return None
+        workspace.peak_bytes = max(workspace.peak_bytes, directory_bytes(workspace.path))
+        shutil.rmtree(workspace.path, ignore_errors=True)
+        self.released_bytes += workspace.peak_bytes
+        return workspace
+
+    def sweep(self, alive: Callable[[int], bool]) -> int:
+        """끝난 프로세스가 남긴 디렉토리 삭제 (비정상 종료 등) - 시작할 때 (블로킹)"""
+        removed = 0
+        for base in self.bases:
+            if not base.exists():
+                continue
+            for path in base.iterdir():
+                if path.name != self.owner and path.name.isdigit() and not alive(int(path.name)):
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+        # 컨테이너 재시작으로 pid 가 같아진 경우 - 내 디렉토리에 남은 이전 작업
+        for root in filter(None, (self.ram_root, self.disk_root)):
+            if not root.exists():
+                continue
+            for path in root.iterdir():
+                if path.name not in self.workspaces:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "ram_root": str(self.ram_root) if self.ram_root else None,
+            "disk_root": str(self.disk_root),
+            "ram_quota_bytes": self.ram_quota_bytes,
+            "ram_used_bytes": self.ram_used,
+            "allocated": dict(self.allocated),
+            "released_bytes": self.released_bytes,
+            "active": {key: workspace.to_dict() for key, workspace in self.workspaces.items()},
+        }
@@ -0,0 +1,174 @@
+"""Prometheus 텍스트 형식 메트릭 (/metrics)
+
+prometheus_client 없이 쓰는 최소 구현 - 카운터/게이지/히스토그램 + 라벨.
+큐 길이처럼 이미 다른 곳에 있는 값은 callback=... 으로 수집 시점에 읽는다.
+
+    registry = MetricsRegistry()
+    served = registry.counter("facefusion_bytes_served_total", "Response body bytes", ["endpoint"])
+    served.inc(1024, endpoint="/video/{job_id}")
+    registry.render()  # text/plain; version=0.0.4
+"""
+
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 작업 단계별 소요 시간 버킷 (초) - 큐 대기/모델 로딩/처리/마무리 모두 이 범위 안
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name}: expected labels {self.labels}, got {sorted(labels)}")
+        return tuple(labels[name] for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class ValueMetric(Metric):
+    """라벨 조합별 값 하나 - callback 이 있으면 수집 시점에 값을 읽음
+
+    라벨이 있으면 callback 은 {라벨 값 튜플: 값} dict 를 반환
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), callback: Optional[Callable] = None):
+        super().__init__(name, help, labels)
+        self.callback = callback
+        self.values: Dict[tuple, float] = {}
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        values = self.values
+        if self.callback:
+            result = self.callback()
+            values = result if self.labels else {(): result}
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in values.items()]
+
+
+class Counter(ValueMetric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[tuple, dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self.series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in self.series.items():
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, ('le', format_value(bound)))} {count}")
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, key, ('le', '+Inf'))} {series['count']}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), callback: Optional[Callable] = None) -> Counter:
+        return self._register(Counter(name, help, labels, callback))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), callback: Optional[Callable] = None) -> Gauge:
+        return self._register(Gauge(name, help, labels, callback))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+class BytesServedMiddleware:
+    """응답 본문 바이트를 라우트 경로(/video/{job_id} 등)별로 집계하는 ASGI 미들웨어
+
+    sendfile(zerocopysend) 로 보낸 바이트도 count 로 포함
+    """
+
+    def __init__(self, app, counter: Counter):
+        self.app = app
+        self.counter = counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def counting_send(message):
+            if message["type"] == "http.response.body":
+                size = len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                size = message.get("count") or 0
+            else:
+                size = 0
+            if size:
+                route = scope.get("route")
+                self.counter.inc(size, endpoint=getattr(route, "path", "unmatched"))
+            await send(message)
+
+        await self.app(scope, receive, counting_send)
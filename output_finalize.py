@@ -0,0 +1,152 @@
+"""결과 영상 마무리 - faststart 리먹스 + 모바일용 저해상도 렌디션
+
+FaceFusion 이 만든 MP4 는 moov 가 파일 끝에 있어 브라우저가 재생 전에 끝부분을 Range 로 먼저
+받아야 한다. 재인코딩 없이(-c copy) moov 를 앞으로 옮기고 (처리 중 스트리밍한 fragmented MP4 도 같은
+리먹스로 일반 MP4 로), 설정하면 480p 같은 낮은 비트레이트
+렌디션을 CPU 에서 따로 인코딩한다 (디코딩 한 번, split 필터로 여러 출력).
+
+ffmpeg 는 FaceFusion 환경에 있음 - 없으면 원본 그대로 둔다.
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REMUX_TIMEOUT = 120
+RENDITION_TIMEOUT = 1800
+AUDIO_BITRATE = "96k"
+SLOW_CONNECTIONS = {"slow-2g", "2g", "3g"}  # ECT 클라이언트 힌트
+
+
+def read_top_level_boxes(path: Path, limit: int = 64) -> List[str]:
+    """MP4 최상위 박스 이름 순서 (ftyp, moov, mdat ...) - 헤더만 읽음"""
+    names = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= size and len(names) < limit:
+            f.seek(offset)
+            box_size, name = struct.unpack(">I4s", f.read(8))
+            if box_size == 1:
+                box_size = struct.unpack(">Q", f.read(8))[0]
+            elif box_size == 0:
+                box_size = size - offset
+            if box_size < 8:
+                break
+            names.append(name.decode("latin-1"))
+            offset += box_size
+    return names
+
+
+def is_fragmented(path: Path) -> bool:
+    """fragmented MP4 (moof 박스) - 처리 중 스트리밍(FACEFUSION_PROGRESSIVE_OUTPUT)으로 쓴 결과"""
+    return "moof" in read_top_level_boxes(path)
+
+
+def needs_faststart(path: Path) -> bool:
+    """mdat 이 moov 보다 앞이거나 fragmented MP4 면 True
+
+    fragmented MP4 는 moov 가 앞에 있어도 비어 있어(empty_moov) 길이/탐색 정보가 fragment 마다 흩어져 있다.
+    같은 리먹스로 일반 MP4 로 바꾼다.
+    """
+    boxes = read_top_level_boxes(path)
+    if "moof" in boxes:
+        return True
+    if "moov" not in boxes or "mdat" not in boxes:
+        return False
+    return boxes.index("mdat") < boxes.index("moov")
+
+
+def faststart(path: Path) -> bool:
+    """재인코딩 없이 moov 를 앞으로 옮겨(fragmented 면 일반 MP4 로) 같은 경로에 덮어쓰기 - 바꿨으면 True (블로킹)"""
+    if not shutil.which("ffmpeg") or not needs_faststart(path):
+        return False
+    tmp_path = path.with_suffix(".faststart.mp4")
+    try:
+        completed = subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-i", str(path), "-map", "0", "-c", "copy", "-movflags", "+faststart", str(tmp_path)],
+            capture_output=True, timeout=REMUX_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        completed = None
+    if completed is None or completed.returncode != 0 or not tmp_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def rendition_name(height: int) -> str:
+    return f"{height}p"
+
+
+def rendition_path(output_path: Path, height: int) -> Path:
+    """output_{job_id}.mp4 -> output_{job_id}.480p.mp4 (TempReaper/cleanup 의 job_files 에 함께 잡힘)"""
+    return output_path.with_name(f"{output_path.stem}.{rendition_name(height)}{output_path.suffix}")
+
+
+def encode_renditions(output_path: Path, heights: List[int], source_height: Optional[int]) -> Dict[str, Optional[int]]:
+    """원본보다 낮은 해상도만 한 번의 ffmpeg 실행으로 인코딩 - {이름: 파일 크기 또는 None(실패)} (블로킹)"""
+    heights = sorted({h for h in heights if not source_height or h < source_height}, reverse=True)
+    if not heights or not shutil.which("ffmpeg"):
+        return {}
+    split = f"[0:v]split={len(heights)}" + "".join(f"[v{i}]" for i in range(len(heights))) + ";"
+    filters = split + ";".join(f"[v{i}]scale=-2:{h}[o{i}]" for i, h in enumerate(heights))
+    args = ["ffmpeg", "-v", "error", "-y", "-i", str(output_path), "-filter_complex", filters]
+    tmp_paths = []
+    for i, height in enumerate(heights):
+        maxrate = height * 2  # kbit/s - 480p 약 1Mbps, 360p 약 720kbps
+        tmp_path = rendition_path(output_path, height).with_suffix(".tmp.mp4")
+        tmp_paths.append(tmp_path)
+        args += ["-map", f"[o{i}]", "-map", "0:a?",
+                 "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+                 "-maxrate", f"{maxrate}k", "-bufsize", f"{maxrate * 2}k",
+                 "-c:a", "aac", "-b:a", AUDIO_BITRATE, "-movflags", "+faststart", str(tmp_path)]
+    try:
+        completed = subprocess.run(args, capture_output=True, timeout=RENDITION_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        completed = None
+    results: Dict[str, Optional[int]] = {}
+    for height, tmp_path in zip(heights, tmp_paths):
+        if completed is not None and completed.returncode == 0 and tmp_path.exists():
+            final_path = rendition_path(output_path, height)
+            os.replace(tmp_path, final_path)
+            results[rendition_name(height)] = final_path.stat().st_size
+        else:
+            tmp_path.unlink(missing_ok=True)
+            results[rendition_name(height)] = None
+    return results
+
+
+def choose_rendition(available: List[str], headers, requested: Optional[str] = None) -> Optional[str]:
+    """클라이언트 힌트로 렌디션 고르기 - None 이면 원본
+
+    1) ?rendition=480p (또는 full) 명시  2) Save-Data: on / ECT 가 3g 이하면 가장 작은 것
+    3) Viewport-Width × DPR 로 필요한 높이(16:9)를 계산해 그 이상인 가장 작은 렌디션
+    """
+    by_height = sorted(available, key=lambda name: int(name[:-1]))
+    if not by_height:
+        return None
+    if requested:
+        requested = requested.lower()
+        if requested in ("full", "original"):
+            return None
+        if requested.rstrip("p").isdigit():
+            fitting = [name for name in by_height if int(name[:-1]) <= int(requested.rstrip("p"))]
+            return fitting[-1] if fitting else by_height[0]
+    if headers.get("save-data", "").lower() == "on" or headers.get("ect", "").lower() in SLOW_CONNECTIONS:
+        return by_height[0]
+    width = headers.get("sec-ch-viewport-width") or headers.get("viewport-width")
+    if width:
+        try:
+            dpr = float(headers.get("sec-ch-dpr") or headers.get("dpr") or 1)
+            needed = float(width) * dpr * 9 / 16
+        except ValueError:
+            return None
+        for name in by_height:
+            if int(name[:-1]) >= needed:
+                return name
+    return None
@@ -0,0 +1,151 @@
+"""FaceFusion 처리 프로필 (speed / balanced / quality)
+
+모델, pixel boost, 해상도, 스레드 수 같은 처리 설정을 코드 대신 설정 파일(JSON)에 두고
+요청마다 이름으로 고른다. 시작할 때 전부 검증하므로 잘못된 설정 파일이면 서버가 뜨지 않고,
+값은 허용된 형식만 받아 argv 리스트로 넘기므로 셸/인자 주입이 불가능하다.
+
+    {"default": "balanced", "profiles": {"speed": {"processors": ["face_swapper"], ...}, ...}}
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+DEFAULT_PROFILES_PATH = Path(__file__).resolve().parent / "processing_profiles.json"
+
+PROCESSORS = {
+    "face_swapper", "face_enhancer", "frame_enhancer", "lip_syncer", "age_modifier",
+    "expression_restorer", "face_editor", "frame_colorizer", "deep_swapper", "face_debugger",
+}
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.]*$")  # 모델/인코더/프리셋 이름 ('-' 로 시작 불가)
+SIZE_PATTERN = re.compile(r"^[1-9][0-9]{1,4}x[1-9][0-9]{1,4}$")
+PROFILE_NAME_PATTERN = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+# 프로필 키 -> (FaceFusion CLI 옵션, 값 종류) - CLI 인자는 이 순서대로 만들어짐 (옵션이 None 이면 API 쪽 설정)
+FIELDS = {
+    "processors": ("--processors", "processors"),
+    "face_detector_model": ("--face-detector-model", "name"),
+    "face_swapper_model": ("--face-swapper-model", "name"),
+    "face_swapper_pixel_boost": ("--face-swapper-pixel-boost", "size"),
+    "face_enhancer_model": ("--face-enhancer-model", "name"),
+    "face_enhancer_blend": ("--face-enhancer-blend", (0, 100)),
+    "output_video_resolution": ("--output-video-resolution", "size"),
+    "output_video_quality": ("--output-video-quality", (0, 100)),
+    "output_video_encoder": ("--output-video-encoder", "name"),
+    "output_video_preset": ("--output-video-preset", "name"),
+    "execution_thread_count": ("--execution-thread-count", "threads"),
+    "execution_queue_count": ("--execution-queue-count", (1, 32)),
+    "timeout_seconds": (None, (10, 86400)),  # 이 시간(초)이 지나도 안 끝나면 프로세스 종료 후 실패 처리
+}
+REQUIRED_FIELDS = ("processors",)
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def validate_value(key: str, value, kind) -> Union[str, int, List[str]]:
+    if kind == "processors":
+        if not isinstance(value, list) or not value or not all(name in PROCESSORS for name in value):
+            raise ProfileError(f"{key}: expected a non-empty list of {sorted(PROCESSORS)}")
+        return list(value)
+    if kind == "threads" and value == "auto":
+        return value
+    if kind == "threads":
+        kind = (1, 128)
+    if isinstance(kind, tuple):
+        low, high = kind
+        if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+            raise ProfileError(f"{key}: expected an integer in {low}..{high}")
+        return value
+    pattern = SIZE_PATTERN if kind == "size" else NAME_PATTERN
+    if not isinstance(value, str) or not pattern.match(value):
+        raise ProfileError(f"{key}: invalid value {value!r}")
+    return value
+
+
+class ProcessingProfile:
+    def __init__(self, name: str, params: Dict[str, Union[str, int, List[str]]]):
+        self.name = name
+        self.params = params
+
+    @classmethod
+    def parse(cls, name: str, raw) -> "ProcessingProfile":
+        if not PROFILE_NAME_PATTERN.match(name):
+            raise ProfileError(f"Invalid profile name: {name!r}")
+        if not isinstance(raw, dict):
+            raise ProfileError(f"Profile {name}: expected an object")
+        unknown = set(raw) - set(FIELDS)
+        if unknown:
+            raise ProfileError(f"Profile {name}: unknown keys {sorted(unknown)}")
+        missing = [key for key in REQUIRED_FIELDS if key not in raw]
+        if missing:
+            raise ProfileError(f"Profile {name}: missing {missing}")
+        try:
+            params = {key: validate_value(key, raw[key], FIELDS[key][1]) for key in FIELDS if key in raw}
+        except ProfileError as e:
+            raise ProfileError(f"Profile {name}: {e}") from None
+        return cls(name, params)
+
+    def with_overrides(self, **overrides) -> "ProcessingProfile":
+        """일부 값을 바꾼 복사본 (미리보기 등) - 바꾼 값도 같은 규칙으로 검증"""
+        return ProcessingProfile.parse(self.name, {**self.params, **overrides})
+
+    def timeout(self, default: float) -> float:
+        return float(self.params.get("timeout_seconds", default))
+
+    def thread_count(self, auto: str) -> str:
+        value = self.params.get("execution_thread_count", "auto")
+        return auto if value == "auto" else str(value)
+
+    def cli_args(self, auto_thread_count: str) -> List[str]:
+        """FaceFusion 인자 리스트 ("auto" 스레드 수는 auto_thread_count 로)"""
+        args: List[str] = []
+        for key, (option, _) in FIELDS.items():
+            if key not in self.params or option is None:
+                continue
+            value = self.params[key]
+            if key == "execution_thread_count":
+                value = self.thread_count(auto_thread_count)
+            args.append(option)
+            args.extend(value if isinstance(value, list) else [str(value)])
+        return args
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, **self.params}
+
+
+class ProfileRegistry:
+    def __init__(self, profiles: Dict[str, ProcessingProfile], default: str, path: Optional[Path] = None):
+        if default not in profiles:
+            raise ProfileError(f"Default profile {default!r} is not defined ({sorted(profiles)})")
+        self.profiles = profiles
+        self.default = default
+        self.path = path
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_PROFILES_PATH, default: Optional[str] = None) -> "ProfileRegistry":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ProfileError(f"Cannot read processing profiles from {path}: {e}") from None
+        raw_profiles = data.get("profiles") if isinstance(data, dict) else None
+        if not isinstance(raw_profiles, dict) or not raw_profiles:
+            raise ProfileError(f"{path}: expected a non-empty \"profiles\" object")
+        profiles = {name: ProcessingProfile.parse(name, raw) for name, raw in raw_profiles.items()}
+        return cls(profiles, default or data.get("default") or next(iter(profiles)), path)
+
+    def get(self, name: Optional[str] = None) -> ProcessingProfile:
+        """이름으로 프로필 찾기 (None 이면 기본 프로필) - 없으면 ProfileError"""
+        profile = self.profiles.get(name or self.default)
+        if profile is None:
+            raise ProfileError(f"Unknown profile: {name} (available: {', '.join(sorted(self.profiles))})")
+        return profile
+
+    def to_dict(self) -> dict:
+        return {
+            "default": self.default,
+            "profiles": {name: profile.params for name, profile in self.profiles.items()},
+        }
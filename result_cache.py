@@ -0,0 +1,163 @@
+"""결과 캐시 - (소스 이미지 해시, 타겟 영상 식별자, 처리 파라미터) -> 완성된 결과 영상
+
+같은 사진으로 같은 영상을 다시 요청하면 FaceFusion 을 돌리지 않고 바로 결과를 돌려준다.
+디스크 용량 한도를 넘으면 가장 오래 안 쓴 항목부터 지운다 (LRU).
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import List, Optional
+
+# 결과 영상에 영향을 주지 않는 인자 (경로, 실행 환경, 로그) - 캐시 키에서 제외
+IGNORED_ARGS = {
+    "--source-paths", "--target-path", "--output-path", "--temp-path",
+    "--execution-providers", "--execution-thread-count", "--execution-queue-count",
+    "--log-level",
+}
+
+
+def processing_params(args: List[str]) -> List[str]:
+    """FaceFusion 인자 중 결과에 영향을 주는 것만 추리기"""
+    params = []
+    skipping = False
+    for arg in args:
+        if arg.startswith("--"):
+            skipping = arg in IGNORED_ARGS
+        if not skipping:
+            params.append(arg)
+    return params
+
+
+class ResultCache:
+    """WORKSPACE_DIR/result_cache 의 디스크 기반 LRU 결과 캐시
+
+    get/put/materialize 는 파일 I/O 가 있으므로 이벤트 루프에서는 스레드풀로 호출.
+    적중으로 바뀐 사용 순서는 save_interval 간격으로 (종료 시에는 flush 로) 인덱스에 저장.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int, save_interval: float = 30.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.save_interval = save_interval
+        self.index_path = cache_dir / "index.json"
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()  # 오래 안 쓴 순서
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()  # 스레드풀에서 동시에 호출됨
+        self._dirty = False  # 인덱스에 아직 저장하지 않은 사용 순서 변경
+        self._saved_at = 0.0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self.entries.values())
+
+    @staticmethod
+    def make_key(source_digest: bytes, target_path: Path, args: List[str]) -> str:
+        """source_digest: 디코딩된 소스 이미지 바이트의 sha256 (업로드하면서 계산)"""
+        target_stat = target_path.stat()
+        digest = hashlib.sha256()
+        digest.update(source_digest)
+        digest.update(f"{target_path.resolve()}|{target_stat.st_mtime_ns}|{target_stat.st_size}".encode())
+        digest.update("\0".join(processing_params(args)).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+        for entry in sorted(entries, key=lambda e: e["last_used"]):
+            if self._entry_path(entry["key"]).exists():
+                self.entries[entry["key"]] = entry
+
+    def _save(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(list(self.entries.values()), f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """저장하지 않은 사용 순서를 인덱스에 기록 (서버 종료 시)"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get(self, key: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self.entries.get(key)
+            path = self._entry_path(key)
+            if entry is None or not path.exists():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            entry["last_used"] = time.time()
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+            return path
+
+    def put(self, key: str, file_path: Path):
+        """완성된 결과를 캐시에 등록 (같은 파일시스템이면 하드링크라 복사 비용 없음)"""
+        if not self.enabled:
+            return
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            os.link(file_path, tmp_path)
+        except OSError:
+            shutil.copyfile(file_path, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.entries[key] = {"key": key, "size": path.stat().st_size, "last_used": time.time()}
+            self.entries.move_to_end(key)
+            self._evict()
+            self._save()
+
+    def materialize(self, cached_path: Path, output_path: Path):
+        """캐시 항목을 작업 출력 경로로 연결"""
+        try:
+            os.link(cached_path, output_path)
+        except OSError:
+            shutil.copyfile(cached_path, output_path)
+
+    def _evict(self):
+        while self.entries and self.total_bytes > self.max_bytes:
+            key, _ = self.entries.popitem(last=False)
+            self._entry_path(key).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
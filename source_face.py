@@ -0,0 +1,112 @@
+"""업로드된 소스 얼굴 사진 검증 + 정규화 - GPU 대기열에 넣기 전에 CPU 에서
+
+얼굴이 없거나 여러 명인 사진, 4K 카메라 프레임을 그대로 넘기면 GPU 슬롯을 차지한 뒤에야
+실패하거나 느려진다. 업로드 단계에서 가벼운 검출기(OpenCV Haar cascade)로 얼굴 수를 확인하고
+얼굴 주변만 잘라 스와퍼가 실제로 쓰는 해상도(pixel boost × CROP_SCALE)로 줄여 같은 경로에 다시 쓴다.
+
+cv2 는 FaceFusion 환경에만 있을 수 있으므로 함수 안에서 import 한다 - 없으면 검증 없이 원본 그대로.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+DETECT_MAX_SIDE = 640  # 검출은 이 크기로 줄인 회색조 이미지에서 (원본 해상도와 무관하게 수 ms)
+MIN_FACE_RATIO = 0.08  # 짧은 변 대비 이보다 작은 검출은 무시 (배경의 작은 얼굴/오검출)
+SECONDARY_FACE_RATIO = 0.35  # 가장 큰 얼굴 대비 이 면적 비율 이상인 얼굴이 또 있으면 여러 명으로 판단
+CROP_SCALE = 2.0  # 얼굴 박스 한 변의 몇 배로 자를지 - FaceFusion 이 다시 검출/정렬할 여백
+JPEG_QUALITY = 95
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+class SourceFaceError(Exception):
+    """얼굴이 없거나 여러 명이거나 디코딩할 수 없는 사진 (API 는 422)"""
+
+    def __init__(self, reason: str, message: str, faces: int = 0):
+        super().__init__(message)
+        self.reason = reason
+        self.faces = faces
+
+
+def load_detector():
+    """Haar cascade 는 opencv-python 에 포함 - cv2 가 없으면 None"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            try:
+                import cv2
+            except ImportError:
+                return None
+            _detector = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+        return _detector
+
+
+def detect_faces(gray) -> List[tuple]:
+    """(x, y, w, h) 목록 - 큰 얼굴부터"""
+    import cv2
+
+    min_side = max(24, int(min(gray.shape[:2]) * MIN_FACE_RATIO))
+    faces = load_detector().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side))
+    return sorted((tuple(int(v) for v in face) for face in faces), key=lambda f: f[2] * f[3], reverse=True)
+
+
+def square_crop(box: tuple, width: int, height: int) -> tuple:
+    """얼굴 중심 기준 정사각형 (이미지 밖으로 나가지 않게 이동/축소)"""
+    x, y, w, h = box
+    side = min(int(max(w, h) * CROP_SCALE), width, height)
+    left = min(max(x + w // 2 - side // 2, 0), width - side)
+    top = min(max(y + h // 2 - side // 2, 0), height - side)
+    return left, top, side
+
+
+def prepare_source_face(source_path: Path, output_size: int) -> dict:
+    """얼굴이 정확히 하나인지 확인하고 얼굴 영역만 output_size 이하로 잘라 덮어쓰기 (블로킹)
+
+    실패하면 SourceFaceError, cv2 가 없으면 {"checked": False} (원본 그대로 사용)
+    """
+    if load_detector() is None:
+        return {"checked": False}
+    import cv2
+
+    image = cv2.imread(str(source_path), cv2.IMREAD_COLOR)
+    if image is None:
+        raise SourceFaceError("undecodable", "Image could not be decoded")
+    height, width = image.shape[:2]
+
+    scale = min(1.0, DETECT_MAX_SIDE / max(width, height))
+    small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else image
+    gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+    faces = detect_faces(gray)
+    if not faces:
+        raise SourceFaceError("no_face", "No face detected in source image")
+    largest = faces[0][2] * faces[0][3]
+    prominent = [face for face in faces if face[2] * face[3] >= largest * SECONDARY_FACE_RATIO]
+    if len(prominent) > 1:
+        raise SourceFaceError("multiple_faces", f"Multiple faces detected in source image ({len(prominent)})", len(prominent))
+
+    box = tuple(round(v / scale) for v in faces[0])
+    left, top, side = square_crop(box, width, height)
+    crop = image[top:top + side, left:left + side]
+    if side > output_size:
+        crop = cv2.resize(crop, (output_size, output_size), interpolation=cv2.INTER_AREA)
+    tmp_path = source_path.with_suffix(".tmp.jpg")
+    if not cv2.imwrite(str(tmp_path), crop, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]):
+        tmp_path.unlink(missing_ok=True)
+        raise SourceFaceError("undecodable", "Failed to write normalized source image")
+    os.replace(tmp_path, source_path)
+    return {
+        "checked": True,
+        "faces": len(faces),
+        "original_size": [width, height],
+        "face_box": list(box),
+        "size": crop.shape[1],
+    }
+
+
+def source_face_size(pixel_boost: Optional[str]) -> int:
+    """pixel boost("384x384") 기준 소스 크롭 한 변 - 얼굴이 크롭의 약 1/CROP_SCALE 을 차지"""
+    boost = int(pixel_boost.split("x")[0]) if pixel_boost else 128  # FaceFusion 기본값 (inswapper 128)
+    return max(256, int(boost * CROP_SCALE))
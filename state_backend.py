@@ -0,0 +1,197 @@
+"""작업 상태 공유 백엔드 - API 프로세스/GPU 노드 여러 개가 같은 작업 상태를 보도록
+
+memory: 프로세스 하나 (기본값, 기존 동작) - 상태 전환만 로컬 jobs.sqlite3 에 기록
+sqlite: 같은 호스트에서 GPU 를 나눠 맡은 API 프로세스 여러 개 - jobs.sqlite3 를 공유하고 진행률까지 기록
+redis:  여러 GPU 노드 - Redis 프로토콜 서버에 작업 레코드를 TTL 과 함께 저장
+        (redis 패키지 필요, KeyDB/Dragonfly 나 로컬 테스트 서버도 같은 프로토콜이면 사용 가능)
+
+작업은 요청을 받은 프로세스(노드)의 대기열에서 실행되고(업로드한 이미지가 그 노드 디스크에 있음),
+다른 노드는 레코드의 owner_url 로 결과 요청을 넘긴다. 대기열과 GPU 슬롯은 공유하지 않는다.
+
+sqlite/redis 는 진행률 갱신마다 기록하므로 쓰기는 BackgroundWriter 스레드가 모아서 한다.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+from job_store import JobStore
+from job_log import log
+
+
+class BackgroundWriter:
+    """작업별 최신 값만 모아 별도 스레드에서 기록 - 이벤트 루프에서 호출되는 save/delete 가 디스크/네트워크를 기다리지 않게
+
+    값이 None 이면 삭제. 같은 작업의 이전 값은 덮어쓰므로 진행률 갱신이 몰려도 마지막 값만 기록된다.
+    """
+
+    def __init__(self, name: str, flush: Callable[[Dict[str, Optional[object]]], None]):
+        self.name = name
+        self.flush = flush
+        self.pending: Dict[str, Optional[object]] = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = False
+        self.writes = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._loop, name=f"{name}-state-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, job_id: str, value: Optional[object]):
+        with self.lock:
+            self.pending.pop(job_id, None)  # 순서상 마지막으로 - 삭제 뒤 저장이 삭제를 덮지 않게
+            self.pending[job_id] = value
+        self.wake.set()
+
+    def _loop(self):
+        while not self.stopping or self.pending:
+            self.wake.wait()
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self.wake.clear()
+            if not pending:
+                continue
+            try:
+                self.flush(pending)
+                self.writes += len(pending)
+            except Exception as e:
+                # 공유 저장소 장애가 로컬 작업 처리를 막으면 안 됨 - 로컬 상태는 그대로 유지
+                self.errors += 1
+                log(f"⚠️ {self.name} state update failed: {e}", level="warning", jobs=len(pending))
+
+    def close(self):
+        """남은 쓰기를 마치고 스레드 종료 (블로킹)"""
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        return {"writes": self.writes, "errors": self.errors, "pending": len(self.pending)}
+
+
+class MemoryStateBackend:
+    kind = "memory"
+    shared = False  # 다른 프로세스와 상태를 공유하는지 (로컬에 없는 작업을 조회할 가치가 있는지)
+
+    def __init__(self, store: JobStore):
+        self.store = store
+
+    def save(self, job_id: str, status: dict, output_path: Optional[str], transition: bool):
+        """transition: 상태(status 필드)가 바뀐 갱신인지 - 아니면 진행률 갱신"""
+        if transition:
+            self.store.save(job_id, status, output_path)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return None
+
+    def delete(self, job_id: str):
+        self.store.delete([job_id])
+
+    def stats(self) -> dict:
+        return {"kind": self.kind, "shared": self.shared}
+
+    def close(self):
+        pass
+
+
+class SQLiteStateBackend(MemoryStateBackend):
+    kind = "sqlite"
+    shared = True
+
+    def __init__(self, store: JobStore):
+        super().__init__(store)
+        self.writer = BackgroundWriter("SQLite", self._flush)
+
+    def _flush(self, pending: Dict[str, Optional[tuple]]):
+        for job_id, value in pending.items():
+            if value is None:
+                self.store.delete([job_id])
+            else:
+                self.store.save(job_id, *value)
+
+    def save(self, job_id: str, status: dict, output_path: Optional[str], transition: bool):
+        # 다른 프로세스가 진행률을 볼 수 있도록 진행률 갱신도 기록 (WAL 이라 읽기와 충돌 없음)
+        # status 는 갱신마다 새 dict 로 교체되지만 얕은 복사로 이 시점의 값을 고정
+        self.writer.put(job_id, (dict(status), output_path))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    def delete(self, job_id: str):
+        self.writer.put(job_id, None)
+
+    def close(self):
+        self.writer.close()
+
+    def stats(self) -> dict:
+        return {**super().stats(), **self.writer.stats()}
+
+
+class RedisStateBackend(MemoryStateBackend):
+    """상태 전환은 로컬 jobs.sqlite3 에도 (MemoryStateBackend), Redis 쓰기는 BackgroundWriter 가 파이프라인 한 번에"""
+
+    kind = "redis"
+    shared = True
+
+    def __init__(self, store: JobStore, url: str, ttl_seconds: float, prefix: str = "facefusion:job:"):
+        super().__init__(store)
+        import redis  # 선택 의존성 - redis 백엔드를 쓸 때만 필요
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, socket_timeout=2)
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.prefix = prefix
+        self.writer = BackgroundWriter("Redis", self._flush)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    def _flush(self, pending: Dict[str, Optional[str]]):
+        """대기 중인 레코드를 파이프라인 한 번으로 기록 (블로킹 - 쓰기 스레드에서만)"""
+        pipeline = self.client.pipeline(transaction=False)
+        for job_id, record in pending.items():
+            if record is None:
+                pipeline.delete(self._key(job_id))
+            else:
+                pipeline.set(self._key(job_id), record, ex=self.ttl_seconds)
+        pipeline.execute()
+
+    def save(self, job_id: str, status: dict, output_path: Optional[str], transition: bool):
+        super().save(job_id, status, output_path, transition)
+        record = {
+            "job_id": job_id,
+            "status": status,
+            "output_path": output_path,
+            "owner": self.store.node_id,
+            "owner_pid": os.getpid(),
+            "owner_url": self.store.node_url,
+            "updated_at": time.time(),
+        }
+        # 직렬화는 지금 - status 는 이후 갱신에서 교체되므로 이 시점의 값으로 기록
+        self.writer.put(job_id, json.dumps(record))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raw = self.client.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    def delete(self, job_id: str):
+        super().delete(job_id)
+        self.writer.put(job_id, None)
+
+    def close(self):
+        self.writer.close()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "url": self.url, **self.writer.stats()}
+
+
+def create_state_backend(kind: str, store: JobStore, redis_url: str, ttl_seconds: float) -> MemoryStateBackend:
+    if kind == "sqlite":
+        return SQLiteStateBackend(store)
+    if kind == "redis":
+        return RedisStateBackend(store, redis_url, ttl_seconds)
+    if kind != "memory":
+        raise ValueError(f"Unknown state backend: {kind} (memory, sqlite, redis)")
+    return MemoryStateBackend(store)
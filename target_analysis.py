@@ -0,0 +1,197 @@
+"""타겟 영상 사전 분석 캐시
+
+시나리오 영상은 고정된 소수의 파일이라, 매 작업마다 같은 영상을 디코딩하고
+yolo_face 로 모든 프레임의 얼굴을 다시 찾을 필요가 없다.
+한 번 추출한 프레임의 해시와 프레임별 얼굴(박스, 랜드마크, 임베딩, 선택된 얼굴)을
+.npy 파일로 저장해 두고 작업 시에는 memmap 으로 읽어 FaceFusion face_store 에 채운다.
+프레임 자체는 저장하지 않는다 - 작업마다 FaceFusion 이 다시 추출하고 캐시는 해시로 얼굴만 찾아 준다.
+
+영상 파일(경로/mtime/크기)이나 분석에 영향을 주는 인자가 바뀌면 캐시는 무효가 된다.
+numpy 는 FaceFusion 환경에만 있으므로 필요한 함수 안에서만 import 한다.
+"""
+
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ANALYSIS_VERSION = 2  # 2: frames.npy 를 더 이상 쓰지 않음 (이전 캐시는 다시 분석하며 삭제)
+
+# 추출 프레임이나 얼굴 검출 결과를 바꾸는 인자 - 달라지면 다시 분석
+ANALYSIS_ARGS = {
+    "--face-detector-model", "--face-detector-size", "--face-detector-angles", "--face-detector-score",
+    "--face-landmarker-model", "--face-landmarker-score",
+    "--output-video-resolution", "--output-video-fps", "--trim-frame-start", "--trim-frame-end",
+    "--temp-frame-format",
+}
+
+FACE_ARRAYS = [
+    "boxes", "detector_scores", "landmarker_scores",
+    "landmarks_5", "landmarks_5_68", "landmarks_68", "landmarks_68_5",
+    "angles", "embeddings", "normed_embeddings", "genders", "ages", "races",
+]
+
+
+def analysis_signature(args: List[str]) -> Dict[str, List[str]]:
+    """FaceFusion 인자 중 분석 결과에 영향을 주는 것만 추리기"""
+    signature: Dict[str, List[str]] = {}
+    current = None
+    for arg in args:
+        if arg.startswith("--"):
+            current = arg if arg in ANALYSIS_ARGS else None
+            if current:
+                signature[current] = []
+        elif current:
+            signature[current].append(arg)
+    return signature
+
+
+def video_identity(target_path: Path) -> dict:
+    stat = target_path.stat()
+    return {"path": str(target_path.resolve()), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def select_face_index(boxes, order: str = "right-left") -> int:
+    """--face-selector-mode one 이 고르는 얼굴 (검출 순서 기준 인덱스)"""
+    if not len(boxes):
+        return -1
+    indices = list(range(len(boxes)))
+    if order == "left-right":
+        return min(indices, key=lambda i: boxes[i][0])
+    if order == "top-bottom":
+        return min(indices, key=lambda i: boxes[i][1])
+    if order == "bottom-top":
+        return max(indices, key=lambda i: boxes[i][1])
+    return max(indices, key=lambda i: boxes[i][0])  # right-left
+
+
+class TargetAnalysisCache:
+    """영상별 디렉토리: manifest.json + frame_hashes.npy + 얼굴 배열 .npy"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    def entry_dir(self, target_path: Path) -> Path:
+        path_hash = hashlib.sha1(str(target_path.resolve()).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{target_path.stem}-{path_hash}"
+
+    def load_manifest(self, target_path: Path) -> Optional[dict]:
+        try:
+            with open(self.entry_dir(target_path) / "manifest.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, target_path: Path, args: List[str]) -> bool:
+        manifest = self.load_manifest(target_path)
+        if not manifest or not target_path.exists():
+            return False
+        return (
+            manifest.get("version") == ANALYSIS_VERSION
+            and manifest.get("identity") == video_identity(target_path)
+            and manifest.get("signature") == analysis_signature(args)
+        )
+
+    def write(self, target_path: Path, args: List[str], frame_paths: List[str], read_frame, detect_faces,
+              hash_frame, selector_order: str = "right-left") -> dict:
+        """프레임을 하나씩 읽어 해시와 얼굴 분석 결과만 배열로 기록 (프레임은 메모리에 하나씩만)"""
+        import numpy
+
+        entry_dir = self.entry_dir(target_path)
+        tmp_dir = entry_dir.with_name(entry_dir.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        all_faces = []
+        frame_hashes = []
+        frame_shape = None
+        for frame_path in frame_paths:
+            frame = read_frame(frame_path)
+            frame_shape = frame_shape or list(frame.shape)
+            frame_hashes.append(hash_frame(frame))
+            all_faces.append(detect_faces(frame))
+
+        genders = sorted({str(face.gender) for faces in all_faces for face in faces})
+        races = sorted({str(face.race) for faces in all_faces for face in faces})
+        max_faces = max([len(faces) for faces in all_faces] + [1])
+        count = len(frame_paths)
+        arrays = {
+            "boxes": numpy.zeros((count, max_faces, 4), numpy.float32),
+            "detector_scores": numpy.zeros((count, max_faces), numpy.float32),
+            "landmarker_scores": numpy.zeros((count, max_faces), numpy.float32),
+            "landmarks_5": numpy.zeros((count, max_faces, 5, 2), numpy.float32),
+            "landmarks_5_68": numpy.zeros((count, max_faces, 5, 2), numpy.float32),
+            "landmarks_68": numpy.zeros((count, max_faces, 68, 2), numpy.float32),
+            "landmarks_68_5": numpy.zeros((count, max_faces, 68, 2), numpy.float32),
+            "angles": numpy.zeros((count, max_faces), numpy.int16),
+            "embeddings": numpy.zeros((count, max_faces, 512), numpy.float32),
+            "normed_embeddings": numpy.zeros((count, max_faces, 512), numpy.float32),
+            "genders": numpy.zeros((count, max_faces), numpy.int8),
+            "ages": numpy.zeros((count, max_faces, 2), numpy.int16),
+            "races": numpy.zeros((count, max_faces), numpy.int8),
+            "face_counts": numpy.zeros((count,), numpy.int16),
+            "selected": numpy.full((count,), -1, numpy.int16),
+        }
+        for index, faces in enumerate(all_faces):
+            arrays["face_counts"][index] = len(faces)
+            arrays["selected"][index] = select_face_index([face.bounding_box for face in faces], selector_order)
+            for slot, face in enumerate(faces):
+                arrays["boxes"][index, slot] = face.bounding_box
+                arrays["detector_scores"][index, slot] = face.score_set.get("detector", 0)
+                arrays["landmarker_scores"][index, slot] = face.score_set.get("landmarker", 0)
+                arrays["landmarks_5"][index, slot] = face.landmark_set.get("5")
+                arrays["landmarks_5_68"][index, slot] = face.landmark_set.get("5/68")
+                arrays["landmarks_68"][index, slot] = face.landmark_set.get("68")
+                arrays["landmarks_68_5"][index, slot] = face.landmark_set.get("68/5")
+                arrays["angles"][index, slot] = face.angle
+                arrays["embeddings"][index, slot] = face.embedding
+                arrays["normed_embeddings"][index, slot] = face.normed_embedding
+                arrays["genders"][index, slot] = genders.index(str(face.gender))
+                arrays["ages"][index, slot] = (face.age.start, face.age.stop)
+                arrays["races"][index, slot] = races.index(str(face.race))
+        arrays["frame_hashes"] = numpy.array(frame_hashes)
+        for name, array in arrays.items():
+            numpy.save(tmp_dir / f"{name}.npy", array)
+
+        manifest = {
+            "version": ANALYSIS_VERSION,
+            "identity": video_identity(target_path),
+            "signature": analysis_signature(args),
+            "frame_count": count,
+            "frame_shape": frame_shape,
+            "max_faces": max_faces,
+            "frames_with_faces": int((arrays["face_counts"] > 0).sum()),
+            "labels": {"gender": genders, "race": races},
+        }
+        with open(tmp_dir / "manifest.json", "w") as f:
+            json.dump(manifest, f)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        tmp_dir.rename(entry_dir)
+        return manifest
+
+    def open(self, target_path: Path) -> dict:
+        """캐시 배열을 memmap 으로 열기 (복사 없음)"""
+        import numpy
+
+        entry_dir = self.entry_dir(target_path)
+        data = {"manifest": self.load_manifest(target_path)}
+        for name in ["frame_hashes", "face_counts", "selected", *FACE_ARRAYS]:
+            data[name] = numpy.load(entry_dir / f"{name}.npy", mmap_mode="r")
+        return data
+
+    def invalidate(self, target_path: Path):
+        shutil.rmtree(self.entry_dir(target_path), ignore_errors=True)
+
+    def stats(self, target_paths: List[Path], args_for) -> list:
+        entries = []
+        for target_path in target_paths:
+            manifest = self.load_manifest(target_path) or {}
+            entries.append({
+                "filename": target_path.name,
+                "ready": self.is_valid(target_path, args_for(target_path)),
+                "frame_count": manifest.get("frame_count"),
+                "frames_with_faces": manifest.get("frames_with_faces"),
+            })
+        return entries
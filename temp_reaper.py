@@ -0,0 +1,123 @@
+"""TEMP_DIR 정리 - 오래된 작업과 그 파일(camera_face_*, output_* 등)을 TTL/디스크 한도 기준으로 삭제
+
+DELETE /cleanup 을 부르지 않는 클라이언트가 대부분이라 주기적으로 돌면서
+1) TTL 이 지난 종료 작업, 2) 저장소에 기록이 없는 오래된 고아 파일,
+3) 한도를 넘으면 가장 오래전에 끝난 작업부터 지운다. 진행 중인 작업은 건드리지 않는다.
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from job_store import JobStore
+from job_events import TERMINAL_STATES
+
+JOB_FILE_PREFIXES = ("camera_face_", "output_", "source_", "target_")
+
+
+def job_id_from_filename(name: str) -> Optional[str]:
+    for prefix in JOB_FILE_PREFIXES:
+        if name.startswith(prefix):
+            return name[len(prefix):].split(".", 1)[0] or None
+    return None
+
+
+def job_files(temp_dir: Path, job_id: str) -> List[Path]:
+    return [path for prefix in JOB_FILE_PREFIXES for path in temp_dir.glob(f"{prefix}{job_id}.*")]
+
+
+class TempReaper:
+    def __init__(self, temp_dir: Path, store: JobStore, ttl_seconds: float, quota_bytes: int):
+        self.temp_dir = temp_dir
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.runs = 0
+        self.reaped_jobs = 0
+        self.reaped_orphans = 0
+        self.freed_bytes = 0
+        self.last_run: Optional[float] = None
+        self.last_usage = 0
+
+    def _scan(self) -> Dict[str, List[tuple]]:
+        """job_id -> [(경로, 크기, mtime)] (최상위 파일만 - result_cache 등 하위 디렉토리 제외)"""
+        files: Dict[str, List[tuple]] = {}
+        for path in self.temp_dir.iterdir():
+            job_id = job_id_from_filename(path.name)
+            if not job_id:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                files.setdefault(job_id, []).append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _remove(self, entries: Iterable[tuple]) -> int:
+        freed = 0
+        for path, size, _ in entries:
+            try:
+                path.unlink()
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+    def run_once(self, active_job_ids: Iterable[str]) -> List[str]:
+        """한 번 정리 - 지운 (저장소에 기록된) 작업 id 목록 반환 (메모리 상태도 함께 지우도록)"""
+        now = time.time()
+        active = set(active_job_ids)
+        files = self._scan()
+        reaped: List[str] = []
+        freed = 0
+
+        # 1) TTL 이 지난 종료 작업
+        for job in self.store.finished_before(TERMINAL_STATES, now - self.ttl_seconds):
+            if job["job_id"] in active:
+                continue
+            freed += self._remove(files.pop(job["job_id"], []))
+            reaped.append(job["job_id"])
+
+        # 2) 기록이 없는 고아 파일 (재시작 전 작업, 업로드 직후 실패 등) - 막 올라온 파일은 TTL 동안 유지
+        known = self.store.job_ids()
+        orphans = [
+            job_id for job_id, entries in files.items()
+            if job_id not in known and job_id not in active and max(e[2] for e in entries) < now - self.ttl_seconds
+        ]
+        for job_id in orphans:
+            freed += self._remove(files.pop(job_id))
+        self.reaped_orphans += len(orphans)
+
+        # 3) 디스크 한도 초과 - 가장 오래전에 끝난 작업부터
+        usage = sum(e[1] for entries in files.values() for e in entries)
+        if self.quota_bytes > 0 and usage > self.quota_bytes:
+            for job in self.store.finished_before(TERMINAL_STATES, now, limit=10000):
+                if usage <= self.quota_bytes:
+                    break
+                if job["job_id"] in active or job["job_id"] in reaped:
+                    continue
+                entries = files.pop(job["job_id"], [])
+                usage -= sum(e[1] for e in entries)
+                freed += self._remove(entries)
+                reaped.append(job["job_id"])
+
+        self.store.delete(reaped)
+        self.runs += 1
+        self.reaped_jobs += len(reaped)
+        self.freed_bytes += freed
+        self.last_run = now
+        self.last_usage = usage
+        return reaped
+
+    def stats(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "quota_bytes": self.quota_bytes,
+            "usage_bytes": self.last_usage,
+            "runs": self.runs,
+            "reaped_jobs": self.reaped_jobs,
+            "reaped_orphans": self.reaped_orphans,
+            "freed_bytes": self.freed_bytes,
+            "last_run": self.last_run,
+        }
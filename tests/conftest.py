@@ -0,0 +1,45 @@
+import os
+import sys
+import shutil
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+FACEFUSION_DIR = Path(os.environ.get("FACEFUSION_DIR", "/workspace/facefusion"))
+
+requires_ffmpeg = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def facefusion_dir(monkeypatch) -> Path:
+    """FaceFusion 체크아웃 (FACEFUSION_DIR) - 없으면 skip, 엔진이 chdir 하므로 테스트 후 원래 위치로"""
+    if not (FACEFUSION_DIR / "facefusion").is_dir():
+        pytest.skip(f"FaceFusion not found at {FACEFUSION_DIR}")
+    monkeypatch.chdir(FACEFUSION_DIR)
+    monkeypatch.syspath_prepend(str(FACEFUSION_DIR))
+    return FACEFUSION_DIR
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """backend_api 모듈 - 설정은 import 시점의 환경 변수로 정해지므로 세션에 한 번, 임시 작업 디렉토리로
+
+    워커 풀 없이(콜드 실행) 시작하고 GPU/FaceFusion 없이 동작하는 설정만 쓴다.
+    """
+    workspace = tmp_path_factory.mktemp("workspace")
+    (workspace / "videos").mkdir()
+    (workspace / "videos" / "scene.mp4").write_bytes(b"video" * 100)
+    os.environ.update({
+        "FACEFUSION_WORKSPACE": str(workspace),
+        "FACEFUSION_WORKERS": "0",
+        "FACEFUSION_WORKER_ENGINE": "stub",
+        "FACEFUSION_PREPARE_TARGETS": "0",
+        "FACEFUSION_LOG_FORMAT": "text",
+        "FACEFUSION_JOB_TEMP_RAM": "",
+    })
+    import backend_api
+    return backend_api
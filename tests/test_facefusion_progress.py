@@ -0,0 +1,51 @@
+import pytest
+
+from facefusion_progress import ProgressParser
+
+
+@pytest.mark.parametrize("line, fps", [
+    ("Processing:  45%|████▌     | 405/900 [00:10<00:12, 40.12frame/s, execution_providers=['cuda']]", 40.12),
+    ("Processing:  45%|████▌     | 405/900 [00:10<00:12, 40.12it/s]", 40.12),
+    ("Processing:   2%|▏         | 18/900 [00:58<47:10, 3.21s/frame, execution_providers=['cpu']]", 0.3115),
+    ("Processing:   2%|▏         | 18/900 [00:58<47:10, 2.00s/it]", 0.5),
+    ("Processing:   0%|          | 0/900 [00:00<?, ?frame/s]", None),
+])
+def test_tqdm_line(line, fps):
+    parser = ProgressParser()
+    assert parser.feed("[FACEFUSION.PROCESSORS.MODULES.FACE_SWAPPER.CORE] Processing\n" + line + "\r")
+    snapshot = parser.snapshot()
+    assert snapshot["stage"] == "swap"
+    assert snapshot["frames_total"] == 900
+    assert snapshot["fps"] == fps
+    assert line not in parser.tail
+
+
+def test_slow_frames_report_eta():
+    parser = ProgressParser()
+    parser.feed("[FACEFUSION.PROCESSORS.MODULES.FACE_ENHANCER.CORE] Processing\n")
+    parser.feed("Processing:   2%|▏         | 18/900 [00:58<1:47:10, 7.29s/frame]\r")
+    assert parser.frames_done == 18
+    assert parser.eta == 1 * 3600 + 47 * 60 + 10
+    assert parser.progress == 55 + int(35 * 18 / 900)
+
+
+def test_failed_run_keeps_last_stage_time():
+    parser = ProgressParser()
+    parser.feed("[FACEFUSION.CORE] Merging video with a resolution of 1280x720 and 30 frames per second\n")
+    parser.finish(False)
+    assert parser.stage == "merge"
+    assert "merge" in parser.stage_times
+
+
+def test_reporter_always_applies_final_snapshot(backend):
+    job_id = "progress-final"
+    backend.set_job_status(job_id, {"status": "processing", "progress": 0, "stage": "starting"})
+    report = backend.progress_reporter(job_id)
+    parser = ProgressParser()
+    parser.feed("[FACEFUSION.CORE] Merging video with a resolution of 1280x720 and 30 frames per second\n")
+    report(parser.snapshot())
+    # 실패로 끝나 단계가 그대로인 마지막 스냅샷 - 간격 안이어도 반영돼야 함
+    parser.finish(False)
+    report({**parser.snapshot(), "final": True})
+    assert "merge" in backend.job_status[job_id]["stage_times"]
+    backend.forget_job(job_id)
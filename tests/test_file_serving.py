@@ -0,0 +1,162 @@
+import os
+import time
+import threading
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import file_serving
+from file_serving import GrowingFileResponse, file_etag, last_modified, parse_range, serve_file
+
+DATA = bytes(range(256)) * 40  # 10240 바이트
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 10239)]),
+    ("bytes=-500", [(9740, 10239)]),  # 접미 구간
+    ("bytes=-20000", [(0, 10239)]),  # 파일보다 긴 접미 구간은 전체
+    ("bytes=10000-20000", [(10000, 10239)]),  # 끝이 넘치면 잘라냄
+    ("bytes=0-9, 20-29", [(0, 9), (20, 29)]),
+    ("bytes=20-29,0-9", [(0, 9), (20, 29)]),  # 정렬
+    ("bytes=0-10,5-20,21-30", [(0, 30)]),  # 겹치거나 이어지는 구간은 병합
+    ("bytes=20000-", []),  # 만족할 수 없음 - 416
+    ("bytes=-0", []),
+    ("bytes=10-5", None),  # 문법 오류 - 무시하고 전체 전송
+    ("bytes=abc", None),
+    ("items=0-9", None),
+    ("bytes=", None),
+    ("bytes=" + ",".join(f"{i * 100}-{i * 100 + 9}" for i in range(file_serving.MAX_RANGES + 1)), None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(DATA)) == expected
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = tmp_path / "result.mp4"
+    path.write_bytes(DATA)
+
+    async def endpoint(request):
+        return serve_file(request, path, os.stat(path), "video/mp4")
+
+    client = TestClient(Starlette(routes=[Route("/file", endpoint, methods=["GET", "HEAD"])]))
+    return client, os.stat(path)
+
+
+def test_full_and_head(served):
+    client, stat = served
+    response = client.get("/file")
+    assert response.status_code == 200 and response.content == DATA
+    assert response.headers["etag"] == file_etag(stat) and response.headers["accept-ranges"] == "bytes"
+    response = client.head("/file")
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["content-length"] == str(len(DATA))
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=-500", 9740, 10239),
+    ("bytes=10000-", 10000, 10239),
+])
+def test_single_range(served, header, start, end):
+    client, _ = served
+    response = client.get("/file", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == DATA[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+
+
+def test_multi_range(served):
+    client, _ = served
+    response = client.get("/file", headers={"Range": "bytes=0-9,100-109"})
+    assert response.status_code == 206
+    media_type, _, boundary = response.headers["content-type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    body = response.content
+    assert int(response.headers["content-length"]) == len(body)
+    assert body.startswith(f"--{boundary}\r\n".encode()) and body.endswith(f"\r\n--{boundary}--\r\n".encode())
+    for start, end in ((0, 9), (100, 109)):
+        part = f"Content-Type: video/mp4\r\nContent-Range: bytes {start}-{end}/{len(DATA)}\r\n\r\n".encode()
+        assert part + DATA[start:end + 1] in body
+
+
+def test_unsatisfiable_range_is_416(served):
+    client, _ = served
+    response = client.get("/file", headers={"Range": "bytes=20000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_malformed_range_sends_everything(served):
+    client, _ = served
+    response = client.get("/file", headers={"Range": "bytes=10-5"})
+    assert response.status_code == 200 and response.content == DATA
+
+
+@pytest.mark.parametrize("if_range, partial", [
+    ("current-etag", True),
+    ("current-date", True),
+    ('"0-0"', False),  # 파일이 바뀐 뒤의 재개 요청 - 전체를 다시
+    ("W/current-etag", False),  # If-Range 는 강한 비교
+])
+def test_if_range(served, if_range, partial):
+    client, stat = served
+    if_range = (if_range.replace("current-etag", file_etag(stat))
+                .replace("current-date", last_modified(stat)))
+    response = client.get("/file", headers={"Range": "bytes=0-99", "If-Range": if_range})
+    assert response.status_code == (206 if partial else 200)
+    assert response.content == (DATA[:100] if partial else DATA)
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"If-None-Match": "current-etag"}, 304),
+    ({"If-None-Match": "W/current-etag"}, 304),  # If-None-Match 는 약한 비교
+    ({"If-None-Match": '"other", current-etag'}, 304),
+    ({"If-None-Match": "*"}, 304),
+    ({"If-None-Match": '"other"'}, 200),
+    ({"If-Modified-Since": "current-date"}, 304),
+    ({"If-None-Match": '"other"', "If-Modified-Since": "current-date"}, 200),  # ETag 가 우선
+    ({"If-Match": '"other"'}, 412),
+    ({"If-Match": "current-etag"}, 200),
+    ({"If-Unmodified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}, 412),
+])
+def test_conditional_requests(served, headers, status):
+    client, stat = served
+    headers = {name: value.replace("current-etag", file_etag(stat)).replace("current-date", last_modified(stat))
+               for name, value in headers.items()}
+    response = client.get("/file", headers=headers)
+    assert response.status_code == status
+    assert response.content == (DATA if status == 200 else b"")
+
+
+def test_growing_file_is_sent_until_finished(tmp_path, monkeypatch):
+    monkeypatch.setattr(GrowingFileResponse, "poll_interval", 0.01)
+    monkeypatch.setattr(GrowingFileResponse, "chunk_size", 1000)
+    path = tmp_path / "output.part.mp4"
+    path.write_bytes(DATA[:3000])
+    written = threading.Event()
+
+    def writer():
+        with open(path, "ab") as f:
+            for offset in range(3000, len(DATA), 1500):
+                time.sleep(0.02)
+                f.write(DATA[offset:offset + 1500])
+                f.flush()
+        os.rename(path, tmp_path / "output.mp4")  # 작성이 끝나 이름이 바뀌어도 열어 둔 fd 로 계속
+        written.set()
+
+    async def is_finished() -> bool:
+        return written.is_set()
+
+    async def endpoint(request):
+        threading.Thread(target=writer, daemon=True).start()
+        return GrowingFileResponse(path, is_finished, media_type="video/mp4")
+
+    client = TestClient(Starlette(routes=[Route("/stream", endpoint)]))
+    response = client.get("/stream")
+    assert response.status_code == 200
+    assert "content-length" not in response.headers
+    assert response.content == DATA
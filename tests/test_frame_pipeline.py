@@ -0,0 +1,87 @@
+"""FACEFUSION_PROGRESSIVE_OUTPUT / 묶음 처리가 쓰는 프레임 단위 파이프라인을 실제 FaceFusion 프로세서로 확인
+
+FaceFusion 체크아웃(FACEFUSION_DIR)이 있어야 하고, 끝까지 돌려 보는 테스트는 소스 사진과 짧은 타겟 영상
+(FACEFUSION_TEST_SOURCE, FACEFUSION_TEST_TARGET)과 ffmpeg 도 필요하다 - 없으면 skip.
+"""
+
+import os
+import json
+import importlib
+import subprocess
+from pathlib import Path
+from typing import get_type_hints
+
+import pytest
+
+from conftest import requires_ffmpeg
+from facefusion_worker import FaceFusionEngine, frame_inputs
+from target_analysis import TargetAnalysisCache
+
+PROCESSORS = ["face_swapper", "face_enhancer"]
+TEST_SOURCE = os.environ.get("FACEFUSION_TEST_SOURCE")
+TEST_TARGET = os.environ.get("FACEFUSION_TEST_TARGET")
+
+
+def processor_inputs_type(name: str):
+    for module_name in ("facefusion.processors.types", "facefusion.processors.typing"):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        return getattr(module, "".join(part.title() for part in name.split("_")) + "Inputs")
+    pytest.skip("FaceFusion processor types module not found")
+
+
+def video_info(path: Path) -> dict:
+    completed = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-count_packets",
+         "-show_entries", "stream=width,height,nb_read_packets", "-of", "json", str(path)],
+        capture_output=True, check=True,
+    )
+    return json.loads(completed.stdout)["streams"][0]
+
+
+def facefusion_args(source: str, target: str, output: Path, temp: Path) -> list:
+    return [
+        "headless-run",
+        "--processors", *PROCESSORS,
+        "--source-paths", source,
+        "--target-path", target,
+        "--output-path", str(output),
+        "--temp-path", str(temp),
+        "--execution-providers", os.environ.get("FACEFUSION_TEST_PROVIDER", "cpu"),
+        "--face-selector-mode", "one",
+        "--log-level", "info",
+    ]
+
+
+@pytest.mark.parametrize("name", PROCESSORS)
+def test_frame_inputs_cover_processor_inputs(facefusion_dir, name):
+    inputs = frame_inputs(None, object(), [], object())
+    required = set(get_type_hints(processor_inputs_type(name)))
+    assert required <= set(inputs), f"{name} expects {sorted(required - set(inputs))}"
+
+
+@requires_ffmpeg
+@pytest.mark.skipif(not (TEST_SOURCE and TEST_TARGET), reason="FACEFUSION_TEST_SOURCE / FACEFUSION_TEST_TARGET not set")
+def test_frame_pipeline_matches_headless(facefusion_dir, tmp_path):
+    engine = FaceFusionEngine(facefusion_dir, PROCESSORS, TargetAnalysisCache(tmp_path / "analysis"))
+    engine._import()
+
+    headless_path = tmp_path / "headless.mp4"
+    assert engine.run(facefusion_args(TEST_SOURCE, TEST_TARGET, headless_path, tmp_path / "temp_headless")) is None
+
+    # run_batch 는 실패하면 headless 로 대신 처리하므로 프레임 파이프라인(_run_batch)을 직접 호출
+    output_path = tmp_path / "frames.mp4"
+    stream_path = tmp_path / "frames.partial.mp4"
+    errors = engine._run_batch([{
+        "job_id": "frames",
+        "args": facefusion_args(TEST_SOURCE, TEST_TARGET, output_path, tmp_path / "temp_frames"),
+        "stream_path": str(stream_path),
+    }])
+    assert errors == {"frames": None}
+    assert output_path.exists() and not stream_path.exists()
+
+    headless, frames = video_info(headless_path), video_info(output_path)
+    assert (frames["width"], frames["height"]) == (headless["width"], headless["height"])
+    assert frames["nb_read_packets"] == headless["nb_read_packets"]
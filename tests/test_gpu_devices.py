@@ -0,0 +1,60 @@
+import subprocess
+
+import pytest
+
+from gpu_devices import DevicePool, discover_devices, query_nvidia_smi
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({"FACEFUSION_GPUS": "0, 2,3"}, ["0", "2", "3"]),
+    ({"FACEFUSION_GPUS": "1", "CUDA_VISIBLE_DEVICES": "0,1"}, ["1"]),
+    ({"CUDA_VISIBLE_DEVICES": "GPU-abc,GPU-def"}, ["GPU-abc", "GPU-def"]),
+])
+def test_discover_devices_from_env(tmp_path, env, expected):
+    assert discover_devices(env, tmp_path) == expected
+
+
+def test_discover_devices_from_dev_nodes(tmp_path):
+    for name in ("nvidia10", "nvidia2", "nvidia0", "nvidiactl", "nvidia-uvm", "null"):
+        (tmp_path / name).touch()
+    assert discover_devices({}, tmp_path) == ["0", "2", "10"]
+    assert discover_devices({}, tmp_path / "missing") == []
+
+
+def test_query_nvidia_smi_parses_csv():
+    def runner(args, **kwargs):
+        stdout = "0, GPU-aaa, 87, 10240, 24576\n1, GPU-bbb, [N/A], 0, 24576\nbroken line\n"
+        return subprocess.CompletedProcess(args, 0, stdout, "")
+
+    metrics = query_nvidia_smi(runner)
+    assert metrics["0"] == metrics["GPU-aaa"] == {"gpu_utilization": 87, "memory_used_mb": 10240, "memory_total_mb": 24576}
+    assert "1" not in metrics
+    assert query_nvidia_smi(lambda args, **kwargs: subprocess.CompletedProcess(args, 9, "", "")) == {}
+
+
+def test_device_pool_balances_slots_with_fake_clock():
+    now = [0.0]
+    pool = DevicePool(["0", "1"], per_device=2, clock=lambda: now[0])
+    assert pool.capacity == 4
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first, second} == {"0", "1"}  # 실행 수가 적은 장치부터
+    now[0] = 10.0
+    pool.release(first)
+    # 실행 중인 작업이 적은 장치 먼저 (같으면 누적 사용 시간이 적은 장치)
+    assert pool.acquire() == first
+    assert pool.acquire() == first
+    assert pool.acquire() == second
+    assert pool.acquire() is None and pool.active == 4
+    for device in (first, first, second, second):
+        pool.release(device)
+    now[0] = 20.0
+    stats = {entry["device"]: entry for entry in pool.stats({"0": {"gpu_utilization": 50}})}
+    assert stats[first]["completed"] == 3 and stats[second]["completed"] == 2
+    assert stats[second]["busy_seconds"] == 10.0 and stats[second]["utilization"] == 0.5
+    assert stats["0"]["gpu_utilization"] == 50 and all(entry["free"] == 2 for entry in stats.values())
+
+
+def test_device_pool_needs_devices():
+    with pytest.raises(ValueError):
+        DevicePool([])
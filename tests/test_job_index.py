@@ -0,0 +1,79 @@
+import asyncio
+
+from job_index import JobIndex
+
+
+def make_index() -> JobIndex:
+    index = JobIndex()
+    index.update("a", "completed", 10.0)
+    index.update("b", "processing", 20.0)
+    index.update("c", "queued", 30.0)
+    index.update("d", "completed", 30.0)  # c 와 같은 시각 - ID 순
+    index.update("e", "failed", 40.0)
+    return index
+
+
+def test_update_moves_between_states_and_keeps_created_at():
+    index = make_index()
+    index.update("b", "completed", 99.0)  # 이미 아는 작업이면 생성 시각은 그대로
+    assert index.created_at("b") == 20.0
+    assert index.by_state["processing"] == []
+    assert index.by_state["completed"] == [(10.0, "a"), (20.0, "b"), (30.0, "d")]
+    assert index.counts() == {"completed": 3, "queued": 1, "failed": 1}
+
+
+def test_remove():
+    index = make_index()
+    index.remove("d")
+    index.remove("missing")
+    assert index.created_at("d") is None
+    assert index.counts() == {"completed": 1, "processing": 1, "queued": 1, "failed": 1}
+
+
+def test_page_merges_states_in_creation_order():
+    index = make_index()
+    assert index.page() == [(10.0, "a"), (20.0, "b"), (30.0, "c"), (30.0, "d"), (40.0, "e")]
+    assert index.page(["completed", "queued"]) == [(10.0, "a"), (30.0, "c"), (30.0, "d")]
+    assert index.page(["unknown"]) == []
+    assert index.page(since=30.0) == [(30.0, "c"), (30.0, "d"), (40.0, "e")]  # since 포함
+    assert index.page(limit=2) == [(10.0, "a"), (20.0, "b")]
+
+
+def test_page_cursor_walks_every_job_once():
+    index = make_index()
+    seen, after = [], None
+    while True:
+        page = index.page(after=after, limit=2)
+        if not page:
+            break
+        seen += page
+        after = page[-1]
+    assert [job_id for _, job_id in seen] == ["a", "b", "c", "d", "e"]
+    # 같은 시각의 다음 항목부터, since 보다 뒤면 cursor 가 우선
+    assert index.page(since=10.0, after=(30.0, "c")) == [(30.0, "d"), (40.0, "e")]
+
+
+def test_index_is_rebuilt_from_job_store(backend, tmp_path):
+    output_path = tmp_path / "output_restored-done.mp4"
+    output_path.write_bytes(b"video")
+    jobs = {
+        "restored-done": ({"status": "completed", "output_path": str(output_path)}, str(output_path), 100.0),
+        "restored-lost": ({"status": "completed"}, str(tmp_path / "missing.mp4"), 200.0),  # 결과 파일이 사라짐
+        "restored-failed": ({"status": "failed", "error": "boom"}, None, 300.0),
+        "restored-running": ({"status": "processing", "stage": "swapping"}, None, 400.0),  # 재시작으로 중단됨
+    }
+    for job_id, (status, path, created_at) in jobs.items():
+        backend.job_store.save(job_id, status, path)
+        backend.job_store.db.execute("UPDATE jobs SET created_at = ? WHERE job_id = ?", (created_at, job_id))
+    try:
+        asyncio.run(backend.restore_jobs())
+        page = backend.job_index.page(limit=100)
+        assert [entry for entry in page if entry[1].startswith("restored-")] == [
+            (100.0, "restored-done"), (300.0, "restored-failed"), (400.0, "restored-running")]
+        assert backend.job_index.jobs["restored-running"][0] == "failed"
+        assert backend.job_index.page(["completed"], since=100.0, limit=1) == [(100.0, "restored-done")]
+        assert "restored-lost" not in backend.job_store.job_ids()
+    finally:
+        for job_id in jobs:
+            backend.forget_job(job_id)
+        backend.job_store.delete(jobs)
@@ -0,0 +1,136 @@
+"""JobScheduler / DevicePool - 잠깐 쉬는 가짜 processor 로 GPU 없이"""
+
+import asyncio
+
+import pytest
+
+from gpu_devices import DevicePool
+from job_scheduler import JobScheduler, QueueFullError
+
+
+class FakeProcessor:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.started = []  # (job_id, device)
+        self.batches = []  # [job_id, ...]
+
+    async def __call__(self, job_id: str, device=None, **payload):
+        self.started.append((job_id, device))
+        await asyncio.sleep(self.delay)
+
+    async def batch(self, jobs, device=None):
+        self.batches.append([job_id for job_id, _ in jobs])
+        await asyncio.sleep(self.delay)
+
+
+async def drain(scheduler: JobScheduler):
+    while scheduler.queue or scheduler.slots:
+        await asyncio.sleep(0.01)
+
+
+def test_priority_order():
+    async def scenario():
+        processor = FakeProcessor()
+        scheduler = JobScheduler(processor, max_concurrent=1)
+        assert scheduler.submit("running", {}) == 0
+        scheduler.submit("low", {}, priority=5)
+        scheduler.submit("high-1", {}, priority=0)
+        scheduler.submit("high-2", {}, priority=0)
+        assert [scheduler.position(job_id) for job_id in ("high-1", "high-2", "low")] == [1, 2, 3]
+        await drain(scheduler)
+        return processor, scheduler
+
+    processor, scheduler = asyncio.run(scenario())
+    assert [job_id for job_id, _ in processor.started] == ["running", "high-1", "high-2", "low"]
+    assert scheduler.completed == 4
+
+
+def test_batching_window_groups_same_target():
+    async def scenario():
+        processor = FakeProcessor()
+        scheduler = JobScheduler(processor, max_concurrent=2, batch_processor=processor.batch,
+                                 batch_window=0.1, max_batch=3)
+        scheduler.submit("a1", {}, batch_key="a.mp4")
+        scheduler.submit("b1", {}, batch_key="b.mp4")
+        scheduler.submit("a2", {}, batch_key="a.mp4")
+        await asyncio.sleep(0.02)
+        assert not processor.started and not processor.batches  # 창이 아직 열려 있음
+        await drain(scheduler)
+        return processor, scheduler
+
+    processor, scheduler = asyncio.run(scenario())
+    assert processor.batches == [["a1", "a2"]]
+    assert [job_id for job_id, _ in processor.started] == ["b1"]
+    assert scheduler.stats()["batches"] == 1 and scheduler.stats()["batched_jobs"] == 2
+
+
+def test_full_batch_dispatches_without_waiting():
+    async def scenario():
+        processor = FakeProcessor()
+        scheduler = JobScheduler(processor, batch_processor=processor.batch, batch_window=10, max_batch=2)
+        scheduler.submit("a1", {}, batch_key="a.mp4")
+        scheduler.submit("a2", {}, batch_key="a.mp4")
+        await asyncio.sleep(0.01)
+        batches = list(processor.batches)
+        await drain(scheduler)
+        return batches
+
+    assert asyncio.run(scenario()) == [["a1", "a2"]]
+
+
+def test_queue_full_rejects_with_retry_after():
+    async def scenario():
+        scheduler = JobScheduler(FakeProcessor(), max_concurrent=1, max_queue=1, default_duration=30)
+        scheduler.submit("running", {})
+        scheduler.submit("queued", {})
+        with pytest.raises(QueueFullError) as error:
+            scheduler.submit("rejected", {})
+        stats = scheduler.stats()
+        await drain(scheduler)
+        return error.value, stats
+
+    error, stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1 and stats["queued"] == 1
+    # 실행 중 1개(약 30초) + 대기 1개(30초) 뒤
+    assert 55 < error.retry_after <= 60
+
+
+def test_queue_full_response_is_429(backend):
+    response = backend.queue_full_response(QueueFullError(retry_after=12.4))
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "12"
+
+
+def test_cancel_queued_job():
+    async def scenario():
+        processor = FakeProcessor()
+        scheduler = JobScheduler(processor, max_concurrent=1)
+        scheduler.submit("running", {})
+        scheduler.submit("queued", {})
+        assert not scheduler.cancel("running")  # 실행 중인 작업은 건드리지 않음
+        assert scheduler.cancel("queued")
+        assert scheduler.position("queued") is None and scheduler.estimated_wait("queued") is None
+        await drain(scheduler)
+        return processor
+
+    assert [job_id for job_id, _ in asyncio.run(scenario()).started] == ["running"]
+
+
+def test_device_slots_limit_concurrency():
+    async def scenario():
+        processor = FakeProcessor(delay=0.1)
+        devices = DevicePool(["0", "1"], per_device=1)
+        scheduler = JobScheduler(processor, max_concurrent=8, devices=devices)
+        for job_id in ("j1", "j2", "j3"):
+            scheduler.submit(job_id, {})
+        await asyncio.sleep(0.02)
+        first = list(processor.started)
+        active = devices.active
+        await drain(scheduler)
+        return processor, devices, first, active
+
+    processor, devices, first, active = asyncio.run(scenario())
+    assert sorted(device for _, device in first) == ["0", "1"] and active == 2
+    assert [job_id for job_id, _ in processor.started] == ["j1", "j2", "j3"]
+    assert devices.active == 0
+    assert sum(entry["completed"] for entry in devices.stats()) == 3
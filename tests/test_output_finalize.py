@@ -0,0 +1,52 @@
+import json
+import struct
+import subprocess
+from pathlib import Path
+
+from conftest import requires_ffmpeg
+from facefusion_worker import FRAGMENTED_MP4_FLAGS
+from output_finalize import faststart, is_fragmented, needs_faststart, read_top_level_boxes
+
+
+def write_boxes(path: Path, names: list) -> Path:
+    with open(path, "wb") as f:
+        for name in names:
+            f.write(struct.pack(">I4s", 16, name.encode()) + b"\0" * 8)
+    return path
+
+
+def frame_count(path: Path) -> int:
+    completed = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", "-count_packets",
+         "-show_entries", "stream=nb_read_packets", "-of", "json", str(path)],
+        capture_output=True, check=True,
+    )
+    return int(json.loads(completed.stdout)["streams"][0]["nb_read_packets"])
+
+
+def test_needs_faststart_box_layouts(tmp_path):
+    assert needs_faststart(write_boxes(tmp_path / "end.mp4", ["ftyp", "mdat", "moov"]))
+    assert not needs_faststart(write_boxes(tmp_path / "front.mp4", ["ftyp", "moov", "mdat"]))
+    fragmented = write_boxes(tmp_path / "frag.mp4", ["ftyp", "moov", "moof", "mdat", "moof", "mdat"])
+    assert is_fragmented(fragmented)
+    assert needs_faststart(fragmented)
+
+
+@requires_ffmpeg
+def test_faststart_remuxes_fragmented_mp4(tmp_path):
+    # 워커가 처리 중 스트리밍할 때와 같은 플래그로 만든 fragmented MP4
+    path = tmp_path / "output.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25:duration=3",
+         "-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", "25", "-movflags", FRAGMENTED_MP4_FLAGS, str(path)],
+        check=True,
+    )
+    assert is_fragmented(path)
+    frames = frame_count(path)
+
+    assert faststart(path)
+    boxes = read_top_level_boxes(path)
+    assert "moof" not in boxes
+    assert boxes.index("moov") < boxes.index("mdat")
+    assert frame_count(path) == frames
+    assert not faststart(path)
@@ -0,0 +1,55 @@
+import json
+
+from result_cache import ResultCache
+
+
+def make_result(tmp_path, name: str, size: int):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return path
+
+
+def index_order(cache: ResultCache) -> list:
+    return [entry["key"] for entry in json.loads(cache.index_path.read_text())]
+
+
+def test_put_get_and_materialize(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1000)
+    cache.put("a", make_result(tmp_path, "a.mp4", 100))
+    cached = cache.get("a")
+    assert cached == cache.cache_dir / "a.mp4"
+    output = tmp_path / "output.mp4"
+    cache.materialize(cached, output)
+    assert output.read_bytes() == cached.read_bytes()
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 250)
+    for key in ("a", "b"):
+        cache.put(key, make_result(tmp_path, f"{key}.mp4", 100))
+    cache.get("a")  # b 가 가장 오래 안 쓴 항목이 됨
+    cache.put("c", make_result(tmp_path, "c.mp4", 100))
+    assert list(cache.entries) == ["a", "c"]
+    assert not (cache.cache_dir / "b.mp4").exists()
+    assert cache.evictions == 1
+
+
+def test_hit_order_survives_restart(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1000, save_interval=0)
+    for key in ("a", "b"):
+        cache.put(key, make_result(tmp_path, f"{key}.mp4", 100))
+    cache.get("a")
+    assert index_order(cache) == ["b", "a"]
+    assert list(ResultCache(tmp_path / "cache", 1000).entries) == ["b", "a"]
+
+
+def test_hit_order_is_saved_on_flush_between_intervals(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1000, save_interval=3600)
+    for key in ("a", "b"):
+        cache.put(key, make_result(tmp_path, f"{key}.mp4", 100))
+    cache.get("a")
+    assert index_order(cache) == ["a", "b"]  # 간격 전에는 쓰지 않음
+    cache.flush()
+    assert index_order(cache) == ["b", "a"]
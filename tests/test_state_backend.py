@@ -0,0 +1,26 @@
+from job_store import JobStore
+from state_backend import SQLiteStateBackend, create_state_backend
+
+
+def test_sqlite_background_writes_keep_latest_state(tmp_path):
+    backend = create_state_backend("sqlite", JobStore(tmp_path / "jobs.sqlite3"), "", 60)
+    assert isinstance(backend, SQLiteStateBackend)
+    for progress in range(500):
+        backend.save("a", {"status": "processing", "progress": progress}, None, False)
+    backend.save("b", {"status": "queued"}, None, True)
+    backend.delete("b")
+    backend.close()
+
+    assert backend.get("a")["status"] == {"status": "processing", "progress": 499}
+    assert backend.get("b") is None
+    stats = backend.stats()
+    assert stats["errors"] == 0 and stats["pending"] == 0
+
+
+def test_sqlite_save_after_delete_wins(tmp_path):
+    backend = create_state_backend("sqlite", JobStore(tmp_path / "jobs.sqlite3"), "", 60)
+    backend.delete("a")
+    backend.save("a", {"status": "completed"}, "/tmp/out.mp4", True)
+    backend.close()
+    record = backend.get("a")
+    assert record["status"]["status"] == "completed" and record["output_path"] == "/tmp/out.mp4"
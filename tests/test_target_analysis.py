@@ -0,0 +1,45 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from target_analysis import TargetAnalysisCache
+
+numpy = pytest.importorskip("numpy")
+
+
+def fake_face(x: float):
+    return SimpleNamespace(
+        bounding_box=numpy.array([x, 10, x + 50, 60], numpy.float32),
+        score_set={"detector": 0.9, "landmarker": 0.8},
+        landmark_set={key: numpy.zeros((5, 2) if key.startswith("5") else (68, 2)) for key in ("5", "5/68", "68", "68/5")},
+        angle=0,
+        embedding=numpy.ones(512),
+        normed_embedding=numpy.ones(512),
+        gender="female",
+        age=range(20, 30),
+        race="white",
+    )
+
+
+def test_write_keeps_face_data_without_frames(tmp_path):
+    target = tmp_path / "target.mp4"
+    target.write_bytes(b"video")
+    frames = {f"{index:04d}.png": numpy.full((8, 8, 3), index, numpy.uint8) for index in range(3)}
+    cache = TargetAnalysisCache(tmp_path / "analysis")
+
+    manifest = cache.write(
+        target, [], list(frames), frames.__getitem__,
+        lambda frame: [fake_face(100), fake_face(10)] if frame[0, 0, 0] else [],
+        lambda frame: str(int(frame[0, 0, 0])),
+    )
+
+    entry_dir = cache.entry_dir(target)
+    assert not (entry_dir / "frames.npy").exists()
+    assert manifest["frame_count"] == 3 and manifest["frame_shape"] == [8, 8, 3]
+    assert cache.is_valid(target, [])
+    data = cache.open(target)
+    assert "frames" not in data
+    assert list(data["frame_hashes"]) == ["0", "1", "2"]
+    assert list(data["face_counts"]) == [0, 2, 2]
+    assert list(data["selected"]) == [-1, 0, 0]
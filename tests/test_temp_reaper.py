@@ -0,0 +1,97 @@
+import os
+import time
+
+import pytest
+
+from job_store import JobStore
+from temp_reaper import TempReaper, job_files, job_id_from_filename
+
+HOUR = 3600
+
+
+@pytest.fixture
+def temp_dir(tmp_path):
+    path = tmp_path / "temp_api"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.db")
+
+
+def add_job(store: JobStore, temp_dir, job_id: str, state: str, age: float, size: int = 100):
+    """age 초 전에 마지막으로 바뀐 작업 + 그 파일 (업로드 사진, 결과 영상)"""
+    store.save(job_id, {"status": state})
+    updated_at = time.time() - age
+    store.db.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (updated_at, job_id))
+    for name in (f"camera_face_{job_id}.jpg", f"output_{job_id}.mp4"):
+        path = temp_dir / name
+        path.write_bytes(b"\0" * size)
+        os.utime(path, (updated_at, updated_at))
+
+
+def add_orphan(temp_dir, job_id: str, age: float):
+    path = temp_dir / f"camera_face_{job_id}.jpg"
+    path.write_bytes(b"\0" * 100)
+    os.utime(path, (time.time() - age, time.time() - age))
+
+
+def test_job_id_from_filename(temp_dir):
+    assert job_id_from_filename("output_abc.mp4") == "abc"
+    assert job_id_from_filename("output_abc.preview.mp4") == "abc"
+    assert job_id_from_filename("index.json") is None
+    add_orphan(temp_dir, "abc", 0)
+    assert job_files(temp_dir, "abc") == [temp_dir / "camera_face_abc.jpg"]
+
+
+def test_ttl_removes_expired_finished_jobs(temp_dir, store):
+    add_job(store, temp_dir, "expired", "completed", 2 * HOUR)
+    add_job(store, temp_dir, "failed", "failed", 2 * HOUR)
+    add_job(store, temp_dir, "fresh", "completed", 60)
+    add_job(store, temp_dir, "running", "processing", 2 * HOUR)  # 종료되지 않은 작업은 TTL 대상 아님
+    add_job(store, temp_dir, "active", "completed", 2 * HOUR)  # 아직 메모리에서 쓰는 작업
+    reaper = TempReaper(temp_dir, store, HOUR, 0)
+
+    assert sorted(reaper.run_once(["active"])) == ["expired", "failed"]
+    assert job_files(temp_dir, "expired") == [] and job_files(temp_dir, "failed") == []
+    for job_id in ("fresh", "running", "active"):
+        assert len(job_files(temp_dir, job_id)) == 2
+    assert store.job_ids() == {"fresh", "running", "active"}
+    assert reaper.stats()["reaped_jobs"] == 2 and reaper.stats()["freed_bytes"] == 400
+
+
+def test_orphans_are_removed_after_ttl(temp_dir, store):
+    add_orphan(temp_dir, "old", 2 * HOUR)
+    add_orphan(temp_dir, "new", 60)  # 막 올라와 아직 저장소에 기록되기 전
+    add_orphan(temp_dir, "queued", 2 * HOUR)  # 대기열에서 기다리는 작업
+    (temp_dir / "result_cache").mkdir()
+    (temp_dir / "result_cache" / "output_cached.mp4").write_bytes(b"\0")
+    reaper = TempReaper(temp_dir, store, HOUR, 0)
+
+    assert reaper.run_once(["queued"]) == []
+    assert not (temp_dir / "camera_face_old.jpg").exists()
+    assert (temp_dir / "camera_face_new.jpg").exists() and (temp_dir / "camera_face_queued.jpg").exists()
+    assert (temp_dir / "result_cache" / "output_cached.mp4").exists()  # 하위 디렉토리는 건드리지 않음
+    assert reaper.stats()["reaped_orphans"] == 1
+
+
+def test_quota_removes_oldest_finished_jobs_first(temp_dir, store):
+    for index, job_id in enumerate(["oldest", "older", "active", "newer", "newest"]):
+        add_job(store, temp_dir, job_id, "completed", (10 - index) * 60, size=1000)
+    add_job(store, temp_dir, "running", "processing", 20 * 60, size=1000)
+    reaper = TempReaper(temp_dir, store, 24 * HOUR, 8000)  # 12000 바이트 사용 중
+
+    assert reaper.run_once(["active"]) == ["oldest", "older"]
+    assert reaper.last_usage == 8000
+    remaining = {job_id_from_filename(path.name) for path in temp_dir.iterdir()}
+    assert remaining == {"active", "newer", "newest", "running"}
+    assert store.job_ids() == remaining
+
+
+def test_under_quota_keeps_everything(temp_dir, store):
+    add_job(store, temp_dir, "done", "completed", 60, size=1000)
+    reaper = TempReaper(temp_dir, store, 24 * HOUR, 10_000)
+    assert reaper.run_once([]) == []
+    assert reaper.last_usage == 2000 and len(job_files(temp_dir, "done")) == 2
@@ -0,0 +1,110 @@
+import os
+import base64
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+JPEG = b"\xff\xd8\xff" + bytes(range(256)) * 4 + b"\xff\xd9"
+
+
+def data_url(data: bytes) -> str:
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode()
+
+
+def status_of(coroutine) -> int:
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(coroutine)
+    return error.value.status_code
+
+
+def test_base64_upload_is_saved_and_hashed(backend):
+    encoded = data_url(JPEG)
+    wrapped = encoded[:40] + "\n" + encoded[40:] + "\r\n"  # 줄바꿈이 섞인 예전 클라이언트
+    path, digest = asyncio.run(backend.save_base64_upload("b64-ok", wrapped))
+    assert path.read_bytes() == JPEG and digest == hashlib.sha256(JPEG).digest()
+    path.unlink()
+
+
+@pytest.mark.parametrize("limit, payload, expected", [
+    (100, data_url(JPEG), 413),  # 디코딩 전 길이로 거절
+    (len(JPEG) - 1, data_url(JPEG), 413),  # 디코딩한 크기로 거절
+    (10_000, "data:image/jpeg;base64,@@@not base64", 400),
+    (10_000, data_url(b"\x89PNG\r\n\x1a\n" + b"\0" * 64), 415),
+])
+def test_base64_upload_rejections(backend, monkeypatch, limit, payload, expected):
+    monkeypatch.setattr(backend, "MAX_UPLOAD_BYTES", limit)
+    job_id = f"b64-{expected}-{limit}"
+    assert status_of(backend.save_base64_upload(job_id, payload)) == expected
+    assert not (backend.TEMP_DIR / f"camera_face_{job_id}.jpg").exists()
+
+
+@pytest.fixture
+def client(backend):
+    backend.video_catalog.refresh()
+    return TestClient(backend.app)
+
+
+def saved_uploads(backend) -> set:
+    return set(backend.TEMP_DIR.glob("camera_face_*.jpg"))
+
+
+def test_base64_form_field_over_limit_is_413(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, "MAX_UPLOAD_BYTES", 100)
+    response = client.post("/faceswap-with-camera", data={"video_id": "1", "face_image_base64": data_url(JPEG)})
+    assert response.status_code == 413
+
+
+def test_streamed_upload_limits(backend, monkeypatch):
+    async def chunks(data: bytes, size: int = 100):
+        for index in range(0, len(data), size):
+            yield data[index:index + size]
+
+    monkeypatch.setattr(backend, "UPLOAD_CHUNK_SIZE", 300)  # 여러 번 나눠 쓰는 경로까지
+    path, digest = asyncio.run(backend.save_jpeg_upload("stream-ok", chunks(JPEG)))
+    assert path.read_bytes() == JPEG and digest == hashlib.sha256(JPEG).digest()
+    path.unlink()
+    monkeypatch.setattr(backend, "MAX_UPLOAD_BYTES", 500)
+    assert status_of(backend.save_jpeg_upload("stream-big", chunks(JPEG))) == 413
+    monkeypatch.setattr(backend, "MAX_UPLOAD_BYTES", 10_000)
+    assert status_of(backend.save_jpeg_upload("stream-bad", chunks(JPEG[:-2]))) == 415
+
+
+def test_unknown_video_is_rejected_before_saving(backend, client):
+    before = saved_uploads(backend)
+    response = client.post("/faceswap-with-camera/raw?video_id=99", content=JPEG, headers={"content-type": "image/jpeg"})
+    assert response.status_code == 400 and "Invalid video_id" in response.json()["detail"]
+    response = client.post("/faceswap-with-camera", data={"video_id": "99"}, files={"face_image": ("face.jpg", JPEG, "image/jpeg")})
+    assert response.status_code == 400
+    assert saved_uploads(backend) == before
+
+
+def test_face_check_is_opt_in_and_rejection_removes_upload(backend, client, monkeypatch):
+    assert backend.SOURCE_FACE_CHECK is (os.environ.get("FACEFUSION_SOURCE_FACE_CHECK") == "1")
+
+    def no_face(source_path, output_size):
+        raise backend.SourceFaceError("no_face", "No face found in the source image")
+
+    monkeypatch.setattr(backend, "SOURCE_FACE_CHECK", True)
+    monkeypatch.setattr(backend, "prepare_source_face", no_face)
+    before = saved_uploads(backend)
+    response = client.post("/faceswap-with-camera/raw?video_id=1", content=JPEG, headers={"content-type": "image/jpeg"})
+    assert response.status_code == 422
+    response = client.post("/faceswap-with-camera", data={"video_id": "1"}, files={"face_image": ("face.jpg", JPEG, "image/jpeg")})
+    assert response.status_code == 422
+    assert saved_uploads(backend) == before
+
+
+def test_failed_submit_removes_upload(backend, client, monkeypatch):
+    async def broken_submit(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(backend, "submit_faceswap_job", broken_submit)
+    before = saved_uploads(backend)
+    response = client.post("/faceswap-with-camera", data={"video_id": "1"}, files={"face_image": ("face.jpg", JPEG, "image/jpeg")})
+    assert response.json()["success"] is False
+    response = client.post("/faceswap-with-camera/raw?video_id=1", content=JPEG, headers={"content-type": "image/jpeg"})
+    assert response.json()["success"] is False
+    assert saved_uploads(backend) == before
@@ -0,0 +1,149 @@
+"""상주형 워커 풀 - CPU 스텁 엔진(facefusion_worker.py --engine stub)으로 실제 워커 프로세스를 띄워서"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from facefusion_worker import DRAIN_MARKER, split_drain_marker
+from worker_pool import WorkerPool
+
+STAGES = {"starting", "extract", "swap", "enhance", "merge"}
+
+
+def stub_pool(tmp_path: Path, size: int = 1, job_delay: float = 0.2) -> WorkerPool:
+    command = WorkerPool.default_command("stub", tmp_path, tmp_path / "analysis") + ["--stub-job-delay", str(job_delay)]
+    return WorkerPool(size, command, ready_timeout=30)
+
+
+def stub_args(tmp_path: Path, name: str) -> list:
+    target = tmp_path / "target.mp4"
+    target.write_bytes(b"video" * 100)
+    return ["headless-run", "--target-path", str(target), "--output-path", str(tmp_path / f"{name}.mp4")]
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"abc", (b"abc", False, b"")),
+    (b"abc" + DRAIN_MARKER + b"def", (b"abc", True, b"def")),
+    (b"abc" + DRAIN_MARKER[:5], (b"abc", False, DRAIN_MARKER[:5])),
+    (DRAIN_MARKER[:1] + b"x", (DRAIN_MARKER[:1] + b"x", False, b"")),
+])
+def test_split_drain_marker(data, expected):
+    assert split_drain_marker(data) == expected
+
+
+def test_final_progress_covers_every_stage(tmp_path):
+    async def scenario():
+        pool = stub_pool(tmp_path)
+        await pool.start()
+        events = []
+        try:
+            result = await pool.run("job", stub_args(tmp_path, "job"), events.append)
+        finally:
+            await pool.stop()
+        return result, events
+
+    result, events = asyncio.run(scenario())
+    assert result["returncode"] == 0
+    final = events[-1]
+    assert final.get("final") and final["stage"] == "done" and final["progress"] == 100
+    assert set(final["stage_times"]) == STAGES
+    assert [event for event in events if event.get("final")] == [final]
+
+
+async def wait_until(condition, timeout: float = 15.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+def test_normal_job_copies_target(tmp_path):
+    async def scenario():
+        pool = stub_pool(tmp_path)
+        await pool.start()
+        try:
+            assert pool.available and pool.ready_count == 1
+            result = await pool.run("job", stub_args(tmp_path, "job"))
+            return result, pool.stats()
+        finally:
+            await pool.stop()
+
+    result, stats = asyncio.run(scenario())
+    assert result["event"] == "done" and result["job_id"] == "job" and result["returncode"] == 0
+    assert (tmp_path / "job.mp4").read_bytes() == (tmp_path / "target.mp4").read_bytes()
+    assert stats["workers"][0]["jobs_done"] == 1 and stats["workers"][0]["current_job"] is None
+
+
+def test_cancel_running_job_replaces_worker(tmp_path):
+    async def scenario():
+        pool = stub_pool(tmp_path, job_delay=5)
+        await pool.start()
+        try:
+            worker = pool.workers[0]
+            old_pid = worker.process.pid
+            events = []
+            task = asyncio.create_task(pool.run("slow", stub_args(tmp_path, "slow"), events.append))
+            await wait_until(lambda: events)
+            assert pool.cancel("slow")
+            result = await task
+            await wait_until(lambda: pool.ready_count == 1 and pool.idle[None].qsize() == 1)
+            new_pid = worker.process.pid
+            after = await pool.run("next", stub_args(tmp_path, "next"))
+            return result, old_pid, new_pid, after, worker.cancelled
+        finally:
+            await pool.stop()
+
+    result, old_pid, new_pid, after, cancelled = asyncio.run(scenario())
+    assert result == {"returncode": 1, "error": "Cancelled", "cancelled": True}
+    assert new_pid != old_pid
+    assert after["returncode"] == 0
+    assert not cancelled
+
+
+def test_worker_crash_mid_job_is_reported_and_respawned(tmp_path):
+    async def scenario():
+        pool = stub_pool(tmp_path, job_delay=5)
+        await pool.start()
+        try:
+            worker = pool.workers[0]
+            old_pid = worker.process.pid
+            events = []
+            task = asyncio.create_task(pool.run("crash", stub_args(tmp_path, "crash"), events.append))
+            await wait_until(lambda: events)
+            worker.process.kill()
+            result = await task
+            await wait_until(lambda: pool.ready_count == 1 and pool.idle[None].qsize() == 1)
+            return result, old_pid, worker.process.pid
+        finally:
+            await pool.stop()
+
+    result, old_pid, new_pid = asyncio.run(scenario())
+    assert result["returncode"] == 1 and result["error"].startswith("Worker crashed")
+    assert "cancelled" not in result
+    assert new_pid != old_pid
+
+
+def test_cancel_before_worker_and_discard(tmp_path):
+    async def scenario():
+        pool = stub_pool(tmp_path, job_delay=0.5)
+        await pool.start()
+        try:
+            busy = asyncio.create_task(pool.run("busy", stub_args(tmp_path, "busy")))
+            await asyncio.sleep(0.1)
+            waiting = asyncio.create_task(pool.run("waiting", stub_args(tmp_path, "waiting")))
+            await asyncio.sleep(0.1)
+            assert not pool.cancel("waiting")  # 아직 워커가 없음 - 받는 즉시 취소
+            busy_result, waiting_result = await busy, await waiting
+            # 워커를 받지 못하고 끝난 작업의 취소 표시는 discard 로 정리
+            assert not pool.cancel("never-ran")
+            pool.discard("never-ran")
+            return busy_result, waiting_result, set(pool.cancelled)
+        finally:
+            await pool.stop()
+
+    busy_result, waiting_result, leftover = asyncio.run(scenario())
+    assert busy_result["returncode"] == 0
+    assert waiting_result["cancelled"] is True
+    assert not (tmp_path / "waiting.mp4").exists()
+    assert leftover == set()
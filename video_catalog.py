@@ -0,0 +1,234 @@
+"""시나리오 영상 카탈로그 - 시작할 때 한 번 만들고 디렉토리가 바뀔 때만 갱신
+
+요청마다 VIDEOS_DIR 를 glob/stat 하는 대신 영상 목록과 메타데이터(길이, fps, 해상도,
+프레임 수, 크기, 포스터 이미지)를 미리 만들어 둔다. 인덱스는 JSON 으로 저장해 재시작해도
+바뀌지 않은 파일은 다시 해시/분석하지 않는다.
+
+- key: 내용 해시 - 파일 이름이 바뀌어도 같은 영상이면 같음
+- id: 기존 클라이언트용 번호 - 파일 이름별로 한 번 정해지면 유지 (처음에는 이름 순서로 1부터,
+  새 파일은 다음 번호) 그래서 영상을 추가해도 기존 번호가 밀리지 않는다
+
+메타데이터/포스터는 ffprobe/ffmpeg (FaceFusion 환경에 있음), 없으면 cv2, 둘 다 없으면 생략.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+CATALOG_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+POSTER_WIDTH = 480
+POSTER_SECONDS = 1.0  # 첫 프레임은 검은 화면인 경우가 많아 조금 뒤에서 캡처
+METADATA_FIELDS = ("duration", "fps", "width", "height", "frame_count")
+
+
+def content_key(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def parse_rate(value: Optional[str]) -> Optional[float]:
+    try:
+        rate = float(Fraction(value))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return rate or None
+
+
+def probe_video(path: Path) -> dict:
+    """길이/fps/해상도/프레임 수 - ffprobe, 없으면 cv2 (둘 다 없으면 빈 dict)"""
+    if shutil.which("ffprobe"):
+        try:
+            completed = subprocess.run(
+                ["ffprobe", "-v", "error", "-select_streams", "v:0",
+                 "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames,duration:format=duration",
+                 "-of", "json", str(path)],
+                capture_output=True, text=True, timeout=30,
+            )
+            data = json.loads(completed.stdout or "{}")
+        except (OSError, subprocess.SubprocessError, ValueError):
+            data = {}
+        stream = (data.get("streams") or [{}])[0]
+        if stream:
+            fps = parse_rate(stream.get("avg_frame_rate")) or parse_rate(stream.get("r_frame_rate"))
+            duration = float(stream.get("duration") or (data.get("format") or {}).get("duration") or 0) or None
+            frame_count = int(stream["nb_frames"]) if str(stream.get("nb_frames", "")).isdigit() else None
+            if frame_count is None and duration and fps:
+                frame_count = round(duration * fps)
+            return {"duration": duration, "fps": fps, "width": stream.get("width"), "height": stream.get("height"),
+                    "frame_count": frame_count}
+    try:
+        import cv2
+    except ImportError:
+        return {}
+    capture = cv2.VideoCapture(str(path))
+    try:
+        if not capture.isOpened():
+            return {}
+        fps = capture.get(cv2.CAP_PROP_FPS) or None
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        return {
+            "duration": frame_count / fps if frame_count and fps else None,
+            "fps": fps,
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            "frame_count": frame_count,
+        }
+    finally:
+        capture.release()
+
+
+def extract_poster(path: Path, poster_path: Path, at: float) -> bool:
+    """at 초 위치의 프레임을 POSTER_WIDTH 폭 JPEG 로 - ffmpeg, 없으면 cv2"""
+    tmp_path = poster_path.with_suffix(".tmp.jpg")
+    if shutil.which("ffmpeg"):
+        try:
+            completed = subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-ss", f"{at:.2f}", "-i", str(path), "-frames:v", "1",
+                 "-vf", f"scale={POSTER_WIDTH}:-2", "-q:v", "4", str(tmp_path)],
+                capture_output=True, timeout=60,
+            )
+        except (OSError, subprocess.SubprocessError):
+            completed = None
+        if completed is not None and completed.returncode == 0 and tmp_path.exists():
+            os.replace(tmp_path, poster_path)
+            return True
+        tmp_path.unlink(missing_ok=True)
+    try:
+        import cv2
+    except ImportError:
+        return False
+    capture = cv2.VideoCapture(str(path))
+    try:
+        capture.set(cv2.CAP_PROP_POS_MSEC, at * 1000)
+        ok, frame = capture.read()
+        if not ok:
+            return False
+        height, width = frame.shape[:2]
+        frame = cv2.resize(frame, (POSTER_WIDTH, max(2, round(height * POSTER_WIDTH / width / 2) * 2)))
+        if not cv2.imwrite(str(tmp_path), frame, [cv2.IMWRITE_JPEG_QUALITY, 85]):
+            return False
+        os.replace(tmp_path, poster_path)
+        return True
+    finally:
+        capture.release()
+
+
+class VideoCatalog:
+    """영상 목록 + 메타데이터 - refresh() 는 스레드 풀에서, 조회는 이벤트 루프에서 (목록은 통째로 교체)"""
+
+    def __init__(self, videos_dir: Path, index_path: Path, poster_dir: Path,
+                 prober: Callable[[Path], dict] = probe_video,
+                 poster_maker: Callable[[Path, Path, float], bool] = extract_poster):
+        self.videos_dir = videos_dir
+        self.index_path = index_path
+        self.poster_dir = poster_dir
+        self.prober = prober
+        self.poster_maker = poster_maker
+        self.entries: List[dict] = []  # id 순서
+        self.by_key: Dict[str, dict] = {}
+        self.by_id: Dict[int, dict] = {}
+        self.ids: Dict[str, int] = {}  # 파일 이름 -> 번호 (지워진 파일 번호도 다시 쓰지 않도록 유지)
+        self.etag = '"empty"'
+        self.refreshes = 0
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CATALOG_VERSION:
+            return
+        self.ids = {name: int(number) for name, number in data.get("ids", {}).items()}
+        self._publish(data.get("entries", []))
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CATALOG_VERSION, "ids": self.ids, "entries": self.entries}, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def _publish(self, entries: List[dict]):
+        entries = sorted(entries, key=lambda entry: entry["id"])
+        self.by_key = {entry["key"]: entry for entry in entries}
+        self.by_id = {entry["id"]: entry for entry in entries}
+        self.entries = entries
+        self.etag = '"' + hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()[:16] + '"'
+
+    def poster_path(self, key: str) -> Path:
+        return self.poster_dir / f"{key}.jpg"
+
+    def refresh(self) -> bool:
+        """디렉토리를 다시 읽어 바뀐 파일만 해시/분석 - 목록이 바뀌었으면 True (블로킹, 스레드 풀에서 호출)"""
+        self.refreshes += 1
+        previous = {entry["filename"]: entry for entry in self.entries}
+        entries = []
+        for path in sorted(self.videos_dir.glob("*.mp4"), key=lambda x: x.name):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entry = previous.get(path.name)
+            if not entry or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                entry = {"filename": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                         "key": content_key(path), "poster": False}
+                entry.update({field: None for field in METADATA_FIELDS})
+                entry.update({key: value for key, value in self.prober(path).items() if key in METADATA_FIELDS})
+            if path.name not in self.ids:
+                self.ids[path.name] = max(self.ids.values(), default=0) + 1
+            entry = {**entry, "id": self.ids[path.name]}
+            if not entry["poster"] or not self.poster_path(entry["key"]).exists():
+                self.poster_dir.mkdir(parents=True, exist_ok=True)
+                at = min(POSTER_SECONDS, (entry["duration"] or 0) / 2)
+                entry["poster"] = self.poster_maker(path, self.poster_path(entry["key"]), at)
+            entries.append(entry)
+        if entries == sorted(self.entries, key=lambda entry: entry["filename"]) and self.index_path.exists():
+            return False
+        self._publish(entries)
+        self._save_index()
+        return True
+
+    def resolve(self, video_id: Union[int, str]) -> Optional[dict]:
+        """번호("3") 또는 내용 키로 영상 찾기"""
+        video_id = str(video_id).strip()
+        if video_id.isdigit():
+            return self.by_id.get(int(video_id))
+        return self.by_key.get(video_id)
+
+    def path(self, entry: dict) -> Path:
+        return self.videos_dir / entry["filename"]
+
+    def find(self, path: Path) -> Optional[dict]:
+        """영상 경로로 찾기 (카탈로그 디렉토리의 파일만)"""
+        if path.parent != self.videos_dir:
+            return None
+        return next((entry for entry in self.entries if entry["filename"] == path.name), None)
+
+    def paths(self) -> List[Path]:
+        return [self.path(entry) for entry in self.entries]
+
+    def frame_count(self, entry: dict) -> Optional[int]:
+        """작업 비용 추정치 (길이 × fps)"""
+        if entry.get("frame_count"):
+            return entry["frame_count"]
+        if entry.get("duration") and entry.get("fps"):
+            return round(entry["duration"] * entry["fps"])
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "videos": len(self.entries),
+            "etag": self.etag,
+            "refreshes": self.refreshes,
+            "index_path": str(self.index_path),
+        }
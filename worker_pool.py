@@ -0,0 +1,267 @@
+"""상주형 FaceFusion 워커 풀 (API 쪽)
+
+facefusion_worker.py 프로세스를 N개 미리 띄워 두고 작업을 하나씩 넘긴다.
+워커가 죽으면 자동으로 다시 띄운다.
+devices 가 있으면 장치마다 size 개씩 띄우고 각 워커를 CUDA_VISIBLE_DEVICES 로 그 장치에 고정한다.
+워커는 각자 새 프로세스 그룹으로 띄우므로 cancel() 이 워커가 띄운 ffmpeg 까지 한 번에 종료한다.
+"""
+
+import os
+import sys
+import signal
+import json
+import asyncio
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from job_log import log
+
+WORKER_SCRIPT = Path(__file__).resolve().parent / "facefusion_worker.py"
+
+
+class WorkerError(Exception):
+    pass
+
+
+async def terminate_process_group(process: asyncio.subprocess.Process, grace: float = 5.0):
+    """프로세스와 그 자식(ffmpeg 등)까지 종료 - SIGTERM 후 grace 초 안에 안 끝나면 SIGKILL
+
+    start_new_session=True 로 띄운 프로세스여야 함 (pid 가 곧 프로세스 그룹 id)
+    """
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class _Worker:
+    def __init__(self, index: int, device: Optional[str] = None):
+        self.index = index
+        self.device = device
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.jobs_done = 0
+        self.current_job: Optional[str] = None
+        self.cancelled = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+
+class WorkerPool:
+    """미리 예열된 워커 프로세스 풀"""
+
+    def __init__(self, size: int, command: List[str], env: Optional[Dict[str, str]] = None,
+                 cwd: Optional[str] = None, ready_timeout: float = 600.0, devices: Optional[List[str]] = None):
+        devices = devices or [None]
+        self.size = size * len(devices)
+        self.command = command
+        self.env = env
+        self.cwd = cwd
+        self.ready_timeout = ready_timeout
+        self.workers = [_Worker(i * len(devices) + d, device) for i in range(size) for d, device in enumerate(devices)]
+        self.idle: Dict[Optional[str], asyncio.Queue] = {device: asyncio.Queue() for device in devices}
+        self.waiting: Dict[Optional[str], int] = {device: 0 for device in devices}  # 장치별 워커를 기다리는 작업 수
+        self.cancelled: set = set()  # 워커를 받기 전에 취소된 작업 label
+        self.started = False
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def default_command(cls, engine: str, facefusion_dir: Path, analysis_dir: Path) -> List[str]:
+        # API 가 이미 facefusion micromamba 환경에서 돌고 있으므로 같은 인터프리터 사용
+        return [
+            sys.executable, str(WORKER_SCRIPT), "--engine", engine,
+            "--facefusion-dir", str(facefusion_dir), "--analysis-dir", str(analysis_dir),
+        ]
+
+    @property
+    def ready_count(self) -> int:
+        return sum(1 for worker in self.workers if worker.alive)
+
+    @property
+    def available(self) -> bool:
+        return self.started and self.ready_count > 0
+
+    async def start(self):
+        results = await asyncio.gather(*(self._spawn(worker) for worker in self.workers), return_exceptions=True)
+        for worker, result in zip(self.workers, results):
+            if isinstance(result, Exception):
+                self.last_error = str(result)
+                log(f"❌ Failed to start: {result}", worker=worker.index, level="error")
+            else:
+                self.idle[worker.device].put_nowait(worker)
+        self.started = True
+        log(f"⚡ Worker pool ready: {self.ready_count}/{self.size} warm workers", ready=self.ready_count, size=self.size)
+
+    async def stop(self):
+        for worker in self.workers:
+            if worker.alive:
+                try:
+                    worker.process.stdin.write(b'{"type": "shutdown"}\n')
+                    await worker.process.stdin.drain()
+                    await asyncio.wait_for(worker.process.wait(), timeout=10)
+                except Exception:
+                    worker.process.kill()
+        self.started = False
+
+    async def _spawn(self, worker: _Worker):
+        env = self.env
+        if worker.device is not None:
+            env = {**(self.env if self.env is not None else os.environ), "CUDA_VISIBLE_DEVICES": worker.device}
+        worker.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=self.cwd,
+            start_new_session=True,
+        )
+        event = await asyncio.wait_for(self._read_event(worker), timeout=self.ready_timeout)
+        if event.get("event") != "ready":
+            worker.process.kill()
+            raise WorkerError(event.get("error") or "Worker did not become ready")
+        gpu = f", GPU {worker.device}" if worker.device is not None else ""
+        log(f"✅ Warm ({event.get('engine')}, pid {event.get('pid')}{gpu}, {event.get('warmup_time', 0):.1f}s)",
+            worker=worker.index, warmup_time=event.get("warmup_time"))
+
+    async def _read_event(self, worker: _Worker) -> dict:
+        while True:
+            line = await worker.process.stdout.readline()
+            if not line:
+                raise WorkerError(f"Worker {worker.index} exited (code {worker.process.returncode})")
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+
+    async def _respawn(self, worker: _Worker):
+        if worker.alive:
+            worker.process.kill()
+        try:
+            await self._spawn(worker)
+            self.idle[worker.device].put_nowait(worker)
+        except Exception as e:
+            self.last_error = str(e)
+            log(f"❌ Respawn failed: {e}", worker=worker.index, level="error")
+
+    def _idle_queue(self, device: Optional[str]) -> asyncio.Queue:
+        """장치가 정해졌으면 그 장치의 워커, 아니면 유휴 워커가 가장 많은 장치"""
+        if device in self.idle:
+            return self.idle[device]
+        return max(self.idle.values(), key=lambda queue: queue.qsize())
+
+    async def _call(self, label: str, message: dict, done_event: str, match: dict,
+                    on_progress: Optional[Callable[[dict], None]] = None, device: Optional[str] = None) -> dict:
+        """유휴 워커 하나에 메시지를 보내고 완료 이벤트까지 대기"""
+        queue = self._idle_queue(device)
+        key = next(key for key, idle in self.idle.items() if idle is queue)
+        self.waiting[key] += 1
+        try:
+            worker = await queue.get()
+        finally:
+            self.waiting[key] -= 1
+        if label in self.cancelled:
+            self.cancelled.discard(label)
+            queue.put_nowait(worker)
+            return {"returncode": 1, "error": "Cancelled", "cancelled": True}
+        worker.current_job = label
+        worker.cancelled = False
+        try:
+            worker.process.stdin.write((json.dumps(message) + "\n").encode())
+            await worker.process.stdin.drain()
+            while True:
+                event = await self._read_event(worker)
+                if event.get("event") == "progress":
+                    # 이전 작업의 늦게 도착한 진행 이벤트는 무시
+                    if on_progress and event.get("job_id") == label:
+                        on_progress(event)
+                    continue
+                if event.get("event") == done_event and all(event.get(k) == v for k, v in match.items()):
+                    break
+            worker.jobs_done += 1
+            worker.cancelled = False  # 취소 요청보다 작업이 먼저 끝남 - 종료 태스크는 current_job 을 보고 건너뜀
+        except (WorkerError, ConnectionError, BrokenPipeError) as e:
+            worker.current_job = None
+            asyncio.create_task(self._respawn(worker))
+            if worker.cancelled:
+                worker.cancelled = False
+                return {"returncode": 1, "error": "Cancelled", "cancelled": True}
+            return {"returncode": 1, "error": f"Worker crashed: {e}"}
+        worker.current_job = None
+        self.idle[worker.device].put_nowait(worker)
+        return event
+
+    async def run(self, job_id: str, args: List[str], on_progress: Optional[Callable[[dict], None]] = None,
+                  stream_path: Optional[Path] = None, device: Optional[str] = None) -> dict:
+        """작업 하나를 예열된 워커에서 실행하고 결과 이벤트 반환 (진행 이벤트는 on_progress 로 전달)
+
+        stream_path: 처리 중 결과를 이어 쓸 경로 (fragmented MP4, 끝나면 출력 경로로 이름 변경)
+        """
+        message = {"type": "run", "job_id": job_id, "args": args}
+        if stream_path:
+            message["stream_path"] = str(stream_path)
+        return await self._call(job_id, message, "done", {"job_id": job_id}, on_progress, device)
+
+    async def run_batch(self, batch_id: str, jobs: List[dict],
+                        on_progress: Optional[Callable[[dict], None]] = None, device: Optional[str] = None) -> dict:
+        """같은 타겟의 작업 여러 개를 워커 하나에서 한 번에 실행 - results 에 작업별 결과"""
+        message = {"type": "run_batch", "batch_id": batch_id, "jobs": jobs}
+        return await self._call(batch_id, message, "batch_done", {"batch_id": batch_id}, on_progress, device)
+
+    async def prepare(self, target_path: Path, args: List[str]) -> dict:
+        """타겟 영상 사전 분석 (이미 캐시가 유효하면 워커가 바로 반환)"""
+        message = {"type": "prepare", "target_path": str(target_path), "args": args}
+        return await self._call(f"prepare:{target_path.name}", message, "prepared", {"target_path": str(target_path)})
+
+    def cancel(self, label: str) -> bool:
+        """label(job_id / batch_id) 작업 중단 - 실행 중이면 워커 프로세스 그룹을 종료하고 새로 띄움
+
+        아직 워커를 기다리는 중이면 워커를 받는 즉시 취소 결과를 돌려준다
+        """
+        for worker in self.workers:
+            if worker.current_job == label and worker.alive:
+                worker.cancelled = True
+                log(f"🛑 Cancelling {label} (pid {worker.process.pid})", worker=worker.index)
+                asyncio.create_task(self._terminate(worker, label, worker.process))
+                return True
+        self.cancelled.add(label)
+        return False
+
+    async def _terminate(self, worker: _Worker, label: str, process: asyncio.subprocess.Process):
+        """취소 요청 후 태스크가 돌기 전에 작업이 끝났으면 (워커가 다음 작업을 받았을 수도 있음) 종료하지 않음"""
+        if worker.current_job != label or worker.process is not process:
+            return
+        await terminate_process_group(process)
+
+    def discard(self, label: str):
+        """끝난 작업(종료 상태)의 남은 취소 표시 정리 - 워커를 받지 않고 끝난 작업의 label 이 쌓이지 않게"""
+        self.cancelled.discard(label)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "ready": self.ready_count,
+            "idle": sum(queue.qsize() for queue in self.idle.values()),
+            "waiting": {str(device): count for device, count in self.waiting.items()},
+            "last_error": self.last_error,
+            "workers": [
+                {
+                    "index": worker.index,
+                    "device": worker.device,
+                    "pid": worker.process.pid if worker.process else None,
+                    "alive": worker.alive,
+                    "current_job": worker.current_job,
+                    "jobs_done": worker.jobs_done,
+                }
+                for worker in self.workers
+            ],
+        }